@@ -0,0 +1,152 @@
+"""
+Acumulados de ventas por día × libro × punto de venta (tabla `venta_diaria`).
+
+Los reportes de ventas no recorren el libro mayor (`movimiento_libro`), que
+crece sin límite, sino esta tabla, cuyo tamaño depende de los días, libros
+y tiendas con ventas:
+- Cada venta suma sus unidades, su importe y un movimiento a la fila de su
+  día en la misma transacción que la registra (crear movimiento, lotes y
+  ventas por tienda), con un INSERT ... ON DUPLICATE KEY UPDATE.
+- `punto_venta_id = 0` agrupa las ventas del inventario global (sin tienda).
+- El importe usa el precio del libro al momento de la venta.
+
+Para reconstruir la tabla desde el libro mayor (carga inicial o corrección):
+    python acumulados.py                      # todo el historial
+    python acumulados.py --desde 2024-01-01   # solo desde esa fecha
+
+La reconstrucción usa el precio actual de cada libro (el libro mayor no
+guarda el precio de venta) y reemplaza un mes por transacción. Los meses
+archivados (ver particiones.py) ya no están en el libro mayor: sus
+acumulados se conservan y nunca se recalculan.
+"""
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import delete, func, literal, select
+from sqlalchemy.dialects.mysql import insert
+from sqlalchemy.orm import Session
+
+from models import InventarioLibro, Libro, MovimientoLibro, TipoMovimiento, VentaDiaria
+from particiones import frontera_lectura
+
+SIN_PUNTO_VENTA = 0
+
+
+def _clave(fecha: datetime, libro_id: int, punto_venta_id: Optional[int]) -> Tuple[date, int, int]:
+    return fecha.date(), punto_venta_id or SIN_PUNTO_VENTA, libro_id
+
+
+def sentencia_acumular(ventas: Iterable[Tuple[datetime, int, Optional[int], int, Optional[float]]]):
+    """
+    INSERT ... ON DUPLICATE KEY UPDATE de varias filas a partir de ventas
+    (fecha, libro_id, punto_venta_id, cantidad, precio). Las ventas de una
+    misma clave se suman antes, así cada fila se toca una sola vez.
+    Devuelve None si no hay ventas.
+    """
+    totales: Dict[Tuple[date, int, int], list] = defaultdict(lambda: [0, 0, 0])
+    for fecha, libro_id, punto_venta_id, cantidad, precio in ventas:
+        total = totales[_clave(fecha, libro_id, punto_venta_id)]
+        total[0] += cantidad
+        total[1] += cantidad * (precio or 0)
+        total[2] += 1
+    if not totales:
+        return None
+
+    # Orden fijo de claves: dos transacciones no se bloquean en orden cruzado
+    filas = [
+        {"dia": dia, "punto_venta_id": pv, "libro_id": libro_id,
+         "unidades": unidades, "importe": importe, "movimientos": movimientos}
+        for (dia, pv, libro_id), (unidades, importe, movimientos) in sorted(totales.items())
+    ]
+    stmt = insert(VentaDiaria).values(filas)
+    return stmt.on_duplicate_key_update(
+        unidades=VentaDiaria.unidades + stmt.inserted.unidades,
+        importe=VentaDiaria.importe + stmt.inserted.importe,
+        movimientos=VentaDiaria.movimientos + stmt.inserted.movimientos,
+    )
+
+
+async def acumular_ventas(db, ventas) -> None:
+    """Suma las ventas a `venta_diaria`. No hace commit: lo hace el llamador."""
+    stmt = sentencia_acumular(ventas)
+    if stmt is not None:
+        await db.execute(stmt)
+
+
+def _primer_dia_mes_siguiente(dia: date) -> date:
+    return (dia.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+
+def reconstruir(db: Session, desde: Optional[date] = None) -> int:
+    """
+    Recalcula `venta_diaria` desde el libro mayor. Cada mes se borra y se
+    vuelve a insertar en su propia transacción (INSERT ... SELECT agrupado).
+    Devuelve la cantidad de meses procesados.
+    """
+    frontera = frontera_lectura()
+    if frontera:
+        desde = max(desde or frontera.date(), frontera.date())
+    primera = db.execute(
+        select(func.min(MovimientoLibro.fecha_movimiento))
+        .where(MovimientoLibro.tipo == TipoMovimiento.venta)
+    ).scalar()
+    if primera is None:
+        borrar = delete(VentaDiaria)
+        if desde:
+            borrar = borrar.where(VentaDiaria.dia >= desde)
+        db.execute(borrar)
+        db.commit()
+        return 0
+
+    inicio = max(desde, primera.date()) if desde else primera.date()
+    hoy, meses = date.today(), 0
+    dia = func.date(MovimientoLibro.fecha_movimiento)
+    punto_venta = func.coalesce(MovimientoLibro.punto_venta_id, literal(SIN_PUNTO_VENTA))
+    while inicio <= hoy:
+        fin = _primer_dia_mes_siguiente(inicio)
+        agregado = (
+            select(
+                dia,
+                punto_venta,
+                InventarioLibro.libro_id,
+                func.sum(MovimientoLibro.cantidad),
+                func.sum(MovimientoLibro.cantidad * func.coalesce(Libro.precio, 0)),
+                func.count(),
+            )
+            .select_from(MovimientoLibro)
+            .join(InventarioLibro, InventarioLibro.id_inventario == MovimientoLibro.inventario_id)
+            .join(Libro, Libro.id_libro == InventarioLibro.libro_id)
+            .where(
+                MovimientoLibro.tipo == TipoMovimiento.venta,
+                MovimientoLibro.fecha_movimiento >= inicio,
+                MovimientoLibro.fecha_movimiento < fin,
+            )
+            .group_by(dia, punto_venta, InventarioLibro.libro_id)
+        )
+        db.execute(delete(VentaDiaria).where(VentaDiaria.dia >= inicio, VentaDiaria.dia < fin))
+        db.execute(
+            insert(VentaDiaria).from_select(
+                ["dia", "punto_venta_id", "libro_id", "unidades", "importe", "movimientos"], agregado
+            )
+        )
+        db.commit()
+        inicio, meses = fin, meses + 1
+    return meses
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Reconstruye los acumulados de ventas desde el libro mayor")
+    parser.add_argument("--desde", type=date.fromisoformat, help="Primer día a recalcular (AAAA-MM-DD)")
+    args = parser.parse_args()
+
+    sesion = SessionLocal()
+    try:
+        meses = reconstruir(sesion, args.desde)
+        print(f"✔ Acumulados de ventas reconstruidos ({meses} meses)")
+    finally:
+        sesion.close()
@@ -0,0 +1,207 @@
+"""
+Prueba de carga de los endpoints más usados, con reporte JSON de latencias.
+
+Escenarios (con su peso en la mezcla):
+- listar_libros: GET /libros/?limit=50
+- buscar_libros: GET /libros/?q=<palabra>
+- vender:        POST /inventario-pv/{id}/vender (con token de vendedor)
+- movimiento:    POST /movimientos/ (entrada de 1 unidad)
+- stock_bajo:    GET /inventario/stock-bajo y /inventario-pv/stock-bajo?pv=
+
+Por defecto llama a la app en el mismo proceso a través de ASGI (sin red,
+mide la app y la base de datos). Con `--url` apunta a un uvicorn ya
+levantado. Requiere una base sembrada con `python -m benchmark.sembrar`.
+
+El reporte incluye, por escenario y en total: peticiones, errores,
+peticiones por segundo y latencias p50/p95/p99/máx en milisegundos.
+
+Uso (desde Libreria-Back-End):
+    python -m benchmark.carga --duracion 30 --concurrencia 32 --salida antes.json
+    python -m benchmark.carga --url http://127.0.0.1:8000 --salida despues.json
+"""
+import argparse
+import asyncio
+import json
+import platform
+import random
+import statistics
+import subprocess
+import time
+from collections import defaultdict
+from datetime import datetime
+
+import httpx
+from sqlalchemy import select
+
+from database import SessionLocal, async_engine
+from models import InventarioLibro, InventarioPV, Usuario
+
+from benchmark.sembrar import VENDEDOR_CONTRASENA
+
+PESOS = {
+    "listar_libros": 30,
+    "buscar_libros": 25,
+    "vender": 20,
+    "movimiento": 15,
+    "stock_bajo": 10,
+}
+MUESTRA_IDS = 5000
+_BUSQUEDAS = ["sombra", "mar", "noche vien", "ciudad", "luna", "fuego pie", "garcia", "libro", "reino", "isla"]
+
+
+def _datos_de_prueba(azar: random.Random) -> dict:
+    """Ids reales para armar las peticiones (una muestra, no la tabla completa)."""
+    with SessionLocal() as db:
+        inventarios = db.scalars(select(InventarioLibro.id_inventario).limit(MUESTRA_IDS)).all()
+        inventarios_pv = db.execute(
+            select(InventarioPV.id_inventario, InventarioPV.id_punto_venta).limit(MUESTRA_IDS)
+        ).all()
+        vendedor = db.scalar(select(Usuario.email).where(Usuario.rol == "vendedor").limit(1))
+    if not inventarios or not inventarios_pv or not vendedor:
+        raise SystemExit("La base no tiene datos de prueba: ejecutá antes python -m benchmark.sembrar")
+    azar.shuffle(inventarios)
+    return {
+        "inventarios": inventarios,
+        "inventarios_pv": [tuple(fila) for fila in inventarios_pv],
+        "puntos_venta": sorted({fila.id_punto_venta for fila in inventarios_pv}),
+        "vendedor": vendedor,
+    }
+
+
+def _peticion(escenario: str, datos: dict, azar: random.Random, cabeceras: dict):
+    """Devuelve (método, ruta, kwargs de httpx) para un escenario."""
+    if escenario == "listar_libros":
+        return "GET", "/libros/", {"params": {"limit": 50}}
+    if escenario == "buscar_libros":
+        return "GET", "/libros/", {"params": {"q": azar.choice(_BUSQUEDAS), "limit": 20}}
+    if escenario == "vender":
+        id_inventario, _ = azar.choice(datos["inventarios_pv"])
+        return "POST", f"/inventario-pv/{id_inventario}/vender", {"json": {"cantidad": 1}, "headers": cabeceras}
+    if escenario == "movimiento":
+        cuerpo = {"inventario_id": azar.choice(datos["inventarios"]), "tipo": "entrada", "cantidad": 1,
+                  "observaciones": "benchmark"}
+        return "POST", "/movimientos/", {"json": cuerpo, "headers": cabeceras}
+    if azar.random() < 0.5:
+        return "GET", "/inventario/stock-bajo", {}
+    return "GET", "/inventario-pv/stock-bajo", {"params": {"pv": azar.choice(datos["puntos_venta"])}}
+
+
+def _percentiles(latencias: list) -> dict:
+    if not latencias:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None, "max_ms": None}
+    if len(latencias) == 1:
+        p50 = p95 = p99 = latencias[0]
+    else:
+        cortes = statistics.quantiles(latencias, n=100, method="inclusive")
+        p50, p95, p99 = cortes[49], cortes[94], cortes[98]
+    return {
+        "p50_ms": round(p50 * 1000, 2),
+        "p95_ms": round(p95 * 1000, 2),
+        "p99_ms": round(p99 * 1000, 2),
+        "max_ms": round(max(latencias) * 1000, 2),
+    }
+
+
+def _resumen(latencias: list, errores: int, segundos: float) -> dict:
+    return {
+        "peticiones": len(latencias),
+        "errores": errores,
+        "rps": round(len(latencias) / segundos, 1) if segundos else 0.0,
+        **_percentiles(latencias),
+    }
+
+
+def _commit_actual():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+async def ejecutar(url, duracion: float, calentamiento: float, concurrencia: int, semilla: int) -> dict:
+    azar = random.Random(semilla)
+    datos = _datos_de_prueba(azar)
+
+    if url:
+        cliente = httpx.AsyncClient(base_url=url, timeout=30)
+    else:
+        from main import app
+        cliente = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://benchmark", timeout=30)
+
+    async with cliente:
+        login = await cliente.post("/usuarios/login", json={"email": datos["vendedor"], "contrasena": VENDEDOR_CONTRASENA})
+        login.raise_for_status()
+        cabeceras = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+        latencias = defaultdict(list)
+        errores = defaultdict(int)
+        estados = defaultdict(int)
+        escenarios, pesos = list(PESOS), list(PESOS.values())
+        midiendo = False
+
+        async def trabajador(numero: int, fin: float):
+            azar_local = random.Random(semilla * 1000 + numero)
+            while time.perf_counter() < fin:
+                escenario = azar_local.choices(escenarios, pesos)[0]
+                metodo, ruta, opciones = _peticion(escenario, datos, azar_local, cabeceras)
+                inicio = time.perf_counter()
+                try:
+                    respuesta = await cliente.request(metodo, ruta, **opciones)
+                    await respuesta.aread()
+                    ok, estado = respuesta.status_code < 400, str(respuesta.status_code)
+                except httpx.HTTPError as e:
+                    ok, estado = False, e.__class__.__name__
+                transcurrido = time.perf_counter() - inicio
+                if midiendo:
+                    latencias[escenario].append(transcurrido)
+                    estados[estado] += 1
+                    if not ok:
+                        errores[escenario] += 1
+
+        # Calentamiento: llena pools de conexiones y cachés sin registrar resultados
+        if calentamiento > 0:
+            fin = time.perf_counter() + calentamiento
+            await asyncio.gather(*(trabajador(i, fin) for i in range(concurrencia)))
+
+        midiendo = True
+        inicio = time.perf_counter()
+        fin = inicio + duracion
+        await asyncio.gather(*(trabajador(i, fin) for i in range(concurrencia)))
+        segundos = time.perf_counter() - inicio
+
+    if not url:
+        await async_engine.dispose()
+
+    todas = [x for valores in latencias.values() for x in valores]
+    return {
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "commit": _commit_actual(),
+        "python": platform.python_version(),
+        "modo": url or "asgi",
+        "configuracion": {"duracion_s": duracion, "calentamiento_s": calentamiento,
+                          "concurrencia": concurrencia, "semilla": semilla, "pesos": PESOS},
+        "total": _resumen(todas, sum(errores.values()), segundos),
+        "escenarios": {
+            nombre: _resumen(latencias[nombre], errores[nombre], segundos) for nombre in escenarios
+        },
+        "codigos": dict(sorted(estados.items())),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prueba de carga con reporte JSON de latencias")
+    parser.add_argument("--url", help="URL de un uvicorn levantado (por defecto, la app en proceso vía ASGI)")
+    parser.add_argument("--duracion", type=float, default=30, help="Segundos de medición")
+    parser.add_argument("--calentamiento", type=float, default=5, help="Segundos previos sin medir")
+    parser.add_argument("--concurrencia", type=int, default=16, help="Clientes simultáneos")
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--salida", help="Archivo JSON donde guardar el reporte (además de imprimirlo)")
+    args = parser.parse_args()
+
+    reporte = asyncio.run(ejecutar(args.url, args.duracion, args.calentamiento, args.concurrencia, args.semilla))
+    texto = json.dumps(reporte, indent=2, ensure_ascii=False)
+    print(texto)
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as archivo:
+            archivo.write(texto + "\n")
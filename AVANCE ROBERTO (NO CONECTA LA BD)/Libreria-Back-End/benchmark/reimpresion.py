@@ -0,0 +1,38 @@
+"""
+Tiempo del plan de reimpresión (reimpresion.armar_plan) sobre un catálogo sintético.
+
+No usa la base de datos: genera N títulos con stock bajo repartidos entre
+P papeles y mide el cálculo completo (arreglos, reparto y respuesta).
+
+Uso (desde Libreria-Back-End):
+    python -m benchmark.reimpresion --libros 50000 --papeles 100
+"""
+import argparse
+import random
+import statistics
+import time
+
+from reimpresion import armar_plan
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mide el plan de reimpresión con datos sintéticos")
+    parser.add_argument("--libros", type=int, default=50000)
+    parser.add_argument("--papeles", type=int, default=100)
+    parser.add_argument("--repeticiones", type=int, default=20)
+    args = parser.parse_args()
+
+    azar = random.Random(1)
+    claves = [50 + 10 * i for i in range(args.papeles)]
+    papeles = [(p, f"Papel {p}", azar.randint(10_000, 2_000_000)) for p in claves]
+    libros = [
+        (i, f"Libro {i}", azar.choice(claves), azar.randint(0, 4), azar.randint(5, 50))
+        for i in range(1, args.libros + 1)
+    ]
+
+    tiempos = []
+    for _ in range(args.repeticiones):
+        inicio = time.perf_counter()
+        armar_plan(libros, papeles, 1.5)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    print(f"✔ {args.libros} títulos, {args.papeles} papeles: "
+          f"p50 {statistics.median(tiempos):.1f} ms, máx {max(tiempos):.1f} ms")
@@ -0,0 +1,186 @@
+"""
+Carga una base de datos de prueba a escala configurable para los benchmarks.
+
+Crea, con INSERT de varias filas por lote:
+- M puntos de venta, cada uno con un vendedor (contraseña `VENDEDOR_CONTRASENA`).
+- N libros con su inventario global y sus términos de búsqueda.
+- El inventario de cada tienda (`--libros-por-tienda` libros, con stock alto
+  para que la prueba de carga no se quede sin unidades).
+- K movimientos repartidos en el último año.
+Al final recalcula las banderas de stock bajo y los acumulados de ventas.
+
+Los datos dependen solo de `--semilla`, así dos corridas son comparables.
+
+Uso (desde Libreria-Back-End, contra una base de datos de pruebas):
+    python -m benchmark.sembrar --libros 100000 --tiendas 20 --movimientos 1000000 --limpiar
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from sqlalchemy import delete, func, insert, select
+
+import acumulados
+import stock_bajo
+from busqueda import CAMPOS_INDEXADOS, terminos_libro
+from database import SessionLocal
+from models import (
+    InventarioLibro, InventarioPV, Libro, MovimientoLibro, PuntoVenta, TerminoLibro, Usuario, VentaDiaria
+)
+from seguridad import hashear_contrasena
+
+LOTE = 2000
+VENDEDOR_CONTRASENA = "vendedor123"
+STOCK_TIENDA = 1_000_000
+
+_PALABRAS = (
+    "sombra viento noche mar cielo fuego piedra rio bosque ciudad jardin tiempo memoria "
+    "silencio camino puerta espejo luna sol invierno verano libro sueno guerra amor isla "
+    "montana desierto ciudadela reino sangre hierro cristal ceniza oro plata niebla lluvia"
+).split()
+_NOMBRES = "Ana Luis Marta Jorge Elena Pablo Lucia Diego Carmen Tomas Sofia Andres Julia Raul".split()
+_APELLIDOS = "Garcia Lopez Perez Rojas Soto Munoz Diaz Torres Vega Castro Ruiz Navarro".split()
+
+# Tablas en orden de borrado (hijas primero)
+_TABLAS = (VentaDiaria, MovimientoLibro, InventarioPV, InventarioLibro, TerminoLibro, Usuario, Libro, PuntoVenta)
+
+
+def _en_lotes(filas, tamano=LOTE):
+    lote = []
+    for fila in filas:
+        lote.append(fila)
+        if len(lote) >= tamano:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+def _insertar(db, modelo, filas) -> int:
+    total = 0
+    for lote in _en_lotes(filas):
+        db.execute(insert(modelo).values(lote))
+        db.commit()
+        total += len(lote)
+    return total
+
+
+def sembrar(db, libros: int, tiendas: int, movimientos: int, libros_por_tienda: int, semilla: int) -> dict:
+    azar = random.Random(semilla)
+    tiempos = {}
+
+    def medir(nombre, funcion):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos[nombre] = round(time.perf_counter() - inicio, 2)
+
+    def puntos_venta():
+        _insertar(db, PuntoVenta, (
+            {"id_punto_venta": i, "nombre": f"Tienda {i}", "ubicacion": f"Sucursal {i}",
+             "tipo": azar.choice(["tienda", "metro", "online"])}
+            for i in range(1, tiendas + 1)
+        ))
+
+    def usuarios():
+        # Un solo hash para todos: PBKDF2 es lento a propósito
+        hash_vendedor = hashear_contrasena(VENDEDOR_CONTRASENA)
+        _insertar(db, Usuario, (
+            {"id_usuario": i, "nombre": f"Vendedor {i}", "email": f"vendedor{i}@bench.local",
+             "contrasena": hash_vendedor, "rol": "vendedor", "punto_venta_id": i}
+            for i in range(1, tiendas + 1)
+        ))
+
+    def catalogo():
+        for lote in _en_lotes(range(1, libros + 1)):
+            filas_libro, filas_inv, filas_terminos = [], [], []
+            for libro_id in lote:
+                nombre = " ".join(azar.sample(_PALABRAS, azar.randint(2, 4))).capitalize()
+                fila = {
+                    "id_libro": libro_id,
+                    "nombre": f"{nombre} {libro_id}",
+                    "autor": f"{azar.choice(_NOMBRES)} {azar.choice(_APELLIDOS)}",
+                    "precio": azar.randint(5, 60) * 1000,
+                    "stock_minimo": azar.randint(0, 20),
+                }
+                filas_libro.append(fila)
+                stock = azar.randint(0, 200)
+                filas_inv.append({"id_inventario": libro_id, "libro_id": libro_id, "stock": stock,
+                                  "bajo_minimo": stock_bajo.esta_bajo(stock, fila["stock_minimo"])})
+                campos = SimpleNamespace(**{c: fila.get(c) for c in CAMPOS_INDEXADOS})
+                filas_terminos.extend(
+                    {"termino": t, "libro_id": libro_id, "peso": p} for t, p in terminos_libro(campos).items()
+                )
+            db.execute(insert(Libro).values(filas_libro))
+            db.execute(insert(InventarioLibro).values(filas_inv))
+            if filas_terminos:
+                db.execute(insert(TerminoLibro).values(filas_terminos))
+            db.commit()
+
+    def inventario_tiendas():
+        por_tienda = min(libros_por_tienda, libros)
+        _insertar(db, InventarioPV, (
+            {"id_libro": libro_id, "id_punto_venta": pv, "stock": STOCK_TIENDA, "stock_minimo": 5}
+            for pv in range(1, tiendas + 1)
+            for libro_id in sorted(azar.sample(range(1, libros + 1), por_tienda))
+        ))
+
+    def libro_mayor():
+        ahora = datetime.now()
+        tipos = ["venta"] * 6 + ["entrada"] * 2 + ["salida", "ajuste"]
+
+        def filas():
+            for _ in range(movimientos):
+                tipo = azar.choice(tipos)
+                en_tienda = tipo == "venta" and tiendas and azar.random() < 0.7
+                pv = azar.randint(1, tiendas) if en_tienda else None
+                yield {
+                    "inventario_id": azar.randint(1, libros),
+                    "tipo": tipo,
+                    "cantidad": azar.randint(1, 5),
+                    "usuario_id": pv,
+                    "punto_venta_id": pv,
+                    "fecha_movimiento": ahora - timedelta(seconds=azar.randint(0, 365 * 24 * 3600)),
+                    "observaciones": None,
+                }
+        _insertar(db, MovimientoLibro, filas())
+
+    medir("puntos_venta", puntos_venta)
+    medir("usuarios", usuarios)
+    medir("catalogo", catalogo)
+    medir("inventario_tiendas", inventario_tiendas)
+    medir("movimientos", libro_mayor)
+    medir("stock_bajo", lambda: stock_bajo.recalcular_todo(db))
+    medir("acumulados", lambda: acumulados.reconstruir(db))
+    return tiempos
+
+
+def limpiar(db) -> None:
+    for modelo in _TABLAS:
+        db.execute(delete(modelo))
+    db.commit()
+
+
+if __name__ == "__main__":
+    import json
+
+    parser = argparse.ArgumentParser(description="Siembra una base de datos de prueba para los benchmarks")
+    parser.add_argument("--libros", type=int, default=10_000)
+    parser.add_argument("--tiendas", type=int, default=10)
+    parser.add_argument("--movimientos", type=int, default=100_000)
+    parser.add_argument("--libros-por-tienda", type=int, default=500)
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--limpiar", action="store_true", help="Borra TODOS los datos de las tablas antes de sembrar")
+    args = parser.parse_args()
+
+    sesion = SessionLocal()
+    try:
+        if args.limpiar:
+            limpiar(sesion)
+        elif sesion.execute(select(func.count()).select_from(Libro)).scalar():
+            parser.error("La base de datos ya tiene libros: usá --limpiar (borra todo) o una base vacía")
+        tiempos = sembrar(sesion, args.libros, args.tiendas, args.movimientos, args.libros_por_tienda, args.semilla)
+        print(json.dumps({"escala": vars(args), "segundos": tiempos}, indent=2))
+    finally:
+        sesion.close()
@@ -0,0 +1,147 @@
+"""
+Costo de serializar una página de cada listado: Pydantic + json frente a
+serializacion.respuesta_filas (orjson).
+
+No usa la base de datos: arma N filas sintéticas con las columnas que
+proyecta cada endpoint y mide, por separado, los dos caminos:
+- Pydantic: lo que hacía el endpoint (model_validate por fila) más lo que
+  hace FastAPI con `response_model` (volcar, validar contra List[XOut],
+  serializar en modo JSON y codificar con json.dumps).
+- orjson: reducir las filas a los campos del esquema y codificarlas.
+Además comprueba que los dos caminos producen el mismo JSON.
+
+Uso (desde Libreria-Back-End):
+    python -m benchmark.serializacion --filas 1000
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+from typing import List
+
+from pydantic import TypeAdapter
+
+from schemas import InventarioDetalleOut, InventarioPVOut, LibroOut, MovimientoDetalleOut, UsuarioOut
+from serializacion import respuesta_filas
+
+
+def _libro(azar, i, inicio):
+    return {
+        "id_libro": i,
+        "nombre": f"Libro {i}",
+        "autor": f"Autor {azar.randint(1, 5000)}",
+        "categoria": azar.choice(["Novela", "Ensayo", "Poesía", None]),
+        "descripcion": "Descripción del título " * azar.randint(1, 8),
+        "precio": azar.randint(5000, 80000),
+        "paginas_por_libro": azar.choice([120, 240, 360, None]),
+        "stock_minimo": azar.randint(0, 20),
+        "fecha_creacion": inicio + timedelta(minutes=i),
+    }
+
+
+def _inventario(azar, i, inicio):
+    stock = azar.randint(0, 500)
+    return {
+        "id_inventario": i,
+        "libro_id": i,
+        "stock": stock,
+        "bajo_minimo": stock < 10,
+        "updated_at": inicio + timedelta(seconds=i),
+        "libro": f"Libro {i}",
+        "autor": f"Autor {azar.randint(1, 5000)}",
+        "stock_minimo": 10,
+    }
+
+
+def _inventario_pv(azar, i, inicio):
+    return {
+        "id_inventario": i,
+        "id_libro": i,
+        "id_punto_venta": 3,
+        "libro": f"Libro {i}",
+        "punto_venta": "Tienda Centro",
+        "stock": azar.randint(0, 60),
+        "stock_minimo": 5,
+    }
+
+
+def _movimiento(azar, i, inicio):
+    return {
+        "id_mov_libro": i,
+        "inventario_id": azar.randint(1, 50000),
+        "tipo": azar.choice(["entrada", "salida", "venta", "ajuste"]),
+        "cantidad": azar.randint(1, 20),
+        "usuario_id": azar.choice([None, 7]),
+        "punto_venta_id": azar.choice([None, 3]),
+        "fecha_movimiento": inicio - timedelta(seconds=i),
+        "observaciones": azar.choice([None, "Reposición semanal"]),
+        "libro_id": azar.randint(1, 50000),
+        "libro": f"Libro {i}",
+        "usuario": azar.choice([None, "Vendedor"]),
+        "punto_venta": azar.choice([None, "Tienda Centro"]),
+    }
+
+
+def _usuario(azar, i, inicio):
+    return {
+        "id_usuario": i,
+        "nombre": f"Usuario {i}",
+        "email": f"usuario{i}@libreria.cl",
+        "rol": azar.choice(["admin", "vendedor"]),
+        "punto_venta_id": azar.choice([None, 3]),
+    }
+
+
+ENDPOINTS = [
+    ("GET /libros/", LibroOut, _libro),
+    ("GET /inventario/", InventarioDetalleOut, _inventario),
+    ("GET /inventario-pv/", InventarioPVOut, _inventario_pv),
+    ("GET /movimientos/", MovimientoDetalleOut, _movimiento),
+    ("GET /usuarios/", UsuarioOut, _usuario),
+]
+
+
+def camino_pydantic(filas, esquema, adaptador) -> bytes:
+    # Endpoint: un modelo por fila; FastAPI: volcar, validar, serializar y codificar
+    modelos = [esquema.model_validate(fila) for fila in filas]
+    contenido = adaptador.validate_python([modelo.model_dump() for modelo in modelos])
+    datos = adaptador.dump_python(contenido, mode="json")
+    return json.dumps(datos, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def camino_orjson(filas, esquema) -> bytes:
+    return respuesta_filas(filas, esquema).body
+
+
+def medir(funcion, repeticiones) -> List[float]:
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return tiempos
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mide la serialización de los listados con datos sintéticos")
+    parser.add_argument("--filas", type=int, default=1000, help="Filas por página (LIMITE_MAXIMO = 1000)")
+    parser.add_argument("--repeticiones", type=int, default=50)
+    args = parser.parse_args()
+
+    azar = random.Random(1)
+    inicio = datetime(2025, 1, 1, 9, 30)
+    for nombre, esquema, generar in ENDPOINTS:
+        datos = [generar(azar, i, inicio) for i in range(1, args.filas + 1)]
+        # Las filas llegan como Row de un select de columnas: tuplas con nombre
+        Fila = namedtuple("Fila", list(datos[0]))
+        filas = [Fila(**dato) for dato in datos]
+        adaptador = TypeAdapter(List[esquema])
+
+        iguales = json.loads(camino_pydantic(filas, esquema, adaptador)) == json.loads(camino_orjson(filas, esquema))
+        lento = statistics.median(medir(lambda: camino_pydantic(filas, esquema, adaptador), args.repeticiones))
+        rapido = statistics.median(medir(lambda: camino_orjson(filas, esquema), args.repeticiones))
+        print(f"✔ {nombre:<20} {args.filas} filas: Pydantic p50 {lento:.2f} ms, orjson p50 {rapido:.2f} ms "
+              f"(x{lento / rapido:.1f}){'' if iguales else '  ¡el JSON difiere!'}")
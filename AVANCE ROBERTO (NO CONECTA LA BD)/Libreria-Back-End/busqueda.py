@@ -0,0 +1,138 @@
+"""
+Búsqueda de libros sobre un índice invertido mantenido por la aplicación.
+
+Se encarga de:
+- Normalizar textos (minúsculas, sin tildes ni diéresis, "ñ" -> "n").
+- Indexar los campos de texto de cada libro en la tabla `libro_termino`
+  con un peso por campo (el título pesa más que el autor, y este más que
+  la categoría y la descripción).
+- Resolver una búsqueda como rangos por prefijo sobre la clave primaria
+  (termino, libro_id), exigiendo que todas las palabras coincidan y
+  ordenando por relevancia (suma de pesos).
+- Reconstruir el índice completo desde la línea de comandos:
+    python busqueda.py
+
+Los routers llaman a `indexar_libro`/`desindexar_libro` dentro de la misma
+transacción que modifica el libro, así el índice nunca queda desfasado.
+"""
+import re
+import unicodedata
+from typing import Dict, List, Optional
+
+from sqlalchemy import Integer, case, cast, func, insert, or_, select
+from sqlalchemy.orm import Session
+
+from models import Libro, TerminoLibro
+
+# Campos indexados y su peso en la relevancia
+CAMPOS_INDEXADOS = {"nombre": 3, "autor": 2, "categoria": 1, "descripcion": 1}
+LARGO_MINIMO = 2
+LARGO_MAXIMO = 64
+TAMANO_LOTE = 1000
+
+_PALABRA = re.compile(r"[a-z0-9]+")
+
+
+def normalizar(texto: str) -> str:
+    """Pasa a minúsculas y elimina tildes/diacríticos (á -> a, ñ -> n, ü -> u)."""
+    descompuesto = unicodedata.normalize("NFKD", texto.lower())
+    return "".join(c for c in descompuesto if not unicodedata.combining(c))
+
+
+def tokenizar(texto: Optional[str]) -> List[str]:
+    """Divide un texto normalizado en palabras indexables."""
+    if not texto:
+        return []
+    return [
+        palabra[:LARGO_MAXIMO]
+        for palabra in _PALABRA.findall(normalizar(texto))
+        if len(palabra) >= LARGO_MINIMO
+    ]
+
+
+def terminos_libro(libro) -> Dict[str, int]:
+    """Calcula {termino: peso} sumando el peso de cada campo donde aparece."""
+    terminos: Dict[str, int] = {}
+    for campo, peso in CAMPOS_INDEXADOS.items():
+        for termino in set(tokenizar(getattr(libro, campo))):
+            terminos[termino] = terminos.get(termino, 0) + peso
+    return terminos
+
+
+def desindexar_libro(db: Session, libro_id: int) -> None:
+    db.query(TerminoLibro).filter(TerminoLibro.libro_id == libro_id).delete(synchronize_session=False)
+
+
+def indexar_libro(db: Session, libro) -> None:
+    """Reemplaza los términos del libro. No hace commit: lo hace el llamador."""
+    desindexar_libro(db, libro.id_libro)
+    filas = [
+        {"termino": termino, "libro_id": libro.id_libro, "peso": peso}
+        for termino, peso in terminos_libro(libro).items()
+    ]
+    if filas:
+        db.execute(insert(TerminoLibro), filas)
+
+
+def consulta_relevancia(q: str):
+    """
+    Subconsulta (libro_id, relevancia) para el texto `q`, o None si no hay
+    palabras indexables.
+
+    Cada palabra se busca por prefijo (búsqueda mientras se escribe) y el
+    HAVING exige que todas las palabras aparezcan en el libro.
+    """
+    palabras = list(dict.fromkeys(tokenizar(q)))
+    if not palabras:
+        return None
+    coincide = [TerminoLibro.termino.like(f"{palabra}%") for palabra in palabras]
+    return (
+        select(
+            TerminoLibro.libro_id,
+            cast(func.sum(TerminoLibro.peso), Integer).label("relevancia")
+        )
+        .where(or_(*coincide))
+        .group_by(TerminoLibro.libro_id)
+        .having(*[func.max(case((c, 1), else_=0)) == 1 for c in coincide])
+        .subquery()
+    )
+
+
+def reconstruir_indice(db: Session) -> int:
+    """
+    Vacía y vuelve a poblar `libro_termino` recorriendo el catálogo por lotes
+    de id (keyset), con un INSERT de varias filas por lote.
+    """
+    db.query(TerminoLibro).delete(synchronize_session=False)
+    columnas = [Libro.id_libro] + [getattr(Libro, campo) for campo in CAMPOS_INDEXADOS]
+    ultimo_id, total = 0, 0
+    while True:
+        libros = db.execute(
+            select(*columnas)
+            .where(Libro.id_libro > ultimo_id)
+            .order_by(Libro.id_libro)
+            .limit(TAMANO_LOTE)
+        ).all()
+        if not libros:
+            break
+        filas = [
+            {"termino": termino, "libro_id": libro.id_libro, "peso": peso}
+            for libro in libros
+            for termino, peso in terminos_libro(libro).items()
+        ]
+        if filas:
+            db.execute(insert(TerminoLibro), filas)
+        ultimo_id = libros[-1].id_libro
+        total += len(libros)
+    db.commit()
+    return total
+
+
+if __name__ == "__main__":
+    from database import SessionLocal
+
+    sesion = SessionLocal()
+    try:
+        print(f"✔ Índice de búsqueda reconstruido: {reconstruir_indice(sesion)} libros")
+    finally:
+        sesion.close()
@@ -0,0 +1,246 @@
+"""
+Caché en memoria del catálogo (libros y puntos de venta).
+
+Se encarga de:
+- Guardar filas leídas con frecuencia y que cambian poco en un LRU acotado
+  con expiración (TTL), como diccionarios de solo lectura.
+- Contar aciertos y fallos por caché (expuestos en GET /admin/cache).
+- Invalidar desde los handlers que crean/actualizan/eliminan (write-through).
+
+Varios procesos (uvicorn --workers N) comparten un archivo marcador por caché
+en `CACHE_DIR`. Invalidar agrega al archivo una línea JSON con las claves;
+cada worker recuerda hasta qué byte leyó y, si el archivo creció, lee solo
+las líneas nuevas y descarta esas claves (el que escribió también: así no
+relee su propia línea). Cuando el archivo pasa de `TAMANO_MAXIMO_MARCADOR`
+se reemplaza por uno nuevo, que empieza con una cabecera única; al ver otra
+cabecera, cada worker vacía su copia una vez. Así una escritura en un worker
+invalida a todos sin consultar la BD. El TTL acota lo que pueda quedar
+desfasado si los workers están en otra máquina.
+
+Cada lectura de la caché hace un `os.stat` del marcador desde el event loop.
+Es una llamada de microsegundos sobre un archivo local (no toca el disco), y
+el archivo solo se abre cuando cambió; por eso no se delega a un hilo.
+
+Uso desde un router:
+    from cache import libro_cacheado, cache_libros
+    libro = await libro_cacheado(db, libro_id)
+    cache_libros.invalidar(libro_id)   # después del commit
+"""
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from sqlalchemy import select
+
+from models import Libro, PuntoVenta
+
+CACHE_DIR = os.getenv("CACHE_DIR", os.path.join(tempfile.gettempdir(), "libreria-cache"))
+TAMANO_MAXIMO_MARCADOR = 64 * 1024
+_FALTA = object()
+
+
+class CacheLRU:
+    def __init__(self, nombre: str, capacidad: int, ttl_segundos: float):
+        self.nombre = nombre
+        self.capacidad = capacidad
+        self.ttl = ttl_segundos
+        self.aciertos = 0
+        self.fallos = 0
+        self._datos: "OrderedDict[Any, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._generacion = 0
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        self._marcador = os.path.join(CACHE_DIR, f"{nombre}.inval")
+        # Lo último visto del marcador: (inodo, tamaño, mtime), su primera
+        # línea (distinta en cada archivo) y el byte hasta donde se leyó
+        self._marca_vista = None
+        self._cabecera = None
+        self._leido = 0
+        self._crear_marcador()
+        self._sincronizar()
+
+    def _crear_marcador(self) -> None:
+        """Crea el marcador si no existe, con una cabecera propia de ese archivo."""
+        try:
+            with open(self._marcador, "xb") as marcador:
+                marcador.write(self._nueva_cabecera())
+        except FileExistsError:
+            pass
+
+    @staticmethod
+    def _nueva_cabecera() -> bytes:
+        return (json.dumps({"marcador": uuid.uuid4().hex}) + "\n").encode()
+
+    def _marca_actual(self):
+        try:
+            st = os.stat(self._marcador)
+            return (st.st_ino, st.st_size, st.st_mtime_ns)
+        except FileNotFoundError:
+            return None
+
+    def _sincronizar(self) -> int:
+        """Aplica las invalidaciones nuevas del marcador. Devuelve la generación."""
+        marca = self._marca_actual()
+        if marca == self._marca_vista:
+            return self._generacion
+        try:
+            with open(self._marcador, "rb") as marcador:
+                cabecera = marcador.readline()
+                if not cabecera.endswith(b"\n"):
+                    return self._generacion  # recién creado: la próxima lectura lo ve
+                if cabecera != self._cabecera:
+                    # Marcador rotado: no se sabe qué se invalidó en el anterior
+                    if self._cabecera is not None:
+                        self._datos.clear()
+                        self._generacion += 1
+                    self._cabecera, self._leido = cabecera, len(cabecera)
+                marcador.seek(self._leido)
+                nuevo = marcador.read()
+        except FileNotFoundError:
+            return self._generacion
+        self._marca_vista = marca
+
+        # Solo líneas completas: una escritura a medias se lee la próxima vez
+        completo = nuevo[:nuevo.rfind(b"\n") + 1]
+        if completo:
+            self._leido += len(completo)
+            for linea in completo.splitlines():
+                for clave in json.loads(linea):
+                    self._datos.pop(clave, None)
+            self._generacion += 1
+        return self._generacion
+
+    def _escribir_marcador(self, claves) -> None:
+        linea = (json.dumps(list(claves)) + "\n").encode()
+        while True:
+            self._crear_marcador()
+            with open(self._marcador, "ab") as marcador:
+                marcador.write(linea)
+                marcador.flush()
+                escrito = os.fstat(marcador.fileno())
+                # Si otro worker rotó el marcador mientras se escribía, la
+                # línea quedó en el archivo viejo: se repite en el nuevo
+                marca = self._marca_actual()
+                if marca is not None and marca[0] == escrito.st_ino:
+                    break
+        if escrito.st_size > TAMANO_MAXIMO_MARCADOR:
+            self._rotar_marcador()
+
+    def _rotar_marcador(self) -> None:
+        temporal = f"{self._marcador}.{os.getpid()}"
+        with open(temporal, "wb") as marcador:
+            marcador.write(self._nueva_cabecera())
+        try:
+            os.replace(temporal, self._marcador)
+        except OSError:
+            # En Windows falla si otro proceso lo tiene abierto: se intenta en la próxima
+            os.remove(temporal)
+
+    def obtener(self, clave):
+        with self._lock:
+            self._sincronizar()
+            entrada = self._datos.get(clave)
+            if entrada is None or entrada[1] < time.monotonic():
+                if entrada is not None:
+                    del self._datos[clave]
+                self.fallos += 1
+                return _FALTA
+            self._datos.move_to_end(clave)
+            self.aciertos += 1
+            return entrada[0]
+
+    def generacion(self) -> int:
+        with self._lock:
+            return self._sincronizar()
+
+    def guardar(self, clave, valor, generacion: int) -> None:
+        """
+        Guarda solo si nadie invalidó mientras se cargaba el valor: evita
+        dejar en caché una fila leída antes de una escritura concurrente.
+        """
+        with self._lock:
+            if self._sincronizar() != generacion:
+                return
+            self._datos[clave] = (valor, time.monotonic() + self.ttl)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.capacidad:
+                self._datos.popitem(last=False)
+
+    def invalidar(self, *claves) -> None:
+        """
+        Invalida las claves en este proceso y avisa al resto de workers. Las
+        claves viajan como JSON: deben ser números o textos.
+        """
+        with self._lock:
+            for clave in claves:
+                self._datos.pop(clave, None)
+            self._generacion += 1
+            self._escribir_marcador(claves)
+            # Avanza sobre la propia línea (y las de otros workers escritas antes)
+            self._sincronizar()
+
+    def estadisticas(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.aciertos + self.fallos
+            return {
+                "entradas": len(self._datos),
+                "capacidad": self.capacidad,
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "tasa_aciertos": round(self.aciertos / total, 4) if total else 0.0,
+            }
+
+
+cache_libros = CacheLRU("libros", capacidad=20000, ttl_segundos=300)
+cache_puntos_venta = CacheLRU("puntos_venta", capacidad=2000, ttl_segundos=300)
+
+# Clave del listado completo de puntos de venta (lo piden todas las páginas)
+TODOS = "__todos__"
+
+
+async def obtener_o_cargar(cache: CacheLRU, clave, cargar: Callable[[], Awaitable[Any]]):
+    valor = cache.obtener(clave)
+    if valor is not _FALTA:
+        return valor
+    generacion = cache.generacion()
+    valor = await cargar()
+    if valor is not None:
+        cache.guardar(clave, valor, generacion)
+    return valor
+
+
+def _como_dict(fila) -> Dict[str, Any]:
+    return {c.key: getattr(fila, c.key) for c in fila.__table__.columns}
+
+
+async def libro_cacheado(db, libro_id: int) -> Optional[Dict[str, Any]]:
+    async def cargar():
+        libro = await db.get(Libro, libro_id)
+        return _como_dict(libro) if libro else None
+    return await obtener_o_cargar(cache_libros, libro_id, cargar)
+
+
+async def punto_venta_cacheado(db, pv_id: int) -> Optional[Dict[str, Any]]:
+    async def cargar():
+        pv = await db.get(PuntoVenta, pv_id)
+        return _como_dict(pv) if pv else None
+    return await obtener_o_cargar(cache_puntos_venta, pv_id, cargar)
+
+
+async def puntos_venta_cacheados(db) -> list:
+    async def cargar():
+        filas = await db.scalars(select(PuntoVenta).order_by(PuntoVenta.id_punto_venta))
+        return [_como_dict(pv) for pv in filas]
+    return await obtener_o_cargar(cache_puntos_venta, TODOS, cargar)
+
+
+def estadisticas() -> Dict[str, Any]:
+    return {
+        cache_libros.nombre: cache_libros.estadisticas(),
+        cache_puntos_venta.nombre: cache_puntos_venta.estadisticas(),
+    }
@@ -0,0 +1,295 @@
+"""
+Puntos de control del stock global, stock a una fecha y conciliación con el libro mayor.
+
+`inventario_libro.stock` se actualiza en el lugar y `movimiento_libro`
+guarda cada cambio en la misma transacción (también ajustar y fijar el
+stock, que registran un "ajuste" con la diferencia, negativa si resta).
+Para comparar ambos sin sumar todo el libro mayor:
+
+Se encarga de:
+- Puntos de control (`stock_punto_control`): el stock de un inventario al
+  instante de un corte (medianoche), calculado como el punto anterior más
+  los movimientos del intervalo. Solo se escribe un punto para los
+  inventarios con movimientos desde el corte anterior.
+- Stock a una fecha (`stock_al`): el punto de control más cercano más o
+  menos los movimientos entre él y la fecha, leídos por el índice
+  (inventario_id, fecha_movimiento). Nunca recorre el historial completo.
+- Conciliación incremental (`conciliar`): revisa los inventarios con
+  movimientos desde el corte anterior y un tramo rotativo de inventarios
+  más (así un cambio de stock sin movimiento, p. ej. un UPDATE manual,
+  aparece como mucho en una vuelta completa). Stock esperado = último punto
+  + movimientos posteriores; si no coincide con el registrado, el
+  inventario queda en `descuadre_stock` hasta que vuelva a coincidir.
+
+Solo cuentan los movimientos globales (punto_venta_id NULL): las ventas de
+tienda descuentan del inventario de la tienda, no de este. Las entradas y
+los ajustes suman su cantidad; las salidas y las ventas la restan.
+
+El primer punto de control de cada inventario toma como bueno su stock
+registrado (lo anterior no se puede verificar). Un movimiento con fecha
+pasada corrige los puntos posteriores en su misma transacción
+(`corregir_puntos`). particiones.py solo archiva meses que la conciliación
+ya cerró, así ningún punto necesita movimientos archivados.
+
+Uso (desde Libreria-Back-End; conviene programarlo una vez al día):
+    python conciliacion.py                  # corte a la medianoche de hoy
+    python conciliacion.py --rotacion 5000  # revisa más inventarios sin movimientos
+    python conciliacion.py --descuadres     # lista los inventarios descuadrados
+"""
+from datetime import date, datetime, time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import and_, case, delete, func, select, update
+from sqlalchemy.dialects.mysql import insert
+from sqlalchemy.orm import Session
+
+from models import (
+    DescuadreStock, EstadoConciliacion, InventarioLibro, MovimientoLibro, StockPuntoControl, TipoMovimiento
+)
+from particiones import frontera_lectura
+
+TAMANO_LOTE = 1000
+ROTACION = 1000
+
+_GLOBAL = MovimientoLibro.punto_venta_id.is_(None)
+
+
+def efecto():
+    """Cambio que produce cada movimiento en el stock global."""
+    return case(
+        (MovimientoLibro.tipo.in_([TipoMovimiento.entrada, TipoMovimiento.ajuste]), MovimientoLibro.cantidad),
+        else_=-MovimientoLibro.cantidad,
+    )
+
+
+async def corregir_puntos(db, movimientos: Iterable[Tuple[int, datetime, int]]) -> None:
+    """
+    Suma a los puntos de control posteriores el efecto de movimientos con
+    fecha pasada (inventario_id, fecha, efecto). No hace commit.
+    """
+    # Orden fijo de inventarios: dos transacciones no se bloquean en orden cruzado
+    for inventario_id, fecha, cambio in sorted(movimientos):
+        await db.execute(
+            update(StockPuntoControl)
+            .where(StockPuntoControl.inventario_id == inventario_id, StockPuntoControl.fecha > fecha)
+            .values(stock=StockPuntoControl.stock + cambio)
+        )
+
+
+# ---------------------------------------------------------
+# STOCK A UNA FECHA
+# ---------------------------------------------------------
+def _tramo(db: Session, inventario_id: int, desde: datetime, hasta: Optional[datetime]) -> Tuple[int, int]:
+    # (efecto, movimientos) de desde <= fecha < hasta
+    condiciones = [
+        _GLOBAL,
+        MovimientoLibro.inventario_id == inventario_id,
+        MovimientoLibro.fecha_movimiento >= desde,
+    ]
+    if hasta:
+        condiciones.append(MovimientoLibro.fecha_movimiento < hasta)
+    fila = db.execute(select(func.sum(efecto()), func.count()).where(*condiciones)).one()
+    return int(fila[0] or 0), fila[1]
+
+
+def _punto(db: Session, inventario_id: int, condicion, orden):
+    return db.execute(
+        select(StockPuntoControl.fecha, StockPuntoControl.stock)
+        .where(StockPuntoControl.inventario_id == inventario_id, condicion)
+        .order_by(orden)
+        .limit(1)
+    ).first()
+
+
+def stock_al(db: Session, inventario_id: int, fecha: datetime) -> dict:
+    """
+    Stock global del inventario al instante `fecha` (suma de los movimientos
+    anteriores). Parte del punto de control más cercano: hacia adelante
+    desde el anterior o hacia atrás desde el siguiente (o desde el stock
+    actual si no hay puntos). ValueError si la fecha cae en un mes archivado.
+    """
+    frontera = frontera_lectura()
+    if frontera and fecha < frontera:
+        raise ValueError("Esa fecha cae en un mes archivado")
+
+    anterior = _punto(db, inventario_id, StockPuntoControl.fecha <= fecha, StockPuntoControl.fecha.desc())
+    # Un punto anterior a la frontera no sirve: los movimientos hasta la fecha ya no están
+    if anterior and (frontera is None or anterior.fecha >= frontera):
+        cambio, movimientos = _tramo(db, inventario_id, anterior.fecha, fecha)
+        stock, punto = anterior.stock + cambio, anterior.fecha
+    else:
+        siguiente = _punto(db, inventario_id, StockPuntoControl.fecha > fecha, StockPuntoControl.fecha)
+        if siguiente:
+            cambio, movimientos = _tramo(db, inventario_id, fecha, siguiente.fecha)
+            stock, punto = siguiente.stock - cambio, siguiente.fecha
+        else:
+            actual = db.scalar(select(InventarioLibro.stock).where(InventarioLibro.id_inventario == inventario_id))
+            cambio, movimientos = _tramo(db, inventario_id, fecha, None)
+            stock, punto = (actual or 0) - cambio, None
+    return {
+        "id_inventario": inventario_id,
+        "fecha": fecha,
+        "stock": stock,
+        "punto_control": punto,
+        "movimientos_aplicados": movimientos,
+    }
+
+
+# ---------------------------------------------------------
+# CONCILIACIÓN
+# ---------------------------------------------------------
+def _efectos(db: Session, consulta) -> Dict[int, Tuple[int, int]]:
+    return {fila.inventario_id: (int(fila.efecto or 0), fila.movimientos) for fila in db.execute(consulta)}
+
+
+def _consulta_efectos(*condiciones):
+    return (
+        select(
+            MovimientoLibro.inventario_id,
+            func.sum(efecto()).label("efecto"),
+            func.count().label("movimientos"),
+        )
+        .select_from(MovimientoLibro)
+        .where(_GLOBAL, *condiciones)
+        .group_by(MovimientoLibro.inventario_id)
+    )
+
+
+def _procesar_lote(db: Session, ids: List[int], corte: datetime) -> Tuple[int, int]:
+    """
+    Escribe los puntos de control al corte y concilia los inventarios `ids`
+    en una transacción: todas las lecturas ven la misma instantánea, así el
+    stock registrado y los movimientos son coherentes entre sí.
+    Devuelve (puntos escritos, descuadres).
+    """
+    registrado = dict(db.execute(
+        select(InventarioLibro.id_inventario, InventarioLibro.stock)
+        .where(InventarioLibro.id_inventario.in_(ids))
+    ).all())
+
+    ultimos = (
+        select(StockPuntoControl.inventario_id, func.max(StockPuntoControl.fecha).label("fecha"))
+        .where(StockPuntoControl.inventario_id.in_(ids), StockPuntoControl.fecha < corte)
+        .group_by(StockPuntoControl.inventario_id)
+        .subquery()
+    )
+    puntos = dict(db.execute(
+        select(StockPuntoControl.inventario_id, StockPuntoControl.stock).join(ultimos, and_(
+            StockPuntoControl.inventario_id == ultimos.c.inventario_id,
+            StockPuntoControl.fecha == ultimos.c.fecha,
+        ))
+    ).all())
+    # Movimientos entre el último punto y el corte (cada inventario desde su punto)
+    hasta_corte = _efectos(db, _consulta_efectos(MovimientoLibro.fecha_movimiento < corte).join(ultimos, and_(
+        MovimientoLibro.inventario_id == ultimos.c.inventario_id,
+        MovimientoLibro.fecha_movimiento >= ultimos.c.fecha,
+    )))
+    desde_corte = _efectos(db, _consulta_efectos(
+        MovimientoLibro.inventario_id.in_(ids), MovimientoLibro.fecha_movimiento >= corte
+    ))
+
+    ahora = datetime.now()
+    nuevos, descuadres, cuadrados = [], [], []
+    for inventario_id, stock in registrado.items():
+        posterior = desde_corte.get(inventario_id, (0, 0))[0]
+        if inventario_id not in puntos:
+            # Primera conciliación del inventario: se toma como bueno lo registrado
+            nuevos.append({"inventario_id": inventario_id, "fecha": corte, "stock": stock - posterior})
+            cuadrados.append(inventario_id)
+            continue
+        cambio, movimientos = hasta_corte.get(inventario_id, (0, 0))
+        al_corte = puntos[inventario_id] + cambio
+        if movimientos:
+            nuevos.append({"inventario_id": inventario_id, "fecha": corte, "stock": al_corte})
+        if al_corte + posterior == stock:
+            cuadrados.append(inventario_id)
+        else:
+            descuadres.append({
+                "inventario_id": inventario_id,
+                "stock_registrado": stock,
+                "stock_libro_mayor": al_corte + posterior,
+                "detectado_en": ahora,
+            })
+
+    if nuevos:
+        stmt = insert(StockPuntoControl).values(nuevos)
+        db.execute(stmt.on_duplicate_key_update(stock=stmt.inserted.stock))
+    if descuadres:
+        # Un descuadre ya conocido conserva la fecha en que se detectó
+        stmt = insert(DescuadreStock).values(descuadres)
+        db.execute(stmt.on_duplicate_key_update(
+            stock_registrado=stmt.inserted.stock_registrado,
+            stock_libro_mayor=stmt.inserted.stock_libro_mayor,
+        ))
+    if cuadrados:
+        db.execute(delete(DescuadreStock).where(DescuadreStock.inventario_id.in_(cuadrados)))
+    db.commit()
+    return len(nuevos), len(descuadres)
+
+
+def conciliar(db: Session, corte: Optional[datetime] = None, rotacion: int = ROTACION) -> Dict[str, int]:
+    """
+    Avanza los puntos de control hasta `corte` (por defecto, la medianoche
+    de hoy) y concilia los inventarios con movimientos desde el corte
+    anterior más `rotacion` inventarios del tramo rotativo. La primera vez
+    revisa todos. Devuelve los totales.
+    """
+    corte = corte or datetime.combine(date.today(), time.min)
+    estado = db.get(EstadoConciliacion, 1)
+    anterior, siguiente = estado.corte, estado.siguiente_inventario
+    if anterior and corte < anterior:
+        raise ValueError(f"El corte no puede ser anterior al último ({anterior})")
+
+    ids_inventario = select(InventarioLibro.id_inventario).order_by(InventarioLibro.id_inventario)
+    if anterior is None:
+        candidatos, siguiente = list(db.scalars(ids_inventario)), 0
+    else:
+        # Recorre solo el intervalo nuevo por el índice (fecha_movimiento, id_mov_libro)
+        con_movimientos = set(db.scalars(
+            select(MovimientoLibro.inventario_id).distinct()
+            .where(_GLOBAL, MovimientoLibro.fecha_movimiento >= anterior, MovimientoLibro.fecha_movimiento < corte)
+        ))
+        tramo = list(db.scalars(ids_inventario.where(InventarioLibro.id_inventario > siguiente).limit(rotacion)))
+        siguiente = tramo[-1] if len(tramo) == rotacion else 0
+        candidatos = sorted(con_movimientos.union(tramo))
+    db.rollback()
+
+    totales = {"revisados": 0, "puntos": 0, "descuadres": 0}
+    for inicio in range(0, len(candidatos), TAMANO_LOTE):
+        ids = candidatos[inicio:inicio + TAMANO_LOTE]
+        puntos, descuadres = _procesar_lote(db, ids, corte)
+        totales["revisados"] += len(ids)
+        totales["puntos"] += puntos
+        totales["descuadres"] += descuadres
+
+    db.execute(
+        update(EstadoConciliacion).where(EstadoConciliacion.id == 1)
+        .values(corte=corte, siguiente_inventario=siguiente)
+    )
+    db.commit()
+    return totales
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Puntos de control del stock y conciliación con el libro mayor")
+    parser.add_argument("--rotacion", type=int, default=ROTACION,
+                        help="Inventarios sin movimientos a revisar en esta corrida")
+    parser.add_argument("--descuadres", action="store_true", help="Lista los inventarios descuadrados")
+    args = parser.parse_args()
+
+    sesion = SessionLocal()
+    try:
+        if args.descuadres:
+            for d in sesion.scalars(select(DescuadreStock).order_by(DescuadreStock.inventario_id)):
+                print(f"  inventario {d.inventario_id}: registrado {d.stock_registrado}, "
+                      f"libro mayor {d.stock_libro_mayor} (desde {d.detectado_en:%Y-%m-%d %H:%M})")
+        else:
+            totales = conciliar(sesion, rotacion=args.rotacion)
+            print(f"✔ {totales['revisados']} inventarios conciliados, {totales['puntos']} puntos de control, "
+                  f"{totales['descuadres']} descuadres")
+    finally:
+        sesion.close()
@@ -5,20 +5,40 @@ Se encarga de:
 - Cargar las variables de entorno desde un archivo .env.
 - Validar que las variables necesarias estén presentes.
 - Construir la URL de conexión a MySQL.
-- Crear el `engine` de SQLAlchemy.
-- Exponer `SessionLocal` para crear sesiones a la BD.
+- Crear el `engine` de SQLAlchemy (síncrono, con mysql-connector).
+- Crear el `async_engine` (asyncio, con aiomysql) que usan los routers.
+- Exponer `SessionLocal` para scripts y tareas síncronas (probe_db.py, CLIs).
+- Exponer `AsyncSessionLocal` y la dependencia async `get_db` para FastAPI.
+- Crear engines opcionales para réplicas de lectura (`DB_REPLICA_HOSTS`) y
+  la dependencia `get_db_lectura`, que reparte las lecturas entre ellas.
 - Exponer `Base` para declarar los modelos ORM.
+- Instrumentar ambos engines (sentencias, tiempo de BD y espera del pool)
+  para las métricas de GET /metrics (ver metricas.py).
 
 Este módulo está pensado para ser importado desde el resto de la aplicación, por ejemplo:
     from database import SessionLocal, Base
+    from database import get_db            # dependencia async de los routers
+    from database import get_db_lectura    # endpoints de solo lectura (réplicas)
+
+Réplicas de lectura (opcionales, en el .env):
+    DB_REPLICA_HOSTS=127.0.0.1:3307,127.0.0.1:3308   # mismo usuario, clave y base
+    DB_POOL_SIZE / DB_MAX_OVERFLOW                   # pool del primario
+    DB_REPLICA_POOL_SIZE / DB_REPLICA_MAX_OVERFLOW   # pool de cada réplica
+Las escrituras, los SELECT ... FOR UPDATE y los caminos que cachean filas
+usan siempre `get_db` (primario). Una petición que necesite leer lo que
+acaba de escribir envía la cabecera `X-Leer-Primario: 1` y `get_db_lectura`
+la atiende con el primario.
 """
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from dotenv import load_dotenv, find_dotenv
-from typing import Generator 
+from fastapi import Request
+from typing import AsyncGenerator, Generator, List
+import itertools
 import os
 from pathlib import Path
-from typing import Generator
+from metricas import PoolMedido, instrumentar_engine, pool_async_con_nombre
 
 # Cargar .env
 env_path = find_dotenv(usecwd=True) or str(Path(__file__).parent / ".env")
@@ -30,6 +50,15 @@ DB_PASSWORD = os.getenv("DB_PASSWORD")
 DB_NAME = os.getenv("DB_NAME")
 DB_PORT = os.getenv("DB_PORT", "3306")
 
+# Tamaño de pool por engine (los valores por defecto son los de SQLAlchemy)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_REPLICA_HOSTS = [h.strip() for h in os.getenv("DB_REPLICA_HOSTS", "").split(",") if h.strip()]
+DB_REPLICA_POOL_SIZE = int(os.getenv("DB_REPLICA_POOL_SIZE", str(DB_POOL_SIZE)))
+DB_REPLICA_MAX_OVERFLOW = int(os.getenv("DB_REPLICA_MAX_OVERFLOW", str(DB_MAX_OVERFLOW)))
+
+CABECERA_LEER_PRIMARIO = "X-Leer-Primario"
+
 # Validación de variables
 missing = [k for k, v in {
     "DB_HOST": DB_HOST, "DB_USER": DB_USER, "DB_PASSWORD": DB_PASSWORD,
@@ -44,19 +73,78 @@ DATABASE_URL = (
     f"mysql+mysqlconnector://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
     "?auth_plugin=mysql_native_password"
 )
+def url_async(host: str, port: str) -> str:
+    return f"mysql+aiomysql://{DB_USER}:{DB_PASSWORD}@{host}:{port}/{DB_NAME}?charset=utf8mb4"
+
+ASYNC_DATABASE_URL = url_async(DB_HOST, DB_PORT)
 
 # Crea engine y sesión
 engine = create_engine(
     DATABASE_URL,
+    poolclass=PoolMedido,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
     pool_pre_ping=True,           
     pool_recycle=280            
 )
+instrumentar_engine(engine, "sync")
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def crear_engine_async(url: str, nombre: str, pool_size: int, max_overflow: int) -> AsyncEngine:
+    motor = create_async_engine(
+        url,
+        poolclass=pool_async_con_nombre(nombre),
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_pre_ping=True,
+        pool_recycle=280
+    )
+    instrumentar_engine(motor.sync_engine, nombre)
+    return motor
+
+# Engine y sesión asíncronos: una petición esperando a MySQL no ocupa un hilo
+async_engine = crear_engine_async(ASYNC_DATABASE_URL, "async", DB_POOL_SIZE, DB_MAX_OVERFLOW)
+
+# Réplicas de lectura: "host" o "host:puerto", con las mismas credenciales
+replica_engines: List[AsyncEngine] = [
+    crear_engine_async(
+        url_async(*(host.split(":", 1) if ":" in host else (host, DB_PORT))),
+        f"replica{i}", DB_REPLICA_POOL_SIZE, DB_REPLICA_MAX_OVERFLOW
+    )
+    for i, host in enumerate(DB_REPLICA_HOSTS, start=1)
+]
+_turno_replicas = itertools.cycle(replica_engines)
+
+# expire_on_commit=False: los objetos siguen legibles tras el commit sin
+# disparar cargas perezosas (que en asyncio no están permitidas)
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, autoflush=False, expire_on_commit=False, class_=AsyncSession
+)
 Base = declarative_base()
 
 # Dependencia de FastAPI para obtener sesión de DB
-def get_db() -> Generator:
+async def get_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def engine_lectura(request: Request) -> AsyncEngine:
+    """Réplica por turnos, o el primario si no hay réplicas o se pidió leer lo propio."""
+    if not replica_engines or request.headers.get(CABECERA_LEER_PRIMARIO):
+        return async_engine
+    return next(_turno_replicas)
+
+# Dependencia para endpoints de solo lectura (nunca usar con FOR UPDATE ni escrituras)
+async def get_db_lectura(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSessionLocal(bind=engine_lectura(request)) as db:
+        yield db
+
+async def cerrar_engines() -> None:
+    for motor in (async_engine, *replica_engines):
+        await motor.dispose()
+
+# Sesión síncrona para scripts y tareas fuera del event loop
+def get_sync_db() -> Generator:
     db = SessionLocal()
     try:
         yield db
@@ -0,0 +1,87 @@
+"""
+Difusión de cambios de stock a las pantallas conectadas (Server-Sent Events).
+
+Se encarga de:
+- Mantener, por canal, las colas de los clientes suscriptos a
+  GET /eventos/stock?pv=<id>. El canal 0 es el inventario global; los
+  demás, el de cada punto de venta.
+- Publicar un evento compacto `{"id_inventario": .., "stock": ..}` desde
+  los caminos que cambian stock (movimientos, lotes, ventas agrupadas,
+  ajustar/fijar y ventas de tienda), siempre después del commit.
+- Serializar cada evento una sola vez: a cada cola va el mismo bloque de
+  bytes. Un cliente inactivo cuesta una cola vacía y una tarea dormida.
+- No frenar nunca a quien publica: si un cliente no lee y su cola se
+  llena, se descarta lo pendiente y se le cierra la conexión; el
+  navegador reconecta solo y vuelve a pedir el listado completo.
+
+La difusión es dentro del proceso: con varios workers, cada pantalla recibe
+los cambios hechos en el worker al que está conectada.
+
+Uso desde un router (después del commit):
+    from eventos_stock import CANAL_GLOBAL, difusor_stock
+    difusor_stock.publicar(CANAL_GLOBAL, id_inventario, stock)
+"""
+import asyncio
+import json
+from collections import defaultdict
+from typing import AsyncIterator, Dict, Optional, Set
+
+from metricas import registrar_indicador
+
+CANAL_GLOBAL = 0
+CAPACIDAD_COLA = 256
+LATIDO_SEGUNDOS = 15
+# Espera sugerida al navegador antes de reconectar (campo "retry" de SSE)
+REINTENTO_MS = 3000
+
+
+class DifusorStock:
+    def __init__(self, capacidad: int = CAPACIDAD_COLA):
+        self.capacidad = capacidad
+        self._canales: Dict[int, Set[asyncio.Queue]] = defaultdict(set)
+
+    def conexiones(self) -> int:
+        return sum(len(colas) for colas in self._canales.values())
+
+    def publicar(self, canal: int, id_inventario: int, stock: int) -> None:
+        colas = self._canales.get(canal)
+        if not colas:
+            return
+        datos = f"data: {json.dumps({'id_inventario': id_inventario, 'stock': stock})}\n\n".encode()
+        for cola in list(colas):
+            try:
+                cola.put_nowait(datos)
+            except asyncio.QueueFull:
+                # Cliente atrasado: se vacía su cola y se le indica cerrar
+                while not cola.empty():
+                    cola.get_nowait()
+                cola.put_nowait(None)
+                colas.discard(cola)
+
+    async def suscribir(self, canal: int) -> AsyncIterator[bytes]:
+        """Bytes del flujo SSE de `canal` hasta que el cliente se desconecta."""
+        cola: asyncio.Queue = asyncio.Queue(self.capacidad)
+        self._canales[canal].add(cola)
+        try:
+            yield f"retry: {REINTENTO_MS}\n\n".encode()
+            while True:
+                try:
+                    datos: Optional[bytes] = await asyncio.wait_for(cola.get(), LATIDO_SEGUNDOS)
+                except asyncio.TimeoutError:
+                    # Comentario SSE: mantiene viva la conexión a través de proxies
+                    datos = b": latido\n\n"
+                if datos is None:
+                    return
+                yield datos
+        finally:
+            colas = self._canales.get(canal)
+            if colas is not None:
+                colas.discard(cola)
+                if not colas:
+                    del self._canales[canal]
+
+
+difusor_stock = DifusorStock()
+registrar_indicador(
+    "stock_event_subscribers", "Conexiones abiertas a GET /eventos/stock", difusor_stock.conexiones
+)
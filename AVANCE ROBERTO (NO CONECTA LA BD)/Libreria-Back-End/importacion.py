@@ -0,0 +1,251 @@
+"""
+Importación masiva del catálogo (libros + stock inicial) desde CSV o NDJSON.
+
+Se encarga de:
+- Leer el archivo fila a fila (nunca completo en memoria).
+- Validar cada fila con `LibroCreate` (y que su `paginas_por_libro` tenga
+  papel) y juntar las válidas en lotes de `TAMANO_LOTE`.
+- Insertar cada lote con sentencias de varias filas en una transacción:
+  libros, su `inventario_libro` (columna opcional `stock`, por defecto 0),
+  la entrada de ese stock inicial en el libro mayor (así la conciliación
+  del stock cuadra) y sus términos de búsqueda (`libro_termino`).
+- Si la BD rechaza un lote, reintentar sus filas de a una para que solo
+  se rechacen las que fallan.
+- Informar los rechazos por número de línea, con el motivo.
+
+Los id los asigna el AUTO_INCREMENT, igual que en POST /libros/ (un id
+elegido en la aplicación podía chocar con el de un alta concurrente). Cada
+lote bloquea primero el final del índice de `libro` con una lectura
+`FOR UPDATE` del último id: hasta el commit nadie más agrega libros, así que
+los ids mayores a ese son exactamente los del lote y se leen de vuelta (sin
+suponer que sean consecutivos, ver libro_mayor.py). Las altas de la API
+esperan ese commit. El inventario y su entrada se insertan por `libro_id`.
+
+Desde la línea de comandos:
+    python importacion.py catalogo.csv
+    python importacion.py catalogo.ndjson --rechazos rechazos.ndjson
+
+Desde la API: POST /libros/importar?formato=csv (cuerpo = el archivo).
+"""
+import codecs
+import csv
+import json
+from datetime import datetime
+from types import SimpleNamespace
+from typing import IO, AbstractSet, Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert, literal, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from busqueda import CAMPOS_INDEXADOS, terminos_libro
+from models import InventarioLibro, Libro, MovimientoLibro, Papel, TerminoLibro, TipoMovimiento
+from schemas import LibroCreate
+from stock_bajo import esta_bajo
+
+TAMANO_LOTE = 1000
+FORMATOS = ("csv", "ndjson")
+
+_COLUMNAS_LIBRO = {c.key: c for c in Libro.__table__.columns}
+# Columnas del modelo que el archivo debe traer aunque LibroCreate no las pida
+_OBLIGATORIAS = [
+    nombre for nombre, c in _COLUMNAS_LIBRO.items()
+    if not c.nullable and not c.primary_key and c.default is None and c.server_default is None
+]
+# Columnas que se insertan: las validadas por LibroCreate que existen en la tabla + obligatorias
+COLUMNAS_INSERTADAS = [
+    nombre for nombre in _COLUMNAS_LIBRO
+    if nombre in LibroCreate.model_fields or nombre in _OBLIGATORIAS
+]
+
+
+def _filas_csv(archivo: IO[bytes]) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    texto = codecs.getreader("utf-8-sig")(archivo)
+    lector = csv.DictReader(texto)
+    for fila in lector:
+        yield lector.line_num, fila
+
+
+def _filas_ndjson(archivo: IO[bytes]) -> Iterator[Tuple[int, Any]]:
+    for numero, linea in enumerate(codecs.getreader("utf-8-sig")(archivo), start=1):
+        if not linea.strip():
+            continue
+        try:
+            yield numero, json.loads(linea)
+        except ValueError:
+            yield numero, None
+
+
+def leer_filas(archivo: IO[bytes], formato: str) -> Iterator[Tuple[int, Any]]:
+    """Itera (número de línea, fila) de un archivo binario CSV o NDJSON."""
+    return _filas_csv(archivo) if formato == "csv" else _filas_ndjson(archivo)
+
+
+def validar_fila(
+    fila: Any, paginas_papel: Optional[AbstractSet[int]] = None
+) -> Tuple[Optional[Dict[str, Any]], List[str]]:
+    """
+    Devuelve (valores para la tabla libro, errores). Con `paginas_papel`
+    (las claves de `papel`) también comprueba la clave foránea de
+    `paginas_por_libro`, que si no rechazaría el lote completo.
+    """
+    if not isinstance(fila, dict):
+        return None, ["La línea no es un objeto JSON válido"]
+    # En CSV una celda vacía es "sin valor": así aplican los valores por defecto
+    fila = {k.strip(): v for k, v in fila.items() if k and v not in ("", None)}
+    try:
+        libro = LibroCreate.model_validate(fila).model_dump()
+    except ValidationError as e:
+        return None, [f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()]
+
+    valores = {nombre: libro.get(nombre, fila.get(nombre)) for nombre in COLUMNAS_INSERTADAS}
+    faltantes = [nombre for nombre in _OBLIGATORIAS if valores.get(nombre) is None]
+    if faltantes:
+        return None, [f"{nombre}: campo requerido" for nombre in faltantes]
+    paginas = valores.get("paginas_por_libro")
+    if paginas is not None and paginas_papel is not None and paginas not in paginas_papel:
+        return None, [f"paginas_por_libro: no hay papel de {paginas} páginas"]
+
+    try:
+        stock = int(fila.get("stock", 0))
+    except (TypeError, ValueError):
+        return None, ["stock: debe ser un entero"]
+    if stock < 0:
+        return None, ["stock: no puede ser negativo"]
+    valores["_stock"] = stock
+    return valores, []
+
+
+def insertar_lote(db: Session, lote: List[Dict[str, Any]]) -> None:
+    """
+    Inserta libros, inventario y términos de un lote y hace commit. No
+    modifica `lote`: si falla, sus filas se pueden reintentar.
+    """
+    # Bloqueo del final del índice (registro y hueco posterior): las altas
+    # concurrentes esperan al commit y no se mezclan con los ids del lote
+    ultimo_id = db.execute(
+        select(Libro.id_libro).order_by(Libro.id_libro.desc()).limit(1).with_for_update()
+    ).scalar() or 0
+
+    # .values(lista) genera un único INSERT ... VALUES (...), (...), ...
+    db.execute(insert(Libro).values([
+        {nombre: valor for nombre, valor in fila.items() if nombre != "_stock"} for fila in lote
+    ]))
+    ids = db.scalars(
+        select(Libro.id_libro).where(Libro.id_libro > ultimo_id).order_by(Libro.id_libro)
+    ).all()
+    if len(ids) != len(lote):
+        raise RuntimeError(f"Se insertaron {len(lote)} libros y se leyeron {len(ids)} ids")
+
+    inventarios, terminos = [], []
+    for libro_id, fila in zip(ids, lote):
+        inventarios.append({
+            "libro_id": libro_id,
+            "stock": fila["_stock"],
+            "bajo_minimo": esta_bajo(fila["_stock"], fila.get("stock_minimo"))
+        })
+        campos = SimpleNamespace(**{campo: fila.get(campo) for campo in CAMPOS_INDEXADOS})
+        terminos.extend(
+            {"termino": termino, "libro_id": libro_id, "peso": peso}
+            for termino, peso in terminos_libro(campos).items()
+        )
+
+    db.execute(insert(InventarioLibro).values(inventarios))
+    # Entrada del stock inicial, con el id de inventario recién asignado
+    db.execute(insert(MovimientoLibro).from_select(
+        ["inventario_id", "tipo", "cantidad", "fecha_movimiento", "observaciones"],
+        select(
+            InventarioLibro.id_inventario,
+            literal(TipoMovimiento.entrada.value),
+            InventarioLibro.stock,
+            literal(datetime.now()),
+            literal("Stock inicial (importación)"),
+        ).where(InventarioLibro.libro_id.in_(ids), InventarioLibro.stock > 0),
+    ))
+    if terminos:
+        db.execute(insert(TerminoLibro).values(terminos))
+    db.commit()
+
+
+def importar(
+    db: Session,
+    archivo: IO[bytes],
+    formato: str,
+    al_rechazar: Callable[[int, List[str]], None],
+) -> Dict[str, int]:
+    """
+    Importa el archivo completo. Cada rechazo se informa con `al_rechazar`
+    (línea, errores) apenas se detecta. Devuelve los totales.
+    """
+    leidos = insertados = rechazados = 0
+    lote: List[Dict[str, Any]] = []
+    lineas: List[int] = []
+    # Claves de papel, una vez por importación (la tabla es chica)
+    paginas_papel = set(db.scalars(select(Papel.paginas)))
+    db.rollback()
+
+    def volcar():
+        nonlocal insertados, rechazados
+        try:
+            insertar_lote(db, lote)
+            insertados += len(lote)
+        except SQLAlchemyError:
+            db.rollback()
+            # De a una fila: solo se rechazan las que la BD no acepta
+            for linea, valores in zip(lineas, lote):
+                try:
+                    insertar_lote(db, [valores])
+                    insertados += 1
+                except SQLAlchemyError as e:
+                    db.rollback()
+                    al_rechazar(linea, [f"Error de base de datos: {getattr(e, 'orig', None) or e.__class__.__name__}"])
+                    rechazados += 1
+        lote.clear()
+        lineas.clear()
+
+    for linea, fila in leer_filas(archivo, formato):
+        leidos += 1
+        valores, errores = validar_fila(fila, paginas_papel)
+        if errores:
+            rechazados += 1
+            al_rechazar(linea, errores)
+            continue
+        lote.append(valores)
+        lineas.append(linea)
+        if len(lote) >= TAMANO_LOTE:
+            volcar()
+    if lote:
+        volcar()
+
+    return {"leidos": leidos, "insertados": insertados, "rechazados": rechazados}
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    from database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Importa libros y stock inicial desde CSV o NDJSON")
+    parser.add_argument("archivo")
+    parser.add_argument("--formato", choices=FORMATOS, help="Por defecto, según la extensión")
+    parser.add_argument("--rechazos", help="Archivo NDJSON donde escribir las filas rechazadas")
+    args = parser.parse_args()
+
+    formato = args.formato or ("ndjson" if args.archivo.endswith((".ndjson", ".jsonl")) else "csv")
+    salida_rechazos = open(args.rechazos, "w", encoding="utf-8") if args.rechazos else sys.stderr
+
+    def informar(linea: int, errores: List[str]) -> None:
+        salida_rechazos.write(json.dumps({"linea": linea, "errores": errores}, ensure_ascii=False) + "\n")
+
+    sesion = SessionLocal()
+    try:
+        with open(args.archivo, "rb") as archivo:
+            totales = importar(sesion, archivo, formato, informar)
+        print(f"✔ {totales['insertados']} libros importados, {totales['rechazados']} rechazados "
+              f"({totales['leidos']} filas leídas)")
+    finally:
+        sesion.close()
+        if args.rechazos:
+            salida_rechazos.close()
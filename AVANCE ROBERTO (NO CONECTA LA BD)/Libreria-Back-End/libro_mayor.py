@@ -0,0 +1,115 @@
+"""
+Aplicación de varios movimientos del inventario global en una transacción.
+
+La usan los lotes (POST /movimientos/lote) y las ventas agrupadas
+(ventas_agrupadas.py). Para todas las líneas juntas:
+- Una consulta bloquea los inventarios en orden de id_inventario (dos
+  transacciones concurrentes nunca se bloquean en orden cruzado) y trae el
+  mínimo y el precio del libro.
+- Una consulta valida los usuarios referenciados.
+- Las líneas se aplican en el orden recibido sobre el stock ya bloqueado:
+  cada una se acepta o se rechaza por separado (también si su fecha cae en
+  un mes archivado, ver particiones.py).
+- Un único INSERT de varias filas en el libro mayor (sus ids se leen
+  después con una consulta) y otro en los acumulados de ventas. Las líneas con fecha pasada corrigen los puntos de
+  control del stock posteriores (ver conciliacion.py).
+El commit lo hace el llamador.
+"""
+from datetime import datetime
+from typing import Dict, List, Sequence, Tuple
+
+from sqlalchemy import insert, select
+
+from acumulados import acumular_ventas
+from conciliacion import corregir_puntos
+from models import InventarioLibro, MovimientoLibro, Usuario
+from particiones import fecha_admitida
+from schemas import MovimientoCreate, ResultadoLineaLote
+from stock_bajo import esta_bajo, inventario_con_minimo
+
+
+async def aplicar_movimientos(
+    db, lineas: Sequence[MovimientoCreate]
+) -> Tuple[List[ResultadoLineaLote], Dict[int, dict]]:
+    """
+    Devuelve el resultado de cada línea (en el orden recibido) y las filas
+    insertadas en el libro mayor por índice de línea, con su `id_mov_libro`.
+    """
+    ids_inventario = sorted({m.inventario_id for m in lineas})
+    inventarios = {
+        fila.InventarioLibro.id_inventario: fila
+        for fila in await db.execute(
+            inventario_con_minimo(InventarioLibro.id_inventario.in_(ids_inventario))
+            .order_by(InventarioLibro.id_inventario)
+        )
+    }
+
+    ids_usuario = {m.usuario_id for m in lineas if m.usuario_id}
+    usuarios = set()
+    if ids_usuario:
+        usuarios = set(await db.scalars(
+            select(Usuario.id_usuario).where(Usuario.id_usuario.in_(ids_usuario))
+        ))
+
+    ahora = datetime.now()
+    insertadas: Dict[int, dict] = {}
+    resultados, ventas, pasadas = [], [], []
+    for indice, m in enumerate(lineas):
+        fila = inventarios.get(m.inventario_id)
+        if not fila:
+            resultados.append(ResultadoLineaLote(indice=indice, ok=False, detalle="Inventario no existe"))
+            continue
+        if m.usuario_id and m.usuario_id not in usuarios:
+            resultados.append(ResultadoLineaLote(indice=indice, ok=False, detalle="Usuario no existe"))
+            continue
+        if not fecha_admitida(m.fecha_movimiento):
+            resultados.append(ResultadoLineaLote(indice=indice, ok=False, detalle="Mes archivado"))
+            continue
+        inv = fila.InventarioLibro
+        if m.tipo in ("salida", "venta") and inv.stock < m.cantidad:
+            resultados.append(ResultadoLineaLote(indice=indice, ok=False, detalle="Stock insuficiente"))
+            continue
+
+        delta = m.cantidad if m.tipo in ("entrada", "ajuste") else -m.cantidad
+        inv.stock += delta
+        inv.bajo_minimo = esta_bajo(inv.stock, fila.stock_minimo)
+
+        fecha = m.fecha_movimiento or ahora
+        insertadas[indice] = {
+            "inventario_id": m.inventario_id,
+            "tipo": m.tipo,
+            "cantidad": m.cantidad,
+            "usuario_id": m.usuario_id,
+            "fecha_movimiento": fecha,
+            "observaciones": m.observaciones,
+        }
+        if m.tipo == "venta":
+            ventas.append((fecha, inv.libro_id, None, m.cantidad, fila.precio))
+        if m.fecha_movimiento:
+            pasadas.append((m.inventario_id, fecha, delta))
+        resultados.append(ResultadoLineaLote(indice=indice, ok=True, stock_resultante=inv.stock))
+
+    if insertadas:
+        filas = list(insertadas.values())
+        resultado = await db.execute(insert(MovimientoLibro).values(filas))
+        # lastrowid es el id de la primera fila, pero los siguientes no son
+        # necesariamente consecutivos (auto_increment_increment > 1 en Galera o
+        # replicación de grupo): se leen. Desde ese id, los movimientos globales
+        # de estos inventarios son solo los recién insertados, porque cualquier
+        # otro que los escriba necesita el bloqueo que esta transacción tiene.
+        ids = (await db.scalars(
+            select(MovimientoLibro.id_mov_libro)
+            .where(
+                MovimientoLibro.id_mov_libro >= resultado.lastrowid,
+                MovimientoLibro.inventario_id.in_({f["inventario_id"] for f in filas}),
+                MovimientoLibro.punto_venta_id.is_(None),
+            )
+            .order_by(MovimientoLibro.id_mov_libro)
+        )).all()
+        if len(ids) != len(filas):
+            raise RuntimeError(f"Se insertaron {len(filas)} movimientos y se leyeron {len(ids)} ids")
+        for fila, id_mov_libro in zip(filas, ids):
+            fila["id_mov_libro"] = id_mov_libro
+    await acumular_ventas(db, ventas)
+    await corregir_puntos(db, pasadas)
+    return resultados, insertadas
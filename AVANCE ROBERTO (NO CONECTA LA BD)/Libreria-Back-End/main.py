@@ -3,23 +3,43 @@ Punto de entrada principal de la API de librería.
 
 Este módulo:
 - Inicializa la aplicación FastAPI.
-- Crea las tablas en la base de datos (si no existen).
+- Verifica al iniciar que el esquema esté en la versión que espera el código
+  (las tablas las crean las migraciones: `python migraciones.py`).
 - Registra los routers de:
     - libros
     - inventario
+    - inventario por punto de venta
     - movimientos
+    - administración (resumen del panel)
+    - reportes de ventas (sobre los acumulados diarios)
+    - producción (plan de reimpresión según el papel disponible)
+    - eventos (cambios de stock en vivo por Server-Sent Events)
 - Expone la dependencia `get_db` para obtener una sesión de base de datos por petición.
+- Mide latencia por ruta y sentencias/tiempo de BD por petición, y los
+  publica en formato Prometheus en GET /metrics (ver metricas.py).
 - Define algunas rutas simples de ejemplo ("/" y "/libros/").
 """
 from fastapi import FastAPI, Depends
+from fastapi.responses import PlainTextResponse
 from sqlalchemy.orm import Session
-from database import SessionLocal, engine, Base
-from routers import libros, inventario, movimientos, usuarios, puntos_venta
+from database import SessionLocal, engine, async_engine, replica_engines, cerrar_engines
+from routers import libros, inventario, inventario_pv, movimientos, usuarios, puntos_venta, admin, reportes, produccion, eventos
 from fastapi.middleware.cors import CORSMiddleware
 from models import Usuario
+from seguridad import hashear_contrasena
+from paginacion import CABECERA_CURSOR
+from metricas import MiddlewareMetricas, exportar as exportar_metricas
+from ventas_agrupadas import agrupador_ventas
+import migraciones
 
 app = FastAPI(title="API Librería")
 
+@app.on_event("startup")
+def verificar_esquema():
+    # Una consulta a schema_version; si faltan migraciones la API no arranca
+    version = migraciones.verificar(engine)
+    print(f"✔ Esquema de la base de datos en la versión {version}")
+
 @app.on_event("startup")
 def crear_usuario_admin():
     db = SessionLocal()
@@ -31,7 +51,7 @@ def crear_usuario_admin():
             admin = Usuario(
                 nombre="Administrador",
                 email="admin@admin.com",
-                contrasena="admin",
+                contrasena=hashear_contrasena("admin"),
                 rol="admin",
                 punto_venta_id=None
             )
@@ -43,6 +63,14 @@ def crear_usuario_admin():
     finally:
         db.close()
 
+@app.on_event("shutdown")
+async def cerrar_conexiones():
+    # Las ventas agrupadas pendientes se confirman antes de cerrar los pools
+    if agrupador_ventas:
+        await agrupador_ventas.cerrar()
+    # Cierra los pools async (primario y réplicas) para no dejar conexiones colgadas en MySQL
+    await cerrar_engines()
+
 # CORS origins solo, se utiliza en producción o en desarrollo pero bajo NGINX
 origins = [
     "http://127.0.0.1:5500",  # por ejemplo si usas Live Server
@@ -57,19 +85,34 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[CABECERA_CURSOR],  # cursor de la página siguiente
 )
 
-# Crea tablas
-Base.metadata.create_all(bind=engine)
+# Métricas por ruta: se agrega al final para envolver también a CORS
+app.add_middleware(MiddlewareMetricas)
 
 # Rutas
 app.include_router(libros.router)
 app.include_router(inventario.router)
+app.include_router(inventario_pv.router)
 app.include_router(movimientos.router)
 app.include_router(usuarios.router)
 app.include_router(puntos_venta.router)
+app.include_router(admin.router)
+app.include_router(reportes.router)
+app.include_router(produccion.router)
+app.include_router(eventos.router)
 
 
 @app.get("/")
 def root():
-    return {"message": "Bienvenido a la API de Librería"}
\ No newline at end of file
+    return {"message": "Bienvenido a la API de Librería"}
+
+
+# Métricas en formato Prometheus (de este worker)
+@app.get("/metrics", include_in_schema=False)
+async def metricas():
+    return PlainTextResponse(
+        exportar_metricas(engine, async_engine.sync_engine, *[r.sync_engine for r in replica_engines]),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
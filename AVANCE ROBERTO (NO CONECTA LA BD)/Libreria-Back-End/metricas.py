@@ -0,0 +1,278 @@
+"""
+Métricas de la API en formato Prometheus (expuestas en GET /metrics).
+
+Se encarga de:
+- Medir la latencia de cada petición por método y ruta (la plantilla de la
+  ruta, p. ej. `/libros/{libro_id}`, no la URL concreta) con un middleware
+  ASGI puro.
+- Contar, con eventos del engine de SQLAlchemy, las sentencias SQL y el
+  tiempo en la BD de cada petición. El acumulador de la petición viaja en
+  una ContextVar, así que funciona igual con el engine async y el síncrono.
+- Medir la espera para obtener una conexión del pool (`PoolMedido`,
+  `PoolAsyncMedido`): incluye abrir una conexión nueva si hace falta.
+
+Todo vive en memoria del proceso: con varios workers, cada uno expone sus
+propias métricas (Prometheus las suma al consultar varias instancias). El
+costo por petición es un par de `perf_counter` y una búsqueda binaria por
+histograma, bajo como para dejarlo siempre activo.
+
+Uso:
+    database.py: instrumentar_engine(engine), poolclass=PoolMedido
+    main.py:     app.add_middleware(MiddlewareMetricas)
+    otro módulo: registrar_indicador("nombre", "ayuda", funcion_que_lee_el_valor)
+
+Este módulo no importa nada de la aplicación: los valores que viven en otros
+módulos (p. ej. las conexiones SSE de eventos_stock.py) se registran desde
+allí como indicadores que se leen al exportar.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+BUCKETS_SEGUNDOS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_SENTENCIAS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+BUCKETS_GRUPO = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+_lock = threading.Lock()
+
+
+class Histograma:
+    """Histograma con buckets fijos y etiquetas, al estilo de Prometheus."""
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: Sequence[str], buckets: Sequence[float]):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self.buckets = tuple(buckets)
+        # valores de etiquetas -> [conteos por bucket (+Inf al final), suma]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observar(self, valor: float, *etiquetas: str) -> None:
+        indice = bisect_left(self.buckets, valor)
+        with _lock:
+            serie = self._series.get(etiquetas)
+            if serie is None:
+                serie = self._series[etiquetas] = [[0] * (len(self.buckets) + 1), 0.0]
+            serie[0][indice] += 1
+            serie[1] += valor
+
+    def exportar(self) -> str:
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} histogram"]
+        with _lock:
+            series = [(clave, list(conteos), suma) for clave, (conteos, suma) in self._series.items()]
+        for clave, conteos, suma in sorted(series):
+            base = ",".join(f'{e}="{_escapar(v)}"' for e, v in zip(self.etiquetas, clave))
+            prefijo = base + "," if base else ""
+            acumulado = 0
+            for limite, conteo in zip(self.buckets + (float("inf"),), conteos):
+                acumulado += conteo
+                le = "+Inf" if limite == float("inf") else repr(float(limite))
+                lineas.append(f'{self.nombre}_bucket{{{prefijo}le="{le}"}} {acumulado}')
+            sufijo = f"{{{base}}}" if base else ""
+            lineas.append(f"{self.nombre}_sum{sufijo} {suma}")
+            lineas.append(f"{self.nombre}_count{sufijo} {acumulado}")
+        return "\n".join(lineas)
+
+
+class Contador:
+    def __init__(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = ()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self._series: Dict[Tuple[str, ...], float] = {}
+
+    def sumar(self, valor: float = 1, *etiquetas: str) -> None:
+        with _lock:
+            self._series[etiquetas] = self._series.get(etiquetas, 0) + valor
+
+    def exportar(self) -> str:
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} counter"]
+        with _lock:
+            series = sorted(self._series.items())
+        for clave, valor in series:
+            base = ",".join(f'{e}="{_escapar(v)}"' for e, v in zip(self.etiquetas, clave))
+            lineas.append(f"{self.nombre}{{{base}}} {valor}" if base else f"{self.nombre} {valor}")
+        return "\n".join(lineas)
+
+
+class Indicador:
+    """Gauge sin etiquetas cuyo valor se lee al exportar."""
+
+    def __init__(self, nombre: str, ayuda: str, leer: Callable[[], float]):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.leer = leer
+
+    def exportar(self) -> str:
+        return "\n".join([
+            f"# HELP {self.nombre} {self.ayuda}",
+            f"# TYPE {self.nombre} gauge",
+            f"{self.nombre} {self.leer()}",
+        ])
+
+
+def _escapar(valor: str) -> str:
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+duracion_peticiones = Histograma(
+    "http_request_duration_seconds", "Latencia de las peticiones HTTP", ("method", "route"), BUCKETS_SEGUNDOS
+)
+peticiones = Contador("http_requests_total", "Peticiones HTTP respondidas", ("method", "route", "status"))
+sentencias_por_peticion = Histograma(
+    "db_statements_per_request", "Sentencias SQL ejecutadas por petición", ("route",), BUCKETS_SENTENCIAS
+)
+tiempo_bd_por_peticion = Histograma(
+    "db_time_per_request_seconds", "Tiempo en la base de datos por petición", ("route",), BUCKETS_SEGUNDOS
+)
+duracion_sentencias = Histograma(
+    "db_statement_duration_seconds", "Duración de cada sentencia SQL", ("engine",), BUCKETS_SEGUNDOS
+)
+espera_pool = Histograma(
+    "db_pool_checkout_wait_seconds", "Espera para obtener una conexión del pool", ("engine",), BUCKETS_SEGUNDOS
+)
+
+ventas_por_commit = Histograma(
+    "sales_group_commit_size", "Ventas aplicadas en cada commit agrupado (ver ventas_agrupadas.py)", (),
+    BUCKETS_GRUPO
+)
+
+_METRICAS = (
+    duracion_peticiones, peticiones, sentencias_por_peticion, tiempo_bd_por_peticion,
+    duracion_sentencias, espera_pool, ventas_por_commit,
+)
+_indicadores: List[Indicador] = []
+
+
+def registrar_indicador(nombre: str, ayuda: str, leer: Callable[[], float]) -> Indicador:
+    indicador = Indicador(nombre, ayuda, leer)
+    with _lock:
+        _indicadores.append(indicador)
+    return indicador
+
+
+# ---------------------------------------------------------
+# ACUMULADOR POR PETICIÓN
+# ---------------------------------------------------------
+class _Peticion:
+    __slots__ = ("sentencias", "segundos_bd")
+
+    def __init__(self):
+        self.sentencias = 0
+        self.segundos_bd = 0.0
+
+
+_peticion_actual: ContextVar[Optional[_Peticion]] = ContextVar("peticion_actual", default=None)
+
+
+# ---------------------------------------------------------
+# SQLALCHEMY: SENTENCIAS Y POOL
+# ---------------------------------------------------------
+def instrumentar_engine(engine, nombre: str) -> None:
+    """Registra los eventos que cuentan sentencias y tiempo de BD del engine."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _antes(conn, cursor, statement, parameters, context, executemany):
+        conn.info["_inicio_sentencia"] = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _despues(conn, cursor, statement, parameters, context, executemany):
+        inicio = conn.info.pop("_inicio_sentencia", None)
+        if inicio is None:
+            return
+        segundos = time.perf_counter() - inicio
+        duracion_sentencias.observar(segundos, nombre)
+        peticion = _peticion_actual.get()
+        if peticion is not None:
+            peticion.sentencias += 1
+            peticion.segundos_bd += segundos
+
+
+class PoolMedido(QueuePool):
+    """QueuePool que registra cuánto se esperó cada conexión."""
+    nombre_metricas = "sync"
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            espera_pool.observar(time.perf_counter() - inicio, self.nombre_metricas)
+
+
+class PoolAsyncMedido(AsyncAdaptedQueuePool):
+    nombre_metricas = "async"
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            espera_pool.observar(time.perf_counter() - inicio, self.nombre_metricas)
+
+
+def pool_async_con_nombre(nombre: str):
+    """Subclase de PoolAsyncMedido con su propia etiqueta (p. ej. una réplica)."""
+    return type(f"PoolAsyncMedido_{nombre}", (PoolAsyncMedido,), {"nombre_metricas": nombre})
+
+
+# ---------------------------------------------------------
+# MIDDLEWARE ASGI
+# ---------------------------------------------------------
+class MiddlewareMetricas:
+    """
+    Middleware ASGI puro (sin BaseHTTPMiddleware): no crea tareas extra ni
+    copia el cuerpo de la respuesta.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        estado = {"codigo": 500}
+
+        async def enviar(mensaje):
+            if mensaje["type"] == "http.response.start":
+                estado["codigo"] = mensaje["status"]
+            await send(mensaje)
+
+        peticion = _Peticion()
+        token = _peticion_actual.set(peticion)
+        inicio = time.perf_counter()
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            segundos = time.perf_counter() - inicio
+            _peticion_actual.reset(token)
+            # FastAPI deja la ruta resuelta en el scope: se usa su plantilla
+            ruta = getattr(scope.get("route"), "path", None) or "sin_ruta"
+            metodo = scope["method"]
+            duracion_peticiones.observar(segundos, metodo, ruta)
+            peticiones.sumar(1, metodo, ruta, str(estado["codigo"]))
+            sentencias_por_peticion.observar(peticion.sentencias, ruta)
+            tiempo_bd_por_peticion.observar(peticion.segundos_bd, ruta)
+
+
+def exportar(*engines) -> str:
+    """Texto en formato de exposición de Prometheus (versión 0.0.4)."""
+    bloques = [metrica.exportar() for metrica in _METRICAS]
+    conexiones = ["# HELP db_pool_checked_out Conexiones del pool en uso",
+                  "# TYPE db_pool_checked_out gauge"]
+    for engine in engines:
+        pool = getattr(engine, "pool", None)
+        if pool is not None and hasattr(pool, "checkedout"):
+            nombre = getattr(pool, "nombre_metricas", engine.name)
+            conexiones.append(f'db_pool_checked_out{{engine="{nombre}"}} {pool.checkedout()}')
+    bloques.append("\n".join(conexiones))
+    with _lock:
+        indicadores = list(_indicadores)
+    bloques.extend(indicador.exportar() for indicador in indicadores)
+    return "\n".join(bloques) + "\n"
@@ -0,0 +1,162 @@
+"""
+Migraciones versionadas del esquema de la base de datos.
+
+Se encarga de:
+- Aplicar en orden los scripts SQL de `versiones/` (`NNNN_descripcion.sql`)
+  que todavía no figuran en la tabla `schema_version`.
+- Registrar cada versión aplicada con su nombre y fecha.
+- Verificar al iniciar la API que la base está en la versión que espera el
+  código (`verificar`): una sola consulta, sin reflejar el esquema completo.
+
+Los scripts son la única fuente del esquema: `models.py` lo describe para el
+ORM pero no crea tablas. Un cambio de esquema es un script nuevo con el
+número siguiente; los scripts ya publicados no se editan.
+
+En MySQL cada sentencia DDL hace commit implícito: si un script falla a
+mitad de camino, lo ya ejecutado queda aplicado y la versión no se
+registra. Hay que corregir la causa (p. ej. filas duplicadas antes de un
+índice único) y completar o deshacer a mano lo que falte antes de reintentar.
+
+Uso (desde Libreria-Back-End):
+    python migraciones.py            # aplica las versiones pendientes
+    python migraciones.py --estado   # versión aplicada y pendientes
+    python migraciones.py --sql      # imprime el SQL pendiente sin ejecutarlo
+"""
+import re
+from pathlib import Path
+from typing import List, NamedTuple, Optional
+
+from sqlalchemy import text
+from sqlalchemy.exc import ProgrammingError
+
+DIRECTORIO = Path(__file__).parent / "versiones"
+TABLA_VERSION = "schema_version"
+
+_ARCHIVO = re.compile(r"^(\d{4})_(\w+)\.sql$")
+_FIN_SENTENCIA = re.compile(r";\s*$", re.MULTILINE)
+
+
+class EsquemaDesactualizado(RuntimeError):
+    pass
+
+
+class Migracion(NamedTuple):
+    version: int
+    nombre: str
+    ruta: Path
+
+    def sentencias(self) -> List[str]:
+        """Sentencias del script: separadas por `;` al final de línea, sin comentarios `--`."""
+        lineas = [
+            linea for linea in self.ruta.read_text(encoding="utf-8").splitlines()
+            if not linea.lstrip().startswith("--")
+        ]
+        return [s.strip() for s in _FIN_SENTENCIA.split("\n".join(lineas)) if s.strip()]
+
+
+def disponibles() -> List[Migracion]:
+    migraciones = []
+    for ruta in sorted(DIRECTORIO.glob("*.sql")):
+        coincidencia = _ARCHIVO.match(ruta.name)
+        if coincidencia:
+            migraciones.append(Migracion(int(coincidencia.group(1)), coincidencia.group(2), ruta))
+    versiones = [m.version for m in migraciones]
+    if len(set(versiones)) != len(versiones):
+        raise RuntimeError(f"Hay números de versión repetidos en {DIRECTORIO}")
+    return migraciones
+
+
+def version_esperada() -> int:
+    migraciones = disponibles()
+    return migraciones[-1].version if migraciones else 0
+
+
+def version_aplicada(conn) -> int:
+    """Última versión registrada, o 0 si la tabla de versiones no existe."""
+    try:
+        return conn.execute(text(f"SELECT COALESCE(MAX(version), 0) FROM {TABLA_VERSION}")).scalar()
+    except ProgrammingError:
+        # 1146: la tabla no existe (base vacía o creada antes de las migraciones)
+        conn.rollback()
+        return 0
+
+
+def pendientes(conn) -> List[Migracion]:
+    aplicada = version_aplicada(conn)
+    return [m for m in disponibles() if m.version > aplicada]
+
+
+def aplicar(engine, hasta: Optional[int] = None) -> List[Migracion]:
+    """Aplica las migraciones pendientes (hasta `hasta`, incluida). Devuelve las aplicadas."""
+    aplicadas = []
+    with engine.connect() as conn:
+        conn.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {TABLA_VERSION} ("
+            " version INT NOT NULL PRIMARY KEY,"
+            " nombre VARCHAR(100) NOT NULL,"
+            " aplicada_en DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP"
+            ") ENGINE=InnoDB"
+        ))
+        conn.commit()
+        for migracion in pendientes(conn):
+            if hasta is not None and migracion.version > hasta:
+                break
+            for sentencia in migracion.sentencias():
+                conn.exec_driver_sql(sentencia)
+            conn.execute(
+                text(f"INSERT INTO {TABLA_VERSION} (version, nombre) VALUES (:version, :nombre)"),
+                {"version": migracion.version, "nombre": migracion.nombre},
+            )
+            conn.commit()
+            aplicadas.append(migracion)
+    return aplicadas
+
+
+def verificar(engine) -> int:
+    """
+    Comprueba que la base esté exactamente en la versión que espera el código.
+    Lanza EsquemaDesactualizado si no; devuelve la versión en caso contrario.
+    """
+    esperada = version_esperada()
+    with engine.connect() as conn:
+        aplicada = version_aplicada(conn)
+    if aplicada < esperada:
+        raise EsquemaDesactualizado(
+            f"El esquema está en la versión {aplicada} y el código espera la {esperada}: "
+            "ejecutá `python migraciones.py` antes de iniciar la API"
+        )
+    if aplicada > esperada:
+        raise EsquemaDesactualizado(
+            f"El esquema está en la versión {aplicada}, posterior a la {esperada} que conoce "
+            "este código: actualizá la aplicación"
+        )
+    return aplicada
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from database import engine
+
+    parser = argparse.ArgumentParser(description="Aplica las migraciones pendientes del esquema")
+    parser.add_argument("--estado", action="store_true", help="Muestra la versión aplicada y las pendientes")
+    parser.add_argument("--sql", action="store_true", help="Imprime el SQL pendiente sin ejecutarlo")
+    parser.add_argument("--hasta", type=int, help="Última versión a aplicar")
+    args = parser.parse_args()
+
+    if args.estado or args.sql:
+        with engine.connect() as conexion:
+            aplicada, faltan = version_aplicada(conexion), pendientes(conexion)
+        if args.sql:
+            for migracion in faltan:
+                print(f"-- {migracion.ruta.name}")
+                print(";\n\n".join(migracion.sentencias()) + ";\n")
+        else:
+            print(f"Versión aplicada: {aplicada} (el código espera la {version_esperada()})")
+            for migracion in faltan:
+                print(f"  pendiente: {migracion.ruta.name}")
+    else:
+        hechas = aplicar(engine, args.hasta)
+        for migracion in hechas:
+            print(f"✔ {migracion.ruta.name}")
+        print(f"✔ Esquema en la versión {hechas[-1].version}" if hechas else "✔ El esquema ya estaba al día")
@@ -1,8 +1,12 @@
 """
 Modelos ORM de SQLAlchemy para la aplicación de librería.
+
+El esquema lo crean y modifican las migraciones de `versiones/` (ver
+migraciones.py); cada cambio de columnas o índices aquí va acompañado del
+script que lo aplica.
 """
 
-from sqlalchemy import Column, Integer, String, Enum, Text, ForeignKey, DateTime, DECIMAL
+from sqlalchemy import Column, Integer, String, Enum, Text, ForeignKey, DateTime, DECIMAL, Index, Boolean, Date
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database import Base
@@ -52,6 +56,8 @@ class Usuario(Base):
     contrasena = Column(String(200), nullable=False)
     rol = Column(String(20), nullable=False)
     punto_venta_id = Column(Integer, ForeignKey("punto_venta.id_punto_venta"))
+    # Se incrementa al cambiar la contraseña: invalida los tokens anteriores
+    version_token = Column(Integer, nullable=False, default=0)
 
     punto_venta = relationship("PuntoVenta")
 
@@ -75,22 +81,43 @@ class Libro(Base):
 
     id_libro = Column(Integer, primary_key=True, autoincrement=True)
     nombre = Column(String(200), nullable=False)
-    autor = Column(String(200), nullable=False)
+    autor = Column(String(200), nullable=True)
+    categoria = Column(String(100), nullable=True)
+    descripcion = Column(Text, nullable=True)
     precio = Column(Integer, nullable=False)
+    paginas_por_libro = Column(Integer, ForeignKey("papel.paginas", name="fk_libro_papel"), nullable=True)
     stock_minimo = Column(Integer, default=0)
 
     fecha_creacion = Column(DateTime, server_default=func.now(), nullable=False)
 
 
+# ---------------------------------------------------------
+# TABLA ÍNDICE INVERTIDO DE BÚSQUEDA (TÉRMINO -> LIBRO)
+# ---------------------------------------------------------
+class TerminoLibro(Base):
+    __tablename__ = "libro_termino"
+
+    # Términos ya normalizados (minúsculas, sin tildes): se comparan en binario
+    termino = Column(String(64, collation="utf8mb4_bin"), primary_key=True)
+    libro_id = Column(Integer, ForeignKey("libro.id_libro"), primary_key=True, index=True)
+    peso = Column(Integer, nullable=False)
+
+
 # ---------------------------------------------------------
 # TABLA INVENTARIO GLOBAL (POR LIBRO GENERAL)
 # ---------------------------------------------------------
 class InventarioLibro(Base):
     __tablename__ = "inventario_libro"
+    __table_args__ = (
+        # Un solo inventario global por libro
+        Index("ux_inventario_libro_libro", "libro_id", unique=True),
+    )
 
     id_inventario = Column(Integer, primary_key=True, autoincrement=True)
     libro_id = Column(Integer, ForeignKey("libro.id_libro"), nullable=False)
     stock = Column(Integer, nullable=False, default=0)
+    # stock < libro.stock_minimo, mantenido por la aplicación (ver stock_bajo.py)
+    bajo_minimo = Column(Boolean, nullable=False, default=False, index=True)
 
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False)
 
@@ -102,6 +129,12 @@ class InventarioLibro(Base):
 # ---------------------------------------------------------
 class InventarioPV(Base):
     __tablename__ = "inventario_pv"
+    __table_args__ = (
+        # Un libro por punto de venta; sirve al listado por tienda y a la venta
+        Index("ux_inventario_pv_pv_libro", "id_punto_venta", "id_libro", unique=True),
+        # Alertas de stock bajo, globales o de una tienda
+        Index("ix_inventario_pv_bajo_minimo", "bajo_minimo", "id_punto_venta"),
+    )
 
     id_inventario = Column(Integer, primary_key=True, autoincrement=True)
     id_libro = Column(Integer, ForeignKey("libro.id_libro"), nullable=False)
@@ -109,6 +142,8 @@ class InventarioPV(Base):
 
     stock = Column(Integer, default=0)
     stock_minimo = Column(Integer, default=5)
+    # stock < stock_minimo, mantenido por la aplicación (ver stock_bajo.py)
+    bajo_minimo = Column(Boolean, nullable=False, default=False)
 
     libro = relationship("Libro")
     punto_venta = relationship("PuntoVenta")
@@ -119,15 +154,101 @@ class InventarioPV(Base):
 # ---------------------------------------------------------
 class MovimientoLibro(Base):
     __tablename__ = "movimiento_libro"
+    # Particionada por mes sobre fecha_movimiento (ver particiones.py): por eso
+    # la clave primaria incluye la fecha y no hay claves foráneas en la tabla.
+    __table_args__ = (
+        # Rangos de fechas (exportación) y listado ordenado por (fecha, id)
+        Index("ix_movimiento_libro_fecha", "fecha_movimiento", "id_mov_libro"),
+        # Historial de un inventario por fecha
+        Index("ix_movimiento_libro_inventario_fecha", "inventario_id", "fecha_movimiento"),
+        # Movimientos de un tipo (p. ej. ventas) en un rango de fechas
+        Index("ix_movimiento_libro_tipo_fecha", "tipo", "fecha_movimiento"),
+    )
 
     id_mov_libro = Column(Integer, primary_key=True, autoincrement=True)
-    inventario_id = Column(Integer, ForeignKey("inventario_libro.id_inventario"), nullable=False)
+    inventario_id = Column(Integer, nullable=False)
     tipo = Column(Enum(TipoMovimiento), nullable=False)
     cantidad = Column(Integer, nullable=False)
-    usuario_id = Column(Integer, ForeignKey("usuario.id_usuario"))
+    usuario_id = Column(Integer)
+    # NULL = movimiento del inventario global; si no, venta/ajuste de esa tienda
+    punto_venta_id = Column(Integer, nullable=True)
     observaciones = Column(Text, nullable=True)
 
-    fecha_movimiento = Column(DateTime, server_default=func.now(), nullable=False)
+    fecha_movimiento = Column(DateTime, primary_key=True, server_default=func.now(), nullable=False)
+
+    inventario = relationship(
+        "InventarioLibro", primaryjoin="foreign(MovimientoLibro.inventario_id) == InventarioLibro.id_inventario"
+    )
+    usuario = relationship("Usuario", primaryjoin="foreign(MovimientoLibro.usuario_id) == Usuario.id_usuario")
+    punto_venta = relationship(
+        "PuntoVenta", primaryjoin="foreign(MovimientoLibro.punto_venta_id) == PuntoVenta.id_punto_venta"
+    )
+
+
+# ---------------------------------------------------------
+# TABLA ACUMULADOS DE VENTAS (DÍA x PUNTO DE VENTA x LIBRO)
+# ---------------------------------------------------------
+class VentaDiaria(Base):
+    __tablename__ = "venta_diaria"
+    __table_args__ = (
+        # Más vendidos de un período sin pasar por la clave de tienda
+        Index("ix_venta_diaria_dia_libro", "dia", "libro_id"),
+    )
+
+    # Derivada del libro mayor (ver acumulados.py); 0 = inventario global
+    dia = Column(Date, primary_key=True)
+    punto_venta_id = Column(Integer, primary_key=True)
+    libro_id = Column(Integer, primary_key=True)
+    unidades = Column(Integer, nullable=False, default=0)
+    importe = Column(DECIMAL(14, 2), nullable=False, default=0)
+    movimientos = Column(Integer, nullable=False, default=0)
+
+
+# ---------------------------------------------------------
+# CONCILIACIÓN DEL STOCK CON EL LIBRO MAYOR
+# ---------------------------------------------------------
+class StockPuntoControl(Base):
+    __tablename__ = "stock_punto_control"
+
+    # Stock global del inventario al instante `fecha` (ver conciliacion.py)
+    inventario_id = Column(Integer, primary_key=True)
+    fecha = Column(DateTime, primary_key=True)
+    stock = Column(Integer, nullable=False)
+
+
+class DescuadreStock(Base):
+    __tablename__ = "descuadre_stock"
+
+    inventario_id = Column(Integer, primary_key=True)
+    stock_registrado = Column(Integer, nullable=False)
+    stock_libro_mayor = Column(Integer, nullable=False)
+    detectado_en = Column(DateTime, nullable=False)
+
 
-    inventario = relationship("InventarioLibro")
-    usuario = relationship("Usuario")
+class EstadoConciliacion(Base):
+    __tablename__ = "conciliacion_estado"
+
+    id = Column(Integer, primary_key=True)
+    corte = Column(DateTime, nullable=True)
+    siguiente_inventario = Column(Integer, nullable=False, default=0)
+
+
+# ---------------------------------------------------------
+# SUGERENCIAS DE REPOSICIÓN POR TIENDA
+# ---------------------------------------------------------
+class SugerenciaReposicion(Base):
+    __tablename__ = "sugerencia_reposicion"
+
+    # Calculada por la tarea programada (ver reposicion.py), nunca en una petición
+    punto_venta_id = Column(Integer, primary_key=True)
+    libro_id = Column(Integer, primary_key=True)
+    demanda_diaria = Column(DECIMAL(10, 3), nullable=False)
+    desviacion = Column(DECIMAL(10, 3), nullable=False)
+    stock = Column(Integer, nullable=False)
+    stock_minimo = Column(Integer, nullable=False)
+    minimo_sugerido = Column(Integer, nullable=False)
+    # cantidad = transferir (desde el inventario global) + pedir (reimpresión o proveedor)
+    cantidad = Column(Integer, nullable=False)
+    transferir = Column(Integer, nullable=False)
+    pedir = Column(Integer, nullable=False)
+    calculado_en = Column(DateTime, nullable=False)
@@ -0,0 +1,197 @@
+"""
+Utilidades de paginación por cursor (keyset) y respuestas NDJSON en streaming.
+
+Se encarga de:
+- Codificar/decodificar el cursor opaco `after` (base64 de la clave de orden).
+- Construir el filtro keyset sobre una o varias columnas de orden.
+- Cortar una página de `limit` filas y exponer el siguiente cursor en la
+  cabecera `X-Next-Cursor` (las respuestas JSON siguen siendo una lista).
+- Devolver el resultado completo como NDJSON usando un cursor del lado del
+  servidor, de modo que la memoria no crece con el tamaño de la tabla
+  (las filas proyectadas se codifican por lote con orjson, ver
+  serializacion.py).
+- Exportar filas proyectadas (sin objetos ORM) como CSV o NDJSON con el
+  mismo cursor del lado del servidor, para descargas de millones de filas,
+  opcionalmente precedidas por filas que no están en la BD (archivos).
+
+Uso típico desde un router:
+    from paginacion import paginar, respuesta_ndjson
+"""
+import base64
+import csv
+import enum
+import io
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Callable, Iterator, List, Optional, Sequence
+
+from anyio import to_thread
+from fastapi import HTTPException, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, or_
+
+from database import AsyncSessionLocal, async_engine
+from serializacion import lineas_ndjson
+
+CABECERA_CURSOR = "X-Next-Cursor"
+LIMITE_POR_DEFECTO = 100
+LIMITE_MAXIMO = 1000
+TAMANO_LOTE_STREAM = 500
+
+
+def codificar_cursor(*valores: Any) -> str:
+    """Serializa la clave de orden de la última fila en un cursor opaco."""
+    datos = [v.isoformat() if isinstance(v, datetime) else v for v in valores]
+    crudo = json.dumps(datos, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(crudo).decode("ascii").rstrip("=")
+
+
+def decodificar_cursor(cursor: str, tipos: Sequence[type]) -> List[Any]:
+    """
+    Recupera la clave de orden desde el cursor `after`.
+
+    `tipos` indica el tipo de cada componente (int, str, datetime) para
+    validarlo y convertirlo. Un cursor manipulado devuelve 400.
+    """
+    try:
+        relleno = "=" * (-len(cursor) % 4)
+        datos = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+        if not isinstance(datos, list) or len(datos) != len(tipos):
+            raise ValueError
+        valores = []
+        for valor, tipo in zip(datos, tipos):
+            if tipo is datetime:
+                valores.append(datetime.fromisoformat(valor))
+            elif isinstance(valor, tipo) and not isinstance(valor, bool):
+                valores.append(valor)
+            else:
+                raise ValueError
+        return valores
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+
+def filtro_keyset(columnas: Sequence[Any], valores: Sequence[Any], descendente: bool = False):
+    """
+    Condición "fila posterior al cursor" para un orden compuesto.
+
+    Se expande como (a > x) OR (a = x AND b > y) en lugar de comparar tuplas
+    para que MySQL pueda usar el índice de la primera columna como rango.
+    """
+    condiciones = []
+    for i, (columna, valor) in enumerate(zip(columnas, valores)):
+        previas = [c == v for c, v in zip(columnas[:i], valores[:i])]
+        comparacion = columna < valor if descendente else columna > valor
+        condiciones.append(and_(*previas, comparacion))
+    return or_(*condiciones)
+
+
+async def paginar(db, stmt, limit: int, response: Response, clave: Callable[[Any], Sequence[Any]]) -> list:
+    """
+    Ejecuta `stmt` trayendo como máximo `limit` filas (objetos Row).
+
+    Se pide una fila extra para saber si hay más resultados; en ese caso se
+    publica el cursor de la última fila devuelta en la cabecera `X-Next-Cursor`.
+    """
+    filas = (await db.execute(stmt.limit(limit + 1))).all()
+    if len(filas) > limit:
+        filas = filas[:limit]
+        response.headers[CABECERA_CURSOR] = codificar_cursor(*clave(filas[-1]))
+    return filas
+
+
+def respuesta_ndjson(stmt, esquema, proyectada: bool = False, motor=None) -> StreamingResponse:
+    """
+    Devuelve todas las filas de `stmt` como NDJSON (una fila JSON por línea).
+
+    Usa su propia sesión y `yield_per`, que activa el cursor del lado del
+    servidor: las filas se leen y se serializan por lotes sin materializar
+    la tabla completa en memoria. Con `proyectada=True` cada fila es un Row
+    de columnas (select de columnas) en lugar de una entidad ORM y cada lote
+    se codifica de una vez con los campos de `esquema`, sin validarlo.
+    `motor` elige el engine (p. ej. `db.bind` de una sesión de lectura).
+    """
+    async def generar():
+        async with AsyncSessionLocal(bind=motor or async_engine) as db:
+            opciones = stmt.execution_options(yield_per=TAMANO_LOTE_STREAM)
+            if proyectada:
+                resultado = await db.stream(opciones)
+                async for lote in resultado.partitions():
+                    yield lineas_ndjson(lote, esquema)
+                return
+            async for fila in await db.stream_scalars(opciones):
+                yield esquema.model_validate(fila).model_dump_json() + "\n"
+
+    return StreamingResponse(generar(), media_type="application/x-ndjson")
+
+
+def respuesta_ndjson_vacia() -> Response:
+    """NDJSON sin filas (p. ej. una búsqueda sin términos indexables)."""
+    return Response(b"", media_type="application/x-ndjson")
+
+
+def _valor_plano(valor: Any) -> Any:
+    """Convierte fechas, enums y decimales a valores aptos para CSV/JSON."""
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    if isinstance(valor, enum.Enum):
+        return valor.value
+    if isinstance(valor, Decimal):
+        return str(valor)
+    return valor
+
+
+def respuesta_exportacion(
+    stmt, formato: str, nombre_archivo: str, motor=None, anteriores: Optional[Iterator[List[dict]]] = None
+) -> StreamingResponse:
+    """
+    Descarga todas las filas de un SELECT de columnas como CSV (con cabecera)
+    o NDJSON.
+
+    Las filas llegan por lotes de `TAMANO_LOTE_STREAM` desde un cursor del
+    lado del servidor y cada lote se envía como un trozo de la respuesta
+    (chunked): la memoria es constante y el event loop no queda ocupado
+    mientras MySQL produce filas.
+
+    `anteriores` son lotes de filas (dicts con las mismas columnas) que se
+    envían antes que las de la BD, p. ej. meses archivados; se leen en un
+    hilo porque su iterador hace E/S de disco.
+    """
+    columnas = list(stmt.selected_columns.keys())
+
+    def escribir(buffer, escritor, valores):
+        if formato == "csv":
+            escritor.writerow(valores)
+        else:
+            buffer.write(json.dumps(dict(zip(columnas, valores)), ensure_ascii=False) + "\n")
+
+    async def generar():
+        buffer = io.StringIO()
+        escritor = csv.writer(buffer, lineterminator="\n")
+        if formato == "csv":
+            escritor.writerow(columnas)
+        if anteriores is not None:
+            while (lote := await to_thread.run_sync(next, anteriores, None)) is not None:
+                for fila in lote:
+                    escribir(buffer, escritor, [_valor_plano(fila.get(c)) for c in columnas])
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        async with AsyncSessionLocal(bind=motor or async_engine) as db:
+            resultado = await db.stream(stmt.execution_options(yield_per=TAMANO_LOTE_STREAM))
+            async for lote in resultado.partitions():
+                for fila in lote:
+                    escribir(buffer, escritor, [_valor_plano(v) for v in fila])
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+            if buffer.tell():
+                yield buffer.getvalue()
+
+    tipo = "text/csv; charset=utf-8" if formato == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        generar(),
+        media_type=tipo,
+        headers={"Content-Disposition": f'attachment; filename="{nombre_archivo}.{formato}"'}
+    )
@@ -0,0 +1,451 @@
+"""
+Particiones mensuales del libro mayor (`movimiento_libro`) y archivo en frío.
+
+Se encarga de:
+- Mantener una partición por mes (RANGE COLUMNS sobre fecha_movimiento,
+  creada por la migración 8): `preparar` parte la partición abierta
+  `p_futuro` para que existan los meses siguientes. La primera ejecución
+  reparte todo el historial en meses (copia la tabla una vez).
+- Archivar los meses antiguos: cada partición se vuelca, ordenada por
+  (fecha, id) y con los nombres de libro, usuario y tienda ya resueltos, a
+  ARCHIVO_DIR/movimientos_AAAA-MM.ndjson.gz; se anota en `manifiesto.json`
+  (filas, sha256, rango) y recién entonces se elimina con DROP PARTITION.
+  El conteo final y el DROP van bajo LOCK TABLES: si entró un movimiento
+  mientras se escribía el archivo, se vuelve a escribir antes de borrar.
+- Escribir cada archivo en tramos de `TAMANO_TRAMO` filas, cada uno un
+  miembro gzip propio (el archivo sigue siendo un .gz normal), y anotar en
+  el manifiesto su posición en bytes y su primera clave (fecha, id).
+- Leer el archivo solo cuando hace falta: la exportación y el listado
+  consultan la base de datos desde la "frontera" (primer día que sigue en
+  la BD) y abren archivos únicamente si el rango de fechas o el cursor
+  quedan antes de ella. Una página del listado descomprime solo los tramos
+  anteriores a su cursor que necesita, y la exportación empieza en el
+  tramo de su fecha `desde`: recorrer un mes archivado página a página no
+  vuelve a leerlo desde el principio en cada página.
+
+Los meses archivados no cambian más: no se aceptan movimientos con fecha
+anterior a la frontera (`fecha_admitida`). Los acumulados de ventas
+(`venta_diaria`) se conservan, y acumulados.py no reconstruye meses
+archivados. Solo se archivan meses que la conciliación del stock ya cerró
+(ver conciliacion.py): sus puntos de control no necesitan esos movimientos.
+
+Uso (desde Libreria-Back-End; conviene programarlo una vez al mes):
+    python particiones.py                  # crea las particiones de los próximos meses
+    python particiones.py --archivar 12    # además archiva lo anterior a los últimos 12 meses
+    python particiones.py --estado         # particiones y meses archivados
+"""
+import enum
+import gzip
+import hashlib
+import json
+import os
+from bisect import bisect_left
+from collections import deque
+from datetime import date, datetime
+from decimal import Decimal
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import func, select, text
+
+from models import EstadoConciliacion, InventarioLibro, Libro, MovimientoLibro, PuntoVenta, Usuario
+
+ARCHIVO_DIR = Path(os.getenv("ARCHIVO_DIR") or Path(__file__).parent / "archivo_movimientos")
+MANIFIESTO = ARCHIVO_DIR / "manifiesto.json"
+PARTICION_ABIERTA = "p_futuro"
+MESES_ADELANTE = 3
+TAMANO_LOTE = 1000
+TAMANO_TRAMO = 10000
+# Vueltas de escritura del archivo si entran movimientos mientras se escribe
+INTENTOS_ARCHIVO = 3
+
+# Mismas columnas que el listado detallado: una fila archivada se lee sin joins
+_COLUMNAS_ARCHIVO = (
+    MovimientoLibro.id_mov_libro,
+    MovimientoLibro.inventario_id,
+    MovimientoLibro.tipo,
+    MovimientoLibro.cantidad,
+    MovimientoLibro.usuario_id,
+    MovimientoLibro.punto_venta_id,
+    MovimientoLibro.fecha_movimiento,
+    MovimientoLibro.observaciones,
+    InventarioLibro.libro_id,
+    Libro.nombre.label("libro"),
+    Usuario.nombre.label("usuario"),
+    PuntoVenta.nombre.label("punto_venta"),
+)
+
+
+# ---------------------------------------------------------
+# MESES
+# ---------------------------------------------------------
+def _mes(fecha) -> date:
+    return date(fecha.year, fecha.month, 1)
+
+
+def _mes_siguiente(mes: date) -> date:
+    return date(mes.year + mes.month // 12, mes.month % 12 + 1, 1)
+
+
+def _mes_anterior(mes: date, meses: int) -> date:
+    indice = mes.year * 12 + mes.month - 1 - meses
+    return date(indice // 12, indice % 12 + 1, 1)
+
+
+def _particion(mes: date) -> str:
+    return f"p{mes:%Y%m}"
+
+
+def _mes_de_particion(nombre: str) -> date:
+    return date(int(nombre[1:5]), int(nombre[5:7]), 1)
+
+
+# ---------------------------------------------------------
+# MANIFIESTO
+# ---------------------------------------------------------
+_manifiesto = {"mtime": None, "datos": {"meses": []}}
+
+
+def manifiesto() -> dict:
+    """
+    Contenido de manifiesto.json. Se relee solo si cambió su fecha de
+    modificación: cada worker ve los meses que archiva el proceso de mantenimiento.
+    """
+    try:
+        mtime = MANIFIESTO.stat().st_mtime_ns
+    except FileNotFoundError:
+        return {"meses": []}
+    if mtime != _manifiesto["mtime"]:
+        _manifiesto["datos"] = json.loads(MANIFIESTO.read_text(encoding="utf-8"))
+        _manifiesto["mtime"] = mtime
+    return _manifiesto["datos"]
+
+
+def _guardar_manifiesto(datos: dict) -> None:
+    ARCHIVO_DIR.mkdir(parents=True, exist_ok=True)
+    temporal = MANIFIESTO.with_suffix(".tmp")
+    with open(temporal, "w", encoding="utf-8") as archivo:
+        json.dump(datos, archivo, ensure_ascii=False, indent=2)
+        archivo.flush()
+        os.fsync(archivo.fileno())
+    os.replace(temporal, MANIFIESTO)
+
+
+def _archivados() -> List[dict]:
+    return [m for m in manifiesto()["meses"] if m["estado"] == "archivado"]
+
+
+def frontera_lectura() -> Optional[datetime]:
+    """Primer instante que sigue en la base de datos (None si no hay nada archivado)."""
+    archivados = _archivados()
+    return datetime.fromisoformat(archivados[-1]["hasta"]) if archivados else None
+
+
+def fecha_admitida(fecha: Optional[datetime]) -> bool:
+    """False si la fecha cae en un mes archivado o que se está archivando."""
+    meses = manifiesto()["meses"]
+    return fecha is None or not meses or fecha >= datetime.fromisoformat(meses[-1]["hasta"])
+
+
+# ---------------------------------------------------------
+# PARTICIONES
+# ---------------------------------------------------------
+def listar_particiones(conn) -> List[str]:
+    return list(conn.execute(text(
+        "SELECT PARTITION_NAME FROM information_schema.PARTITIONS"
+        " WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'movimiento_libro'"
+        " AND PARTITION_NAME IS NOT NULL ORDER BY PARTITION_ORDINAL_POSITION"
+    )).scalars())
+
+
+def _mensuales(conn) -> List[str]:
+    nombres = listar_particiones(conn)
+    if not nombres or nombres[-1] != PARTICION_ABIERTA:
+        raise RuntimeError("movimiento_libro no está particionada: ejecutá `python migraciones.py`")
+    return nombres[:-1]
+
+
+def preparar(engine, meses_adelante: int = MESES_ADELANTE) -> List[str]:
+    """
+    Crea las particiones mensuales que falten hasta `meses_adelante` meses
+    después del actual. Devuelve los nombres creados.
+    """
+    with engine.connect() as conn:
+        mensuales = _mensuales(conn)
+        if mensuales:
+            mes = _mes_siguiente(_mes_de_particion(mensuales[-1]))
+        else:
+            primera = conn.execute(select(func.min(MovimientoLibro.fecha_movimiento))).scalar()
+            mes = _mes(primera or datetime.now())
+        ultimo = _mes(datetime.now())
+        for _ in range(meses_adelante):
+            ultimo = _mes_siguiente(ultimo)
+
+        nuevos = []
+        while mes <= ultimo:
+            nuevos.append(mes)
+            mes = _mes_siguiente(mes)
+        if not nuevos:
+            return []
+        # Partir la partición abierta solo mueve sus filas: vacía, es instantáneo
+        definiciones = ", ".join(
+            f"PARTITION {_particion(m)} VALUES LESS THAN ('{_mes_siguiente(m):%Y-%m-%d} 00:00:00')"
+            for m in nuevos
+        )
+        conn.exec_driver_sql(
+            f"ALTER TABLE movimiento_libro REORGANIZE PARTITION {PARTICION_ABIERTA} INTO "
+            f"({definiciones}, PARTITION {PARTICION_ABIERTA} VALUES LESS THAN (MAXVALUE))"
+        )
+        return [_particion(m) for m in nuevos]
+
+
+# ---------------------------------------------------------
+# ARCHIVO
+# ---------------------------------------------------------
+def _plano(valor):
+    if isinstance(valor, datetime):
+        return valor.isoformat()
+    if isinstance(valor, enum.Enum):
+        return valor.value
+    if isinstance(valor, Decimal):
+        return str(valor)
+    return valor
+
+
+def _sha256(ruta: Path) -> str:
+    resumen = hashlib.sha256()
+    with open(ruta, "rb") as archivo:
+        for bloque in iter(lambda: archivo.read(1024 * 1024), b""):
+            resumen.update(bloque)
+    return resumen.hexdigest()
+
+
+def _archivar_particion(conn, nombre: str) -> dict:
+    mes = _mes_de_particion(nombre)
+    hasta = _mes_siguiente(mes)
+    datos = manifiesto()
+    entrada = next((m for m in datos["meses"] if m["mes"] == f"{mes:%Y-%m}"), None)
+    if entrada is None:
+        entrada = {"mes": f"{mes:%Y-%m}", "hasta": datetime.combine(hasta, datetime.min.time()).isoformat()}
+        datos["meses"].append(entrada)
+    # Primero se corre la frontera: desde aquí no se aceptan movimientos de este mes
+    entrada["estado"] = "archivando"
+    _guardar_manifiesto(datos)
+    ruta = ARCHIVO_DIR / f"movimientos_{mes:%Y-%m}.ndjson.gz"
+
+    for _ in range(INTENTOS_ARCHIVO):
+        filas, desde, tramos = _escribir_archivo(conn, ruta, hasta)
+        # Una escritura que leyó el manifiesto antes del cambio pudo hacer commit
+        # durante el volcado. LOCK TABLES espera a las transacciones que escriben
+        # en el libro mayor y el conteo (fuera de la instantánea del volcado) las
+        # ve; nada escribe entre el conteo y el DROP.
+        conn.rollback()
+        conn.exec_driver_sql("LOCK TABLES movimiento_libro WRITE")
+        try:
+            en_bd = conn.execute(
+                select(func.count()).select_from(MovimientoLibro).where(MovimientoLibro.fecha_movimiento < hasta)
+            ).scalar()
+            if en_bd != filas:
+                continue
+            entrada.update({
+                "estado": "archivado",
+                "desde": (min(desde, datetime.combine(mes, datetime.min.time())) if desde
+                          else datetime.combine(mes, datetime.min.time())).isoformat(),
+                "archivo": ruta.name,
+                "filas": filas,
+                "tramos": tramos,
+                "sha256": _sha256(ruta),
+                "archivado_en": datetime.now().isoformat(timespec="seconds"),
+            })
+            _guardar_manifiesto(datos)
+            # Desde aquí las lecturas usan el archivo (la frontera excluye este mes de la BD)
+            conn.exec_driver_sql(f"ALTER TABLE movimiento_libro DROP PARTITION {nombre}")
+            return entrada
+        finally:
+            conn.exec_driver_sql("UNLOCK TABLES")
+            conn.rollback()
+    raise RuntimeError(
+        f"{nombre}: siguen entrando movimientos del mes ({en_bd} filas en la BD, {filas} archivadas); "
+        "la partición no se borró"
+    )
+
+
+def _escribir_archivo(conn, ruta: Path, hasta: date) -> Tuple[int, Optional[datetime], List[dict]]:
+    """
+    Vuelca la partición (todo lo anterior a `hasta`) en `ruta` por tramos.
+    Devuelve (filas, primera fecha, tramos).
+    """
+    # Las particiones anteriores ya no existen: "< hasta" es exactamente esta partición
+    stmt = (
+        select(*_COLUMNAS_ARCHIVO)
+        .select_from(MovimientoLibro)
+        .outerjoin(InventarioLibro, InventarioLibro.id_inventario == MovimientoLibro.inventario_id)
+        .outerjoin(Libro, Libro.id_libro == InventarioLibro.libro_id)
+        .outerjoin(Usuario, Usuario.id_usuario == MovimientoLibro.usuario_id)
+        .outerjoin(PuntoVenta, PuntoVenta.id_punto_venta == MovimientoLibro.punto_venta_id)
+        .where(MovimientoLibro.fecha_movimiento < hasta)
+        .order_by(MovimientoLibro.fecha_movimiento, MovimientoLibro.id_mov_libro)
+    )
+    temporal = ruta.with_suffix(".tmp")
+    filas, desde = 0, None
+    tramos: List[dict] = []
+    with open(temporal, "wb") as crudo:
+        miembro = None
+        resultado = conn.execution_options(stream_results=True).execute(stmt)
+        for lote in resultado.partitions(TAMANO_LOTE):
+            for fila in lote:
+                desde = desde or fila.fecha_movimiento
+                # Cada tramo es un miembro gzip: se puede descomprimir desde su posición
+                if miembro is None or tramos[-1]["filas"] >= TAMANO_TRAMO:
+                    if miembro is not None:
+                        miembro.close()
+                    tramos.append({
+                        "posicion": crudo.tell(),
+                        "clave": [fila.fecha_movimiento.isoformat(), fila.id_mov_libro],
+                        "filas": 0,
+                    })
+                    miembro = gzip.GzipFile(fileobj=crudo, mode="wb")
+                miembro.write((json.dumps(
+                    {clave: _plano(valor) for clave, valor in fila._mapping.items()}, ensure_ascii=False
+                ) + "\n").encode("utf-8"))
+                tramos[-1]["filas"] += 1
+            filas += len(lote)
+        if miembro is not None:
+            miembro.close()
+        crudo.flush()
+        os.fsync(crudo.fileno())
+    os.replace(temporal, ruta)
+    return filas, desde, tramos
+
+
+def archivar(engine, meses_calientes: int) -> List[dict]:
+    """
+    Archiva, del más antiguo al más nuevo, los meses anteriores a los últimos
+    `meses_calientes` (el mes en curso cuenta como uno). Devuelve las entradas
+    del manifiesto de los meses archivados.
+    """
+    if meses_calientes < 1:
+        raise ValueError("Hay que conservar al menos el mes en curso")
+    corte = _mes_anterior(_mes(datetime.now()), meses_calientes - 1)
+    hechos = []
+    with engine.connect() as conn:
+        conciliado = conn.execute(select(EstadoConciliacion.corte).where(EstadoConciliacion.id == 1)).scalar()
+        conn.rollback()
+        for nombre in _mensuales(conn):
+            mes = _mes_de_particion(nombre)
+            if mes >= corte:
+                break
+            if conciliado is None or datetime.combine(_mes_siguiente(mes), datetime.min.time()) > conciliado:
+                raise RuntimeError(f"{nombre}: la conciliación del stock no llegó al fin del mes (python conciliacion.py)")
+            hechos.append(_archivar_particion(conn, nombre))
+    return hechos
+
+
+# ---------------------------------------------------------
+# LECTURA DEL ARCHIVO
+# ---------------------------------------------------------
+def _tramos(entrada: dict) -> List[dict]:
+    # Archivos anteriores a los tramos: uno solo, desde el principio y hasta el final
+    return entrada.get("tramos") or [{"posicion": 0, "clave": [entrada["desde"], 0], "filas": None}]
+
+
+def _leer(entrada: dict, primero: int = 0, ultimo: Optional[int] = None) -> Iterator[dict]:
+    """
+    Filas de los tramos `primero`..`ultimo` (incluido; None = hasta el final)
+    del mes. Solo se descomprime desde la posición del primero.
+    """
+    tramos = _tramos(entrada)
+    limite = None
+    if ultimo is not None and tramos[0]["filas"] is not None:
+        limite = sum(tramo["filas"] for tramo in tramos[primero:ultimo + 1])
+    with open(ARCHIVO_DIR / entrada["archivo"], "rb") as crudo:
+        crudo.seek(tramos[primero]["posicion"])
+        with gzip.open(crudo, "rt", encoding="utf-8") as archivo:
+            for numero, linea in enumerate(archivo):
+                if limite is not None and numero >= limite:
+                    return
+                fila = json.loads(linea)
+                fila["fecha_movimiento"] = datetime.fromisoformat(fila["fecha_movimiento"])
+                yield fila
+
+
+def _claves(entrada: dict) -> List[Tuple[datetime, int]]:
+    return [(datetime.fromisoformat(t["clave"][0]), t["clave"][1]) for t in _tramos(entrada)]
+
+
+def lotes_archivados(
+    desde: datetime, hasta: datetime, filtro: Callable[[dict], bool], tamano: int = TAMANO_LOTE
+) -> Iterator[List[dict]]:
+    """
+    Filas archivadas con desde <= fecha < hasta que cumplen `filtro`, en
+    orden cronológico y por lotes. Solo abre los meses que tocan el rango.
+    """
+    for entrada in _archivados():
+        if datetime.fromisoformat(entrada["hasta"]) <= desde or datetime.fromisoformat(entrada["desde"]) >= hasta:
+            continue
+        lote = []
+        # Primer tramo que puede tener filas desde `desde`
+        primero = max(bisect_left(_claves(entrada), (desde, 0)) - 1, 0)
+        for fila in _leer(entrada, primero):
+            if fila["fecha_movimiento"] < desde:
+                continue
+            if fila["fecha_movimiento"] >= hasta:
+                break
+            if filtro(fila):
+                lote.append(fila)
+                if len(lote) >= tamano:
+                    yield lote
+                    lote = []
+        if lote:
+            yield lote
+
+
+def pagina_archivada(antes_de: Optional[Tuple[datetime, int]], cantidad: int, tipo: Optional[str] = None) -> List[dict]:
+    """
+    Hasta `cantidad` filas archivadas anteriores a la clave (fecha, id), de la
+    más nueva a la más vieja (el orden del listado paginado).
+    """
+    resultado: List[dict] = []
+    for entrada in reversed(_archivados()):
+        if len(resultado) >= cantidad:
+            break
+        if antes_de and datetime.fromisoformat(entrada["desde"]) > antes_de[0]:
+            continue
+        # Último tramo con filas anteriores al cursor; de ahí hacia atrás, de a uno
+        claves = _claves(entrada)
+        tramo = bisect_left(claves, antes_de) - 1 if antes_de else len(claves) - 1
+        while tramo >= 0 and len(resultado) < cantidad:
+            # Cada tramo está en orden ascendente: se guardan las últimas que sirven
+            ultimas = deque(maxlen=cantidad - len(resultado))
+            for fila in _leer(entrada, tramo, tramo):
+                if antes_de and (fila["fecha_movimiento"], fila["id_mov_libro"]) >= antes_de:
+                    break
+                if tipo is None or fila["tipo"] == tipo:
+                    ultimas.append(fila)
+            resultado.extend(reversed(ultimas))
+            tramo -= 1
+    return resultado
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from database import engine
+
+    parser = argparse.ArgumentParser(description="Particiones mensuales y archivo del libro mayor")
+    parser.add_argument("--archivar", type=int, metavar="MESES",
+                        help="Archiva lo anterior a los últimos MESES meses (incluido el actual)")
+    parser.add_argument("--estado", action="store_true", help="Muestra particiones y meses archivados")
+    args = parser.parse_args()
+
+    if args.estado:
+        with engine.connect() as conexion:
+            print("Particiones:", ", ".join(listar_particiones(conexion)) or "(tabla sin particionar)")
+        for m in manifiesto()["meses"]:
+            print(f"  {m['mes']}: {m['estado']} {m.get('filas', '')} {m.get('archivo', '')}")
+    else:
+        creadas = preparar(engine)
+        print(f"✔ Particiones creadas: {', '.join(creadas) or 'ninguna (ya existían)'}")
+        if args.archivar:
+            for m in archivar(engine, args.archivar):
+                print(f"✔ {m['mes']} archivado en {m['archivo']} ({m['filas']} movimientos)")
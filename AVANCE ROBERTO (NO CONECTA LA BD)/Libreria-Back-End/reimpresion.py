@@ -0,0 +1,147 @@
+"""
+Plan de reimpresión de los títulos con stock bajo según el papel disponible.
+
+Cada libro se imprime en el papel cuya clave `paginas` coincide con su
+`paginas_por_libro`, y cada ejemplar consume esa cantidad de páginas del
+`stock_paginas` del papel.
+
+Se encarga de:
+- Calcular cuántos ejemplares faltan a cada título para llegar a su
+  objetivo (`stock_minimo` × cobertura).
+- Repartir el papel por prioridad: dentro de cada papel, primero los
+  títulos a los que les falta una fracción mayor de su objetivo. Un título
+  recibe todo lo que pide mientras alcance el papel; el primero que no
+  entra recibe los ejemplares completos que quedan, y los siguientes nada.
+- Todo el catálogo en una pasada con arreglos de NumPy (un elemento por
+  libro, agrupados por papel con un orden y una suma acumulada), sin un
+  ciclo de Python por libro: decenas de miles de títulos se planifican en
+  milisegundos.
+
+El plan no escribe nada: lo expone GET /produccion/plan.
+"""
+from typing import Dict, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import select
+
+from models import InventarioLibro, Libro, Papel
+
+
+def consulta_libros():
+    """Títulos con stock bajo (índice de la bandera) y sus páginas por ejemplar."""
+    return (
+        select(
+            Libro.id_libro,
+            Libro.nombre,
+            Libro.paginas_por_libro,
+            InventarioLibro.stock,
+            Libro.stock_minimo,
+        )
+        .select_from(InventarioLibro)
+        .join(Libro, Libro.id_libro == InventarioLibro.libro_id)
+        .where(InventarioLibro.bajo_minimo.is_(True))
+        .order_by(Libro.id_libro)
+    )
+
+
+def consulta_papel():
+    return select(Papel.paginas, Papel.nombre, Papel.stock_paginas).order_by(Papel.paginas)
+
+
+def planificar(
+    paginas_libro: np.ndarray,
+    faltante: np.ndarray,
+    prioridad: np.ndarray,
+    papel_paginas: np.ndarray,
+    papel_stock: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Ejemplares a imprimir de cada libro e índice de su papel (len(papel) si
+    no tiene). `papel_paginas` debe venir ordenado. Mayor `prioridad` = se
+    atiende antes dentro de su papel.
+    """
+    cantidad_papel = len(papel_paginas)
+    papel = np.searchsorted(papel_paginas, paginas_libro)
+    encontrado = papel < cantidad_papel
+    encontrado[encontrado] = papel_paginas[papel[encontrado]] == paginas_libro[encontrado]
+    encontrado &= paginas_libro > 0
+    # Los libros sin papel van a un grupo extra con stock 0
+    papel = np.where(encontrado, papel, cantidad_papel)
+    stock_grupo = np.append(papel_stock, 0)
+
+    demanda = faltante * paginas_libro
+    orden = np.lexsort((-prioridad, papel))
+    grupo = papel[orden]
+    pedido = demanda[orden]
+    # Páginas pedidas por los libros anteriores del mismo papel
+    previas = np.cumsum(pedido) - pedido
+    inicio = np.r_[True, grupo[1:] != grupo[:-1]]
+    previas -= np.maximum.accumulate(np.where(inicio, previas, 0))
+
+    disponibles = np.clip(stock_grupo[grupo] - previas, 0, None)
+    asignadas = np.minimum(pedido, disponibles)
+    ejemplares = np.zeros_like(faltante)
+    por_ejemplar = paginas_libro[orden]
+    ejemplares[orden] = np.where(por_ejemplar > 0, asignadas // np.maximum(por_ejemplar, 1), 0)
+    return ejemplares, papel
+
+
+def armar_plan(libros: Sequence, papeles: Sequence, cobertura: float = 1.0) -> Dict:
+    """Plan completo a partir de las filas de `consulta_libros` y `consulta_papel`."""
+    ids, nombres, paginas, stock, minimo = (list(c) for c in zip(*libros)) if libros else ([],) * 5
+    paginas_libro = np.array([p or 0 for p in paginas], dtype=np.int64)
+    stock = np.array(stock, dtype=np.int64)
+    objetivo = np.ceil(np.array([m or 0 for m in minimo], dtype=np.float64) * cobertura).astype(np.int64)
+    faltante = np.maximum(objetivo - stock, 0)
+    prioridad = faltante / np.maximum(objetivo, 1)
+
+    papel_paginas, papel_nombres, papel_stock = (list(c) for c in zip(*papeles)) if papeles else ([],) * 3
+    papel_paginas = np.array(papel_paginas, dtype=np.int64)
+    papel_stock = np.array(papel_stock, dtype=np.int64)
+
+    ejemplares, papel = planificar(paginas_libro, faltante, prioridad, papel_paginas, papel_stock)
+
+    grupos = len(papel_paginas) + 1
+    pedidas = np.bincount(papel, weights=faltante * paginas_libro, minlength=grupos)[:-1].astype(np.int64)
+    usadas = np.bincount(papel, weights=ejemplares * paginas_libro, minlength=grupos)[:-1].astype(np.int64)
+
+    # Las listas se arman una vez con tolist(): sin conversiones de NumPy por elemento
+    sin_papel = papel == len(papel_paginas)
+    con_faltante = np.flatnonzero((faltante > 0) & ~sin_papel)
+    con_faltante = con_faltante[np.argsort(-prioridad[con_faltante], kind="stable")]
+    columnas = zip(
+        con_faltante.tolist(), paginas_libro[con_faltante].tolist(), stock[con_faltante].tolist(),
+        objetivo[con_faltante].tolist(), faltante[con_faltante].tolist(), ejemplares[con_faltante].tolist(),
+    )
+    return {
+        "cobertura": cobertura,
+        "libros": [
+            {
+                "libro_id": ids[i],
+                "libro": nombres[i],
+                "paginas_por_libro": pag,
+                "stock": st,
+                "objetivo": obj,
+                "faltante": falta,
+                "ejemplares": ej,
+                "paginas": ej * pag,
+                "pendiente": falta - ej,
+            }
+            for i, pag, st, obj, falta, ej in columnas
+        ],
+        "papel": [
+            {
+                "paginas": pag,
+                "nombre": nombre,
+                "stock_paginas": st,
+                "paginas_pedidas": pedida,
+                "paginas_asignadas": usada,
+                "restante": st - usada,
+            }
+            for pag, nombre, st, pedida, usada in zip(
+                papel_paginas.tolist(), papel_nombres, papel_stock.tolist(), pedidas.tolist(), usadas.tolist()
+            )
+        ],
+        # Títulos con stock bajo que no se pueden planificar (sin papel asignado o inexistente)
+        "sin_papel": [ids[i] for i in np.flatnonzero(sin_papel & (faltante > 0)).tolist()],
+    }
@@ -0,0 +1,208 @@
+"""
+Pronóstico de demanda y sugerencias de reposición por tienda (tabla `sugerencia_reposicion`).
+
+Tarea programada: la API solo lee la tabla que deja (GET
+/inventario-pv/reposicion), nunca calcula durante una petición.
+
+Se encarga de:
+- Leer de una vez las ventas de las tiendas de los últimos `--dias` días
+  desde los acumulados diarios (`venta_diaria`, ver acumulados.py), sin
+  recorrer el libro mayor.
+- Estimar la demanda diaria de cada par (tienda, libro) de `inventario_pv`
+  con suavizado exponencial (o media móvil con `--metodo media`) y su
+  desviación. Todo con arreglos de NumPy: cada venta suma su peso al par
+  con `bincount`, sin armar la matriz pares × días (los días sin ventas
+  pesan 0) ni un ciclo de Python por par.
+- Sugerir un mínimo por par (demanda durante el plazo de reposición más un
+  stock de seguridad) y, si el stock está por debajo, la cantidad para
+  llegar al objetivo (plazo + ciclo de revisión).
+- Repartir esa cantidad entre transferir desde el inventario global (lo que
+  sobra del mínimo del libro; primero las tiendas con menos días de
+  cobertura) y pedir el resto.
+- Reemplazar las sugerencias anteriores: INSERT ... ON DUPLICATE KEY UPDATE
+  por lotes y borrado de los pares que ya no tienen demanda.
+
+Uso (desde Libreria-Back-End; conviene programarlo una vez al día, después
+de medianoche):
+    python reposicion.py
+    python reposicion.py --dias 90 --alfa 0.05 --plazo 10
+    python reposicion.py --metodo media --dias 28
+"""
+import math
+from datetime import date, datetime, timedelta
+from typing import Dict
+
+import numpy as np
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.mysql import insert
+from sqlalchemy.orm import Session
+
+from models import InventarioLibro, InventarioPV, Libro, SugerenciaReposicion, VentaDiaria
+
+DIAS = 56
+ALFA = 0.1
+PLAZO_DIAS = 7
+CICLO_DIAS = 7
+# Factor de seguridad: ~95 % de los días sin quiebre con demanda normal
+Z_SERVICIO = 1.65
+TAMANO_LOTE = 1000
+METODOS = ("ewma", "media")
+
+
+def pesos(dias: int, alfa: float, metodo: str) -> np.ndarray:
+    """Peso de cada día (0 = el más antiguo); suman 1."""
+    if metodo == "media":
+        return np.full(dias, 1 / dias)
+    peso = alfa * (1 - alfa) ** np.arange(dias - 1, -1, -1, dtype=np.float64)
+    return peso / peso.sum()
+
+
+def _clave(punto_venta: np.ndarray, libro: np.ndarray) -> np.ndarray:
+    return (punto_venta.astype(np.int64) << 32) | libro.astype(np.int64)
+
+
+def _indice(ordenadas: np.ndarray, buscadas: np.ndarray) -> np.ndarray:
+    # Posición de cada clave buscada en `ordenadas`, o len(ordenadas) si no está
+    indice = np.searchsorted(ordenadas, buscadas)
+    encontrada = indice < len(ordenadas)
+    encontrada[encontrada] = ordenadas[indice[encontrada]] == buscadas[encontrada]
+    return np.where(encontrada, indice, len(ordenadas))
+
+
+def _columnas(filas, tipos):
+    columnas = list(zip(*filas)) if filas else [()] * len(tipos)
+    return [np.array(c, dtype=t) for c, t in zip(columnas, tipos)]
+
+
+def calcular(
+    db: Session,
+    dias: int = DIAS,
+    alfa: float = ALFA,
+    metodo: str = "ewma",
+    plazo: int = PLAZO_DIAS,
+    ciclo: int = CICLO_DIAS,
+) -> Dict[str, np.ndarray]:
+    """Sugerencias de todos los pares de `inventario_pv` como arreglos paralelos."""
+    hoy = date.today()
+    desde = hoy - timedelta(days=dias)
+
+    # Pares ordenados por (tienda, libro): sus claves quedan ordenadas para searchsorted
+    punto_venta, libro, stock, minimo = _columnas(db.execute(
+        select(
+            InventarioPV.id_punto_venta,
+            InventarioPV.id_libro,
+            func.coalesce(InventarioPV.stock, 0),
+            func.coalesce(InventarioPV.stock_minimo, 0),
+        ).order_by(InventarioPV.id_punto_venta, InventarioPV.id_libro)
+    ).all(), (np.int64,) * 4)
+    ventas_pv, ventas_libro, ventas_dia, unidades = _columnas(db.execute(
+        select(
+            VentaDiaria.punto_venta_id,
+            VentaDiaria.libro_id,
+            func.datediff(VentaDiaria.dia, desde),
+            VentaDiaria.unidades,
+        ).where(VentaDiaria.dia >= desde, VentaDiaria.dia < hoy, VentaDiaria.punto_venta_id != 0)
+    ).all(), (np.int64,) * 4)
+    global_libro, global_disponible = _columnas(db.execute(
+        select(
+            InventarioLibro.libro_id,
+            func.greatest(InventarioLibro.stock - func.coalesce(Libro.stock_minimo, 0), 0),
+        )
+        .join(Libro, Libro.id_libro == InventarioLibro.libro_id)
+        .order_by(InventarioLibro.libro_id)
+    ).all(), (np.int64,) * 2)
+    db.rollback()
+
+    # Demanda diaria: media ponderada por día; los días sin ventas aportan 0
+    pares = len(libro)
+    par = _indice(_clave(punto_venta, libro), _clave(ventas_pv, ventas_libro))
+    peso = pesos(dias, alfa, metodo)[ventas_dia] * (par < pares)
+    demanda = np.bincount(par, weights=unidades * peso, minlength=pares + 1)[:pares]
+    cuadrados = np.bincount(par, weights=unidades * unidades * peso, minlength=pares + 1)[:pares]
+    desviacion = np.sqrt(np.maximum(cuadrados - demanda ** 2, 0))
+
+    minimo_sugerido = np.ceil(demanda * plazo + Z_SERVICIO * desviacion * math.sqrt(plazo)).astype(np.int64)
+    horizonte = plazo + ciclo
+    objetivo = np.ceil(demanda * horizonte + Z_SERVICIO * desviacion * math.sqrt(horizonte)).astype(np.int64)
+    cantidad = np.where(stock < minimo_sugerido, np.maximum(objetivo - stock, 0), 0)
+
+    # Transferencias: por libro, las tiendas con menos días de cobertura primero
+    grupo = _indice(global_libro, libro)
+    disponible = np.append(global_disponible, 0)
+    cobertura = stock / np.maximum(demanda, 1e-9)
+    orden = np.lexsort((cobertura, grupo))
+    pedido = cantidad[orden]
+    previas = np.cumsum(pedido) - pedido
+    inicio = np.diff(grupo[orden], prepend=-1) != 0
+    previas -= np.maximum.accumulate(np.where(inicio, previas, 0))
+    transferir = np.zeros_like(cantidad)
+    transferir[orden] = np.minimum(pedido, np.clip(disponible[grupo[orden]] - previas, 0, None))
+
+    return {
+        "punto_venta_id": punto_venta,
+        "libro_id": libro,
+        "demanda_diaria": demanda,
+        "desviacion": desviacion,
+        "stock": stock,
+        "stock_minimo": minimo,
+        "minimo_sugerido": minimo_sugerido,
+        "cantidad": cantidad,
+        "transferir": transferir,
+        "pedir": cantidad - transferir,
+    }
+
+
+def guardar(db: Session, sugerencias: Dict[str, np.ndarray]) -> int:
+    """
+    Reemplaza `sugerencia_reposicion` con los pares que tienen demanda o
+    cantidad a reponer. Devuelve la cantidad de filas escritas.
+    """
+    calculado_en = datetime.now().replace(microsecond=0)
+    con_demanda = np.flatnonzero((sugerencias["demanda_diaria"] > 0) | (sugerencias["cantidad"] > 0))
+    columnas = {nombre: valores[con_demanda].tolist() for nombre, valores in sugerencias.items()}
+    filas = [
+        dict(zip(columnas, valores), calculado_en=calculado_en)
+        for valores in zip(*columnas.values())
+    ]
+    for fila in filas:
+        fila["demanda_diaria"] = round(fila["demanda_diaria"], 3)
+        fila["desviacion"] = round(fila["desviacion"], 3)
+
+    for inicio in range(0, len(filas), TAMANO_LOTE):
+        stmt = insert(SugerenciaReposicion).values(filas[inicio:inicio + TAMANO_LOTE])
+        db.execute(stmt.on_duplicate_key_update({
+            nombre: stmt.inserted[nombre] for nombre in list(columnas)[2:] + ["calculado_en"]
+        }))
+        db.commit()
+    # Lo que no se reescribió en esta corrida quedó sin demanda
+    db.execute(delete(SugerenciaReposicion).where(SugerenciaReposicion.calculado_en < calculado_en))
+    db.commit()
+    return len(filas)
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    from database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Pronóstico de demanda y sugerencias de reposición por tienda")
+    parser.add_argument("--dias", type=int, default=DIAS, help="Días de ventas considerados")
+    parser.add_argument("--metodo", choices=METODOS, default="ewma")
+    parser.add_argument("--alfa", type=float, default=ALFA, help="Suavizado exponencial (0-1)")
+    parser.add_argument("--plazo", type=int, default=PLAZO_DIAS, help="Días hasta que llega la reposición")
+    parser.add_argument("--ciclo", type=int, default=CICLO_DIAS, help="Días entre revisiones")
+    args = parser.parse_args()
+    if args.dias < 1 or not 0 < args.alfa < 1:
+        parser.error("--dias debe ser positivo y --alfa estar entre 0 y 1")
+
+    sesion = SessionLocal()
+    try:
+        inicio = time.perf_counter()
+        sugerencias = calcular(sesion, args.dias, args.alfa, args.metodo, args.plazo, args.ciclo)
+        calculo = time.perf_counter() - inicio
+        filas = guardar(sesion, sugerencias)
+        print(f"✔ {len(sugerencias['libro_id'])} pares analizados en {calculo:.2f} s, "
+              f"{filas} sugerencias guardadas ({int((sugerencias['cantidad'] > 0).sum())} a reponer)")
+    finally:
+        sesion.close()
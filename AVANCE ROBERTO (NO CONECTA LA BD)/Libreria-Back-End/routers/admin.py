@@ -0,0 +1,74 @@
+"""
+Router del panel de administración.
+
+Expone:
+- GET /admin/resumen: totales del panel (locales, usuarios, inventarios,
+  títulos con stock, unidades en stock, alertas de stock bajo y ventas del día).
+- GET /admin/cache: aciertos/fallos de la caché del catálogo de este worker.
+
+Todos los totales se calculan en una sola consulta de agregados con
+subconsultas escalares (un único viaje a la BD); las ventas del día salen
+de los acumulados de `venta_diaria`. El resultado se guarda
+unos segundos en memoria. Un lock asegura que, al expirar, solo una
+petición recalcula mientras las demás esperan y reutilizan ese valor.
+"""
+import asyncio
+import time
+from datetime import date, datetime
+
+from fastapi import APIRouter, Depends
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import cache
+from database import get_db_lectura
+from models import InventarioLibro, PuntoVenta, Usuario, VentaDiaria
+from schemas import ResumenAdmin
+
+router = APIRouter(prefix="/admin", tags=["Administración"])
+
+TTL_RESUMEN_SEGUNDOS = 10
+
+_lock_resumen = asyncio.Lock()
+_cache_resumen = {"valor": None, "expira": 0.0}
+
+
+def _consulta_resumen():
+    hoy = date.today()
+    return select(
+        select(func.count()).select_from(PuntoVenta).scalar_subquery().label("puntos_venta"),
+        select(func.count()).select_from(Usuario).scalar_subquery().label("usuarios"),
+        select(func.count()).select_from(InventarioLibro).scalar_subquery().label("inventarios"),
+        select(func.count(func.distinct(InventarioLibro.libro_id)))
+        .where(InventarioLibro.stock > 0)
+        .scalar_subquery().label("libros_en_stock"),
+        select(func.coalesce(func.sum(InventarioLibro.stock), 0))
+        .scalar_subquery().label("unidades_en_stock"),
+        select(func.count())
+        .select_from(InventarioLibro)
+        .where(InventarioLibro.bajo_minimo.is_(True))
+        .scalar_subquery().label("stock_bajo"),
+        select(func.coalesce(func.sum(VentaDiaria.unidades), 0))
+        .where(VentaDiaria.dia == hoy)
+        .scalar_subquery().label("ventas_hoy_unidades"),
+        select(func.coalesce(func.sum(VentaDiaria.importe), 0))
+        .where(VentaDiaria.dia == hoy)
+        .scalar_subquery().label("ventas_hoy_importe"),
+    )
+
+
+# Resumen global del panel de administración
+@router.get("/resumen", response_model=ResumenAdmin)
+async def resumen_admin(db: AsyncSession = Depends(get_db_lectura)):
+    async with _lock_resumen:
+        if _cache_resumen["valor"] is None or time.monotonic() >= _cache_resumen["expira"]:
+            fila = (await db.execute(_consulta_resumen())).one()
+            _cache_resumen["valor"] = ResumenAdmin(**fila._mapping, generado_en=datetime.now())
+            _cache_resumen["expira"] = time.monotonic() + TTL_RESUMEN_SEGUNDOS
+        return _cache_resumen["valor"]
+
+
+# Estadísticas de la caché del catálogo (por proceso)
+@router.get("/cache")
+async def estadisticas_cache():
+    return cache.estadisticas()
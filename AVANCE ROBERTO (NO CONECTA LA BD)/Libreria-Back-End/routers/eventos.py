@@ -0,0 +1,30 @@
+"""
+Router de eventos en vivo.
+
+Expone:
+- GET /eventos/stock?pv=<id>: flujo Server-Sent Events con los cambios de
+  stock de un punto de venta (pv=0, por defecto: inventario global). Cada
+  evento es `{"id_inventario": .., "stock": ..}`; las pantallas actualizan
+  esa fila en lugar de volver a pedir todo el listado (ver eventos_stock.py).
+
+Este router se monta con el prefijo `/eventos` y la etiqueta "Eventos".
+"""
+from fastapi import APIRouter, Query
+from fastapi.responses import StreamingResponse
+
+from eventos_stock import CANAL_GLOBAL, difusor_stock
+
+# Router de eventos
+router = APIRouter(prefix="/eventos", tags=["Eventos"])
+
+# Cambios de stock en vivo (no usa sesión de BD: la conexión queda abierta)
+@router.get("/stock")
+async def eventos_stock(
+    pv: int = Query(CANAL_GLOBAL, ge=0, description="ID del punto de venta (0 = inventario global)")
+):
+    return StreamingResponse(
+        difusor_stock.suscribir(pv),
+        media_type="text/event-stream",
+        # Sin caché ni buffer en proxies (nginx): cada evento sale apenas se publica
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -3,108 +3,228 @@ Router de inventario de libros.
 
 Expone endpoints para:
 - Crear inventario para un libro específico.
-- Listar inventario de todos los libros (con filtro opcional por nombre).
+- Listar inventario de todos los libros con título, autor y mínimo del libro
+  (con búsqueda opcional por título/autor, paginado por cursor o en NDJSON).
+  Es una sola consulta con join que proyecta columnas: no hidrata entidades
+  ni dispara cargas perezosas de `libro`.
 - Obtener el stock de un libro concreto.
+- Obtener el stock que tenía un libro a una fecha (punto de control + los
+  movimientos hasta ella, ver conciliacion.py).
 - Ajustar el stock (sumar/restar).
 - Fijar el stock a un valor absoluto.
+  Ambos son un único UPDATE condicional (ver stock.py): la fila queda
+  bloqueada solo desde esa sentencia hasta el commit. La diferencia queda
+  en el libro mayor como movimiento "ajuste" en la misma transacción, y el
+  nuevo stock se publica en GET /eventos/stock tras el commit.
+- Listar las alertas de stock bajo (lectura por índice de la bandera `bajo_minimo`).
+- Listar los inventarios cuyo stock no coincide con el libro mayor (los
+  detecta la conciliación periódica).
 
 Este router se monta con el prefijo `/inventario` y la etiqueta "Inventario".
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from typing import List, Optional
-from database import get_db
-from models import InventarioLibro, Libro
-from schemas import InventarioOut, AjusteStock, FijarStock
+from datetime import datetime
+from database import get_db, get_db_lectura
+from models import DescuadreStock, InventarioLibro, Libro
+from schemas import InventarioOut, InventarioDetalleOut, AjusteStock, FijarStock
+from stock_bajo import consulta_alertas_globales, esta_bajo
+from stock import fijar_stock_global, registrar_ajuste, sumar_stock_global
+from conciliacion import stock_al
+from eventos_stock import CANAL_GLOBAL, difusor_stock
+from seguridad import Sesion, sesion_opcional
+from busqueda import consulta_relevancia
+from cache import libro_cacheado
+from paginacion import (
+    LIMITE_MAXIMO, LIMITE_POR_DEFECTO, decodificar_cursor, filtro_keyset, paginar, respuesta_ndjson,
+    respuesta_ndjson_vacia
+)
+from serializacion import respuesta_filas
 
 # Router de inventario
 router = APIRouter(prefix="/inventario", tags=["Inventario"])
 
+# Columnas proyectadas del listado (sin hidratar objetos ORM)
+_COLUMNAS_LISTADO = (
+    InventarioLibro.id_inventario,
+    InventarioLibro.libro_id,
+    InventarioLibro.stock,
+    InventarioLibro.bajo_minimo,
+    InventarioLibro.updated_at,
+    Libro.nombre.label("libro"),
+    Libro.autor,
+    Libro.stock_minimo,
+)
+
 # Crear inventario para un libro específico
 @router.post("/{libro_id}", response_model=InventarioOut, status_code=status.HTTP_201_CREATED)
-def crear_inventario_para_libro(libro_id: int, db: Session = Depends(get_db)):
-    libro = db.query(Libro).get(libro_id)
+async def crear_inventario_para_libro(libro_id: int, db: AsyncSession = Depends(get_db)):
+    libro = await libro_cacheado(db, libro_id)
     if not libro:
         raise HTTPException(status_code=404, detail="Libro no existe")
-    inv = db.query(InventarioLibro).filter_by(libro_id=libro_id).first()
+    inv = await db.scalar(select(InventarioLibro).filter_by(libro_id=libro_id).limit(1))
     if inv:
         return inv
-    inv = InventarioLibro(libro_id=libro_id, stock=0)
+    inv = InventarioLibro(libro_id=libro_id, stock=0, bajo_minimo=esta_bajo(0, libro["stock_minimo"]))
     db.add(inv)
-    db.commit()
-    db.refresh(inv)
+    await db.commit()
+    await db.refresh(inv)
     return inv
 
 # Listar inventario de todos los libros
-@router.get("/", response_model=List[InventarioOut])
-def listar_inventario(
-    q: Optional[str] = Query(None, description="Filtra por nombre de libro"),
-    db: Session = Depends(get_db)
+@router.get("/", response_model=List[InventarioDetalleOut])
+async def listar_inventario(
+    response: Response,
+    q: Optional[str] = Query(None, description="Busca en título, autor, categoría y descripción, ordenado por relevancia"),
+    after: Optional[str] = Query(None, description="Cursor devuelto en X-Next-Cursor"),
+    limit: int = Query(LIMITE_POR_DEFECTO, ge=1, le=LIMITE_MAXIMO),
+    formato: str = Query("json", pattern="^(json|ndjson)$"),
+    db: AsyncSession = Depends(get_db_lectura)
 ):
-    query = db.query(InventarioLibro).join(Libro, InventarioLibro.libro_id == Libro.id_libro)
+    # Las columnas de orden van en la proyección para poder armar el cursor
+    stmt = (
+        select(*_COLUMNAS_LISTADO)
+        .join(Libro, InventarioLibro.libro_id == Libro.id_libro)
+    )
+    orden, tipos, descendente = [Libro.nombre, InventarioLibro.id_inventario], [str, int], False
     if q:
-        query = query.filter(Libro.nombre.ilike(f"%{q}%"))
-    return query.order_by(Libro.nombre.asc()).all()
+        relevancia = consulta_relevancia(q)
+        if relevancia is None:
+            return respuesta_ndjson_vacia() if formato == "ndjson" else []
+        stmt = (
+            stmt.join(relevancia, relevancia.c.libro_id == Libro.id_libro)
+            .add_columns(relevancia.c.relevancia)
+        )
+        orden, tipos, descendente = [relevancia.c.relevancia, InventarioLibro.id_inventario], [int, int], True
+    if after:
+        stmt = stmt.where(filtro_keyset(orden, decodificar_cursor(after, tipos), descendente))
+    stmt = stmt.order_by(*[c.desc() if descendente else c.asc() for c in orden])
+    if formato == "ndjson":
+        return respuesta_ndjson(stmt, InventarioDetalleOut, proyectada=True, motor=db.bind)
+    clave = "relevancia" if q else "libro"
+    filas = await paginar(
+        db, stmt, limit, response, lambda fila: [fila._mapping[clave], fila.id_inventario]
+    )
+    return respuesta_filas(filas, InventarioDetalleOut, response)
 
-# Obtener el stock de un libro concreto
-@router.get("/{libro_id}", response_model=InventarioOut)
-def obtener_stock(libro_id: int, db: Session = Depends(get_db)):
-    inv = db.query(InventarioLibro).filter_by(libro_id=libro_id).first()
-    if not inv:
-        raise HTTPException(status_code=404, detail="Inventario no encontrado para ese libro")
-    return inv
+# Alertas de stock bajo del inventario global
+# (declarada antes de /{libro_id} para que "stock-bajo" no se tome como un id)
+@router.get("/stock-bajo")
+async def inventario_stock_bajo(db: AsyncSession = Depends(get_db_lectura)):
+    """
+    Devuelve libros cuyo stock actual es menor al stock mínimo configurado.
+    """
+    resultados = (await db.execute(consulta_alertas_globales())).all()
 
-# Ajustar el stock (sumar/restar)
-@router.post("/{libro_id}/ajustar", response_model=InventarioOut)
-def ajustar_stock(libro_id: int, payload: AjusteStock, db: Session = Depends(get_db)):
-    # bloquea fila para evitar carreras
-    inv = db.query(InventarioLibro).with_for_update().filter_by(libro_id=libro_id).first()
-    if not inv:
-        raise HTTPException(status_code=404, detail="Inventario no encontrado")
-    nuevo = inv.stock + payload.delta
-    if nuevo < 0:
-        raise HTTPException(status_code=400, detail="El ajuste dejaría stock negativo")
-    inv.stock = nuevo
-    db.commit()
-    db.refresh(inv)
-    return inv
+    resp = []
+    for row in resultados:
+        resp.append({
+            "id_inventario": row.id_inventario,
+            "libro": row.libro,
+            "stock": row.stock,
+            "stock_minimo": row.stock_minimo
+        })
 
-# Fijar el stock a un valor absoluto
-@router.put("/{libro_id}/fijar", response_model=InventarioOut)
-def fijar_stock(libro_id: int, payload: FijarStock, db: Session = Depends(get_db)):
-    inv = db.query(InventarioLibro).with_for_update().filter_by(libro_id=libro_id).first()
-    if not inv:
-        raise HTTPException(status_code=404, detail="Inventario no encontrado")
-    inv.stock = payload.stock
-    db.commit()
-    db.refresh(inv)
-    return inv
+    return resp
 
-@router.get("/stock-bajo")
-def inventario_stock_bajo(db: Session = Depends(get_db)):
+# Inventarios descuadrados con el libro mayor
+@router.get("/descuadres")
+async def inventario_descuadres(db: AsyncSession = Depends(get_db_lectura)):
     """
-    Devuelve libros cuyo stock actual es menor al stock mínimo configurado.
+    Devuelve los inventarios cuyo stock registrado no coincide con el que da
+    el libro mayor, según la última conciliación (python conciliacion.py).
     """
-    resultados = (
-        db.query(
-            Libro.nombre.label("libro"),
-            InventarioLibro.stock,
-            Libro.stock_minimo
-        )
+    resultados = await db.execute(
+        select(DescuadreStock, InventarioLibro.libro_id, Libro.nombre.label("libro"))
+        .join(InventarioLibro, InventarioLibro.id_inventario == DescuadreStock.inventario_id)
         .join(Libro, Libro.id_libro == InventarioLibro.libro_id)
-        .filter(InventarioLibro.stock < Libro.stock_minimo)
-        .all()
+        .order_by(DescuadreStock.detectado_en)
     )
 
     resp = []
     for row in resultados:
+        d = row.DescuadreStock
         resp.append({
+            "id_inventario": d.inventario_id,
+            "libro_id": row.libro_id,
             "libro": row.libro,
-            "stock": row.stock,
-            "stock_minimo": row.stock_minimo
+            "stock_registrado": d.stock_registrado,
+            "stock_libro_mayor": d.stock_libro_mayor,
+            "diferencia": d.stock_registrado - d.stock_libro_mayor,
+            "detectado_en": d.detectado_en
         })
 
     return resp
 
+# Obtener el stock de un libro concreto
+@router.get("/{libro_id}", response_model=InventarioOut)
+async def obtener_stock(libro_id: int, db: AsyncSession = Depends(get_db_lectura)):
+    inv = await db.scalar(select(InventarioLibro).filter_by(libro_id=libro_id).limit(1))
+    if not inv:
+        raise HTTPException(status_code=404, detail="Inventario no encontrado para ese libro")
+    return inv
+
+# Obtener el stock de un libro a una fecha
+@router.get("/{libro_id}/stock-al")
+async def obtener_stock_al(
+    libro_id: int,
+    fecha: datetime = Query(..., description="Instante consultado (cuentan los movimientos anteriores)"),
+    db: AsyncSession = Depends(get_db_lectura)
+):
+    id_inventario = await db.scalar(select(InventarioLibro.id_inventario).filter_by(libro_id=libro_id))
+    if not id_inventario:
+        raise HTTPException(status_code=404, detail="Inventario no encontrado para ese libro")
+    try:
+        return await db.run_sync(stock_al, id_inventario, fecha)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+# Ajustar el stock (sumar/restar)
+@router.post("/{libro_id}/ajustar", response_model=InventarioOut)
+async def ajustar_stock(
+    libro_id: int,
+    payload: AjusteStock,
+    sesion: Optional[Sesion] = Depends(sesion_opcional),
+    db: AsyncSession = Depends(get_db)
+):
+    # Suma y control de stock negativo en la misma sentencia, sin leer antes
+    condicion = InventarioLibro.libro_id == libro_id
+    stock = await sumar_stock_global(db, condicion, payload.delta)
+    if stock is None:
+        await db.rollback()
+        if not await db.scalar(select(InventarioLibro.id_inventario).where(condicion)):
+            raise HTTPException(status_code=404, detail="Inventario no encontrado")
+        raise HTTPException(status_code=400, detail="El ajuste dejaría stock negativo")
+    await registrar_ajuste(
+        db, condicion, payload.delta, sesion.id_usuario if sesion else None, "Ajuste de stock"
+    )
+    await db.commit()
+    inv = await db.scalar(select(InventarioLibro).where(condicion))
+    difusor_stock.publicar(CANAL_GLOBAL, inv.id_inventario, stock)
+    return inv
+
+# Fijar el stock a un valor absoluto
+@router.put("/{libro_id}/fijar", response_model=InventarioOut)
+async def fijar_stock(
+    libro_id: int,
+    payload: FijarStock,
+    sesion: Optional[Sesion] = Depends(sesion_opcional),
+    db: AsyncSession = Depends(get_db)
+):
+    condicion = InventarioLibro.libro_id == libro_id
+    anterior = await fijar_stock_global(db, condicion, payload.stock)
+    if anterior is None:
+        await db.rollback()
+        raise HTTPException(status_code=404, detail="Inventario no encontrado")
+    # La diferencia va al libro mayor: sin ella el stock y los movimientos se descuadran
+    await registrar_ajuste(
+        db, condicion, payload.stock - anterior, sesion.id_usuario if sesion else None,
+        f"Stock fijado en {payload.stock}"
+    )
+    await db.commit()
+    inv = await db.scalar(select(InventarioLibro).where(condicion))
+    difusor_stock.publicar(CANAL_GLOBAL, inv.id_inventario, payload.stock)
+    return inv
@@ -0,0 +1,250 @@
+"""
+Router de inventario por punto de venta (tabla `inventario_pv`).
+
+Expone endpoints para:
+- Asignar un libro al inventario de un punto de venta.
+- Listar el inventario de un punto de venta (con búsqueda y paginación por cursor).
+- Registrar una venta en un punto de venta.
+- Listar las alertas de stock bajo por tienda.
+- Leer las sugerencias de reposición por tienda (mínimo sugerido, cantidad
+  a transferir desde el inventario global y a pedir). Las calcula la tarea
+  programada reposicion.py; el endpoint solo lee su tabla por clave primaria.
+
+La venta es el camino caliente de las tiendas y se resuelve en una
+transacción corta:
+- Un SELECT sin bloqueo por clave primaria para obtener libro, tienda e
+  inventario global asociado (el libro mayor identifica el libro por su
+  inventario global, ver stock.py; si el libro no tiene uno se crea con
+  stock 0, igual que al asignarlo a una tienda).
+- Un UPDATE condicional `stock = stock - n WHERE stock >= n` que también
+  recalcula la bandera `bajo_minimo` y devuelve el stock resultante (ver
+  stock.py): el bloqueo de la fila dura solo ese UPDATE, el INSERT del
+  movimiento y el commit.
+- El INSERT del movimiento `venta` con el punto de venta, la suma a los
+  acumulados diarios de ventas, y el commit.
+
+Tras el commit, el nuevo stock se publica en el canal de la tienda de
+GET /eventos/stock (ver eventos_stock.py): las demás cajas lo ven sin volver
+a pedir el listado.
+
+El stock de las tiendas es independiente del inventario global (almacén
+central): la venta descuenta solo `inventario_pv` y el movimiento queda
+marcado con `punto_venta_id`.
+
+Este router se monta con el prefijo `/inventario-pv`.
+"""
+
+from datetime import datetime
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy import literal, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from busqueda import consulta_relevancia
+from database import get_db, get_db_lectura
+from models import InventarioLibro, InventarioPV, Libro, MovimientoLibro, PuntoVenta, SugerenciaReposicion, Usuario
+from cache import libro_cacheado, punto_venta_cacheado
+from paginacion import LIMITE_MAXIMO, LIMITE_POR_DEFECTO, decodificar_cursor, filtro_keyset, paginar
+from stock_bajo import consulta_alertas_pv, esta_bajo
+from acumulados import acumular_ventas
+from stock import inventario_global_de, sumar_stock_pv
+from eventos_stock import difusor_stock
+from schemas import InventarioPVCreate, InventarioPVOut, VentaPV, VentaPVOut
+from serializacion import respuesta_filas
+from seguridad import Sesion, sesion_opcional
+
+router = APIRouter(prefix="/inventario-pv", tags=["Inventario por punto de venta"])
+
+# Columnas proyectadas del listado (sin hidratar objetos ORM)
+_COLUMNAS_LISTADO = (
+    InventarioPV.id_inventario,
+    InventarioPV.id_libro,
+    InventarioPV.id_punto_venta,
+    Libro.nombre.label("libro"),
+    PuntoVenta.nombre.label("punto_venta"),
+    InventarioPV.stock,
+    InventarioPV.stock_minimo,
+)
+
+
+# Asignar un libro al inventario de un punto de venta
+@router.post("/", response_model=InventarioPVOut, status_code=status.HTTP_201_CREATED)
+async def crear_inventario_pv(payload: InventarioPVCreate, db: AsyncSession = Depends(get_db)):
+    libro = await libro_cacheado(db, payload.id_libro)
+    if not libro:
+        raise HTTPException(status_code=404, detail="Libro no existe")
+    punto_venta = await punto_venta_cacheado(db, payload.id_punto_venta)
+    if not punto_venta:
+        raise HTTPException(status_code=404, detail="Punto de venta no existe")
+
+    # Las ventas de la tienda se registran contra el inventario global del libro
+    await inventario_global_de(db, payload.id_libro)
+    inv = InventarioPV(**payload.model_dump(), bajo_minimo=esta_bajo(payload.stock, payload.stock_minimo))
+    db.add(inv)
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="El libro ya está en el inventario de ese punto de venta")
+    return InventarioPVOut(
+        id_inventario=inv.id_inventario,
+        id_libro=inv.id_libro,
+        id_punto_venta=inv.id_punto_venta,
+        libro=libro["nombre"],
+        punto_venta=punto_venta["nombre"],
+        stock=inv.stock,
+        stock_minimo=inv.stock_minimo
+    )
+
+
+# Listar el inventario de un punto de venta
+@router.get("/", response_model=List[InventarioPVOut])
+async def listar_inventario_pv(
+    response: Response,
+    pv: int = Query(..., description="ID del punto de venta"),
+    q: Optional[str] = Query(None, description="Busca en título, autor, categoría y descripción, ordenado por relevancia"),
+    after: Optional[str] = Query(None, description="Cursor devuelto en X-Next-Cursor"),
+    limit: int = Query(LIMITE_POR_DEFECTO, ge=1, le=LIMITE_MAXIMO),
+    db: AsyncSession = Depends(get_db_lectura)
+):
+    # El filtro por tienda usa el índice (id_punto_venta, id_libro)
+    stmt = (
+        select(*_COLUMNAS_LISTADO)
+        .join(Libro, Libro.id_libro == InventarioPV.id_libro)
+        .join(PuntoVenta, PuntoVenta.id_punto_venta == InventarioPV.id_punto_venta)
+        .where(InventarioPV.id_punto_venta == pv)
+    )
+    orden, tipos, descendente = [Libro.nombre, InventarioPV.id_inventario], [str, int], False
+    if q:
+        relevancia = consulta_relevancia(q)
+        if relevancia is None:
+            return []
+        stmt = (
+            stmt.join(relevancia, relevancia.c.libro_id == InventarioPV.id_libro)
+            .add_columns(relevancia.c.relevancia)
+        )
+        orden, tipos, descendente = [relevancia.c.relevancia, InventarioPV.id_inventario], [int, int], True
+    if after:
+        stmt = stmt.where(filtro_keyset(orden, decodificar_cursor(after, tipos), descendente))
+    stmt = stmt.order_by(*[c.desc() if descendente else c.asc() for c in orden])
+    clave = "relevancia" if q else "libro"
+    filas = await paginar(db, stmt, limit, response, lambda fila: [fila._mapping[clave], fila.id_inventario])
+    return respuesta_filas(filas, InventarioPVOut, response)
+
+
+# Alertas de stock bajo por tienda (todas, o solo las de `pv`)
+@router.get("/stock-bajo")
+async def inventario_pv_stock_bajo(
+    pv: Optional[int] = Query(None, description="ID del punto de venta"),
+    db: AsyncSession = Depends(get_db_lectura)
+):
+    resultados = (await db.execute(consulta_alertas_pv(pv))).all()
+    return [dict(row._mapping) for row in resultados]
+
+
+# Sugerencias de reposición de una tienda (calculadas por la tarea programada)
+@router.get("/reposicion")
+async def inventario_pv_reposicion(
+    response: Response,
+    pv: int = Query(..., description="ID del punto de venta"),
+    solo_reponer: bool = Query(True, description="Solo los libros con cantidad a reponer"),
+    after: Optional[str] = Query(None, description="Cursor devuelto en X-Next-Cursor"),
+    limit: int = Query(LIMITE_POR_DEFECTO, ge=1, le=LIMITE_MAXIMO),
+    db: AsyncSession = Depends(get_db_lectura)
+):
+    # Recorre la clave primaria (punto_venta_id, libro_id): costo proporcional a la página
+    stmt = (
+        select(
+            SugerenciaReposicion.libro_id,
+            Libro.nombre.label("libro"),
+            SugerenciaReposicion.demanda_diaria,
+            SugerenciaReposicion.desviacion,
+            SugerenciaReposicion.stock,
+            SugerenciaReposicion.stock_minimo,
+            SugerenciaReposicion.minimo_sugerido,
+            SugerenciaReposicion.cantidad,
+            SugerenciaReposicion.transferir,
+            SugerenciaReposicion.pedir,
+            SugerenciaReposicion.calculado_en,
+        )
+        .join(Libro, Libro.id_libro == SugerenciaReposicion.libro_id)
+        .where(SugerenciaReposicion.punto_venta_id == pv)
+    )
+    if solo_reponer:
+        stmt = stmt.where(SugerenciaReposicion.cantidad > 0)
+    if after:
+        stmt = stmt.where(filtro_keyset([SugerenciaReposicion.libro_id], decodificar_cursor(after, [int])))
+    stmt = stmt.order_by(SugerenciaReposicion.libro_id)
+    filas = await paginar(db, stmt, limit, response, lambda fila: [fila.libro_id])
+    return [dict(fila._mapping) for fila in filas]
+
+
+# Registrar una venta en un punto de venta
+@router.post("/{id_inventario}/vender", response_model=VentaPVOut)
+async def vender_pv(
+    id_inventario: int,
+    payload: Optional[VentaPV] = None,
+    sesion: Optional[Sesion] = Depends(sesion_opcional),
+    db: AsyncSession = Depends(get_db)
+):
+    payload = payload or VentaPV()  # sin cuerpo = vender una unidad
+    # El vendedor es el de la sesión salvo que el cuerpo indique otro
+    usuario_id = payload.usuario_id or (sesion.id_usuario if sesion else None)
+    # El libro mayor no tiene claves foráneas: el vendedor (también el de la
+    # sesión, que pudo eliminarse después de verificar el token) se valida en
+    # la misma consulta de datos de la fila
+    verificar_usuario = usuario_id is not None
+    usuario_valido = (
+        select(Usuario.id_usuario).where(Usuario.id_usuario == usuario_id).scalar_subquery()
+        if verificar_usuario else literal(usuario_id)
+    )
+
+    # Datos inmutables de la fila: no hace falta bloquear para leerlos
+    info = (
+        await db.execute(
+            select(
+                InventarioPV.id_libro,
+                InventarioPV.id_punto_venta,
+                InventarioLibro.id_inventario.label("inventario_global"),
+                Libro.precio,
+                usuario_valido.label("usuario_valido")
+            )
+            .join(Libro, Libro.id_libro == InventarioPV.id_libro)
+            .outerjoin(InventarioLibro, InventarioLibro.libro_id == InventarioPV.id_libro)
+            .where(InventarioPV.id_inventario == id_inventario)
+            .limit(1)
+        )
+    ).first()
+    if not info:
+        raise HTTPException(status_code=404, detail="Inventario no encontrado")
+    if verificar_usuario and info.usuario_valido is None:
+        raise HTTPException(status_code=400, detail="Usuario no existe")
+    inventario_global = info.inventario_global
+    if inventario_global is None:
+        # Asignado a la tienda antes de que se creara al asignar (fuera del camino habitual)
+        inventario_global = await inventario_global_de(db, info.id_libro)
+
+    # Descuento atómico: solo afecta la fila si queda stock suficiente
+    stock = await sumar_stock_pv(db, id_inventario, -payload.cantidad)
+    if stock is None:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="Stock insuficiente")
+
+    ahora = datetime.now()
+    mov = MovimientoLibro(
+        inventario_id=inventario_global,
+        tipo="venta",
+        cantidad=payload.cantidad,
+        usuario_id=usuario_id,
+        punto_venta_id=info.id_punto_venta,
+        fecha_movimiento=ahora,
+        observaciones="Venta en punto de venta"
+    )
+    db.add(mov)
+    await acumular_ventas(db, [(ahora, info.id_libro, info.id_punto_venta, payload.cantidad, info.precio)])
+    await db.commit()
+    difusor_stock.publicar(info.id_punto_venta, id_inventario, stock)
+
+    return VentaPVOut(id_inventario=id_inventario, stock=stock, id_mov_libro=mov.id_mov_libro)
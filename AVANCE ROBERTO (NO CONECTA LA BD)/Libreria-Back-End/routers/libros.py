@@ -3,7 +3,8 @@ Router para la gestión de libros.
 
 Incluye funcionalidades para:
 - Crear libros
-- Listar todos los libros (con búsqueda opcional)
+- Importar el catálogo desde CSV/NDJSON (ver importacion.py)
+- Listar todos los libros (con búsqueda por relevancia opcional)
 - Obtener un libro por ID
 - Actualizar parcialmente un libro
 - Eliminar un libro
@@ -12,71 +13,145 @@ Cada endpoint usa modelos Pydantic para validación y modelos SQLAlchemy para
 interactuar con la base de datos.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy.orm import Session
+import tempfile
+from anyio import to_thread
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
-from database import SessionLocal
+from database import SessionLocal, get_db, get_db_lectura
 from models import Libro
-from schemas import LibroCreate, LibroUpdate, LibroOut
+from schemas import LibroCreate, LibroUpdate, LibroOut, ResultadoImportacion
+from importacion import FORMATOS, importar
+from busqueda import consulta_relevancia, desindexar_libro, indexar_libro
+from stock_bajo import recalcular_libro
+from cache import cache_libros, libro_cacheado
+from paginacion import (
+    LIMITE_MAXIMO, LIMITE_POR_DEFECTO, decodificar_cursor, filtro_keyset, paginar, respuesta_ndjson,
+    respuesta_ndjson_vacia
+)
+from serializacion import respuesta_filas
 
 # Router de libros
 router = APIRouter(prefix="/libros", tags=["Libros"])
 
-# Dependencia para obtener sesión de DB
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-        
+# Rechazos incluidos en la respuesta de una importación (el total se informa siempre)
+MAX_RECHAZOS_INFORMADOS = 1000
+
+# Campos de LibroOut: el listado se serializa desde columnas, sin entidades ORM
+_COLUMNAS_LISTADO = (
+    Libro.id_libro,
+    Libro.nombre,
+    Libro.autor,
+    Libro.categoria,
+    Libro.descripcion,
+    Libro.precio,
+    Libro.paginas_por_libro,
+    Libro.stock_minimo,
+    Libro.fecha_creacion,
+)
+
 # Crear libros
 @router.post("/", response_model=LibroOut, status_code=status.HTTP_201_CREATED)
-def crear_libro(payload: LibroCreate, db: Session = Depends(get_db)):
+async def crear_libro(payload: LibroCreate, db: AsyncSession = Depends(get_db)):
     libro = Libro(**payload.model_dump())
     db.add(libro)
-    db.commit()
-    db.refresh(libro)
+    await db.flush()  # asigna id_libro para indexarlo en la misma transacción
+    await db.run_sync(indexar_libro, libro)
+    await db.commit()
+    await db.refresh(libro)
     return libro
 
-# Listar todos los libros
+# Importar libros y stock inicial desde un archivo CSV o NDJSON (el cuerpo de la petición)
+@router.post("/importar", response_model=ResultadoImportacion)
+async def importar_libros(
+    request: Request,
+    formato: str = Query("csv", pattern=f"^({'|'.join(FORMATOS)})$")
+):
+    # El cuerpo se vuelca a disco a medida que llega: no se guarda completo en memoria
+    with tempfile.SpooledTemporaryFile(max_size=1024 * 1024) as archivo:
+        async for trozo in request.stream():
+            archivo.write(trozo)
+        archivo.seek(0)
+
+        rechazos = []
+
+        def informar(linea, errores):
+            if len(rechazos) < MAX_RECHAZOS_INFORMADOS:
+                rechazos.append({"linea": linea, "errores": errores})
+
+        def ejecutar():
+            # Validar e insertar es trabajo de CPU y E/S síncrona: va en un hilo
+            with SessionLocal() as sesion:
+                return importar(sesion, archivo, formato, informar)
+
+        totales = await to_thread.run_sync(ejecutar)
+    return {**totales, "rechazos": rechazos}
+
+# Listar libros paginados por cursor (más nuevos primero, o por relevancia si hay q)
 @router.get("/", response_model=List[LibroOut])
-def listar_libros(
-    q: Optional[str] = Query(None, description="Filtra por nombre que contenga q"),
-    db: Session = Depends(get_db)
+async def listar_libros(
+    response: Response,
+    q: Optional[str] = Query(None, description="Busca en título, autor, categoría y descripción, ordenado por relevancia"),
+    after: Optional[str] = Query(None, description="Cursor devuelto en X-Next-Cursor"),
+    limit: int = Query(LIMITE_POR_DEFECTO, ge=1, le=LIMITE_MAXIMO),
+    formato: str = Query("json", pattern="^(json|ndjson)$"),
+    db: AsyncSession = Depends(get_db_lectura)
 ):
-    query = db.query(Libro)
+    stmt = select(*_COLUMNAS_LISTADO)
+    orden = [Libro.id_libro]
     if q:
-        query = query.filter(Libro.nombre.ilike(f"%{q}%"))
-    return query.order_by(Libro.id_libro.desc()).all()
+        relevancia = consulta_relevancia(q)
+        if relevancia is None:
+            return respuesta_ndjson_vacia() if formato == "ndjson" else []
+        stmt = (
+            stmt.join(relevancia, relevancia.c.libro_id == Libro.id_libro)
+            .add_columns(relevancia.c.relevancia)
+        )
+        orden = [relevancia.c.relevancia, Libro.id_libro]
+    if after:
+        valores = decodificar_cursor(after, [int] * len(orden))
+        stmt = stmt.where(filtro_keyset(orden, valores, descendente=True))
+    stmt = stmt.order_by(*[columna.desc() for columna in orden])
+    if formato == "ndjson":
+        return respuesta_ndjson(stmt, LibroOut, proyectada=True, motor=db.bind)
+    clave = (lambda fila: [fila.relevancia, fila.id_libro]) if q else (lambda fila: [fila.id_libro])
+    filas = await paginar(db, stmt, limit, response, clave)
+    return respuesta_filas(filas, LibroOut, response)
 
 # Obtener un libro por ID
 @router.get("/{libro_id}", response_model=LibroOut)
-def obtener_libro(libro_id: int, db: Session = Depends(get_db)):
-    libro = db.query(Libro).get(libro_id)
+async def obtener_libro(libro_id: int, db: AsyncSession = Depends(get_db)):
+    libro = await libro_cacheado(db, libro_id)
     if not libro:
         raise HTTPException(status_code=404, detail="Libro no encontrado")
     return libro
 
 # Actualizar parcialmente un libro
 @router.patch("/{libro_id}", response_model=LibroOut)
-def actualizar_libro(libro_id: int, payload: LibroUpdate, db: Session = Depends(get_db)):
-    libro = db.query(Libro).get(libro_id)
+async def actualizar_libro(libro_id: int, payload: LibroUpdate, db: AsyncSession = Depends(get_db)):
+    libro = await db.get(Libro, libro_id)
     if not libro:
         raise HTTPException(status_code=404, detail="Libro no encontrado")
     data = payload.model_dump(exclude_unset=True)
     for k, v in data.items():
         setattr(libro, k, v)
-    db.commit()
-    db.refresh(libro)
+    await db.run_sync(indexar_libro, libro)
+    if "stock_minimo" in data:
+        await recalcular_libro(db, libro_id, libro.stock_minimo)
+    await db.commit()
+    await db.refresh(libro)
+    cache_libros.invalidar(libro_id)
     return libro
 
 # Eliminar un libro
 @router.delete("/{libro_id}", status_code=status.HTTP_204_NO_CONTENT)
-def eliminar_libro(libro_id: int, db: Session = Depends(get_db)):
-    libro = db.query(Libro).get(libro_id)
+async def eliminar_libro(libro_id: int, db: AsyncSession = Depends(get_db)):
+    libro = await db.get(Libro, libro_id)
     if not libro:
         raise HTTPException(status_code=404, detail="Libro no encontrado")
-    db.delete(libro)
-    db.commit()
-    return
\ No newline at end of file
+    await db.run_sync(desindexar_libro, libro_id)
+    await db.delete(libro)
+    await db.commit()
+    cache_libros.invalidar(libro_id)
+    return
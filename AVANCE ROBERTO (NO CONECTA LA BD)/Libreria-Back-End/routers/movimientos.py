@@ -3,66 +3,264 @@ Router para la gestión de movimientos de inventario.
 
 Permite:
 - Registrar movimientos (entrada, salida, venta, ajuste)
-- Listar movimientos con filtro opcional por tipo
+- Registrar lotes de movimientos en una sola transacción (POST /movimientos/lote)
+- Listar movimientos con filtro opcional por tipo (paginado por cursor o en NDJSON),
+  con nombre del libro, del usuario y de la tienda en una sola consulta con
+  joins que proyecta columnas (sin cargas perezosas por fila)
+- Exportar movimientos por rango de fechas, tienda y tipo como CSV o NDJSON
+  (GET /movimientos/export), en streaming desde un cursor del servidor
+- Los meses archivados (ver particiones.py) se leen de sus archivos solo si
+  el rango exportado o el cursor del listado llegan antes de la frontera;
+  el NDJSON del listado cubre solo lo que sigue en la base de datos
 
 Reglas importantes:
-- Se valida que exista el inventario y el usuario (si se envía).
+- Se valida que exista el inventario y el usuario (si se envía): la tabla
+  particionada no tiene claves foráneas.
+- No se aceptan movimientos con fecha en un mes ya archivado.
+- Un movimiento con fecha pasada corrige, en la misma transacción, los
+  puntos de control del stock posteriores a ella (ver conciliacion.py).
 - No se permiten operaciones que dejen stock negativo.
-- Se usa SELECT ... FOR UPDATE para bloquear filas y evitar condiciones de carrera.
+- Un movimiento cambia el stock con un único UPDATE condicional (ver
+  stock.py) y guarda el movimiento en la misma transacción corta: la fila
+  de inventario queda bloqueada desde el UPDATE hasta el commit.
+- Los lotes usan SELECT ... FOR UPDATE, porque validan cada línea contra el
+  stock que dejan las anteriores.
+- Con VENTAS_AGRUPADAS_MS > 0, las ventas individuales se juntan durante
+  unos milisegundos y se confirman en un solo commit (ver ventas_agrupadas.py).
+- Tras el commit, cada cambio de stock se publica en GET /eventos/stock
+  (ver eventos_stock.py) para las pantallas conectadas.
+- Las ventas se suman a los acumulados diarios (venta_diaria) en la misma
+  transacción, para que los reportes no recorran el libro mayor.
+- En los lotes las filas se bloquean en orden de id_inventario para que dos
+  lotes concurrentes no puedan bloquearse mutuamente (deadlock).
 """
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from anyio import to_thread
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
 from typing import List, Optional
-from database import get_db
-from models import MovimientoLibro, InventarioLibro, Usuario
-from schemas import MovimientoCreate, MovimientoOut
+from datetime import datetime
+from database import engine_lectura, get_db, get_db_lectura
+from models import MovimientoLibro, InventarioLibro, Libro, PuntoVenta, Usuario
+from stock import sumar_stock_global
+from libro_mayor import aplicar_movimientos
+from ventas_agrupadas import agrupador_ventas
+from particiones import fecha_admitida, frontera_lectura, lotes_archivados, pagina_archivada
+from acumulados import acumular_ventas
+from conciliacion import corregir_puntos
+from eventos_stock import CANAL_GLOBAL, difusor_stock
+from schemas import (
+    MovimientoCreate, MovimientoDetalleOut, MovimientoOut, MovimientoLote, ResultadoLote
+)
+from seguridad import Sesion, sesion_opcional
+from paginacion import (
+    CABECERA_CURSOR, LIMITE_MAXIMO, LIMITE_POR_DEFECTO, codificar_cursor, decodificar_cursor, filtro_keyset,
+    paginar, respuesta_exportacion, respuesta_ndjson
+)
+from serializacion import filas_a_dicts, respuesta_filas
 
 # Router de movimientos
 router = APIRouter(prefix="/movimientos", tags=["Movimientos"])
 
+# Columnas proyectadas del listado detallado (sin hidratar objetos ORM)
+_COLUMNAS_DETALLE = (
+    MovimientoLibro.id_mov_libro,
+    MovimientoLibro.inventario_id,
+    MovimientoLibro.tipo,
+    MovimientoLibro.cantidad,
+    MovimientoLibro.usuario_id,
+    MovimientoLibro.punto_venta_id,
+    MovimientoLibro.fecha_movimiento,
+    MovimientoLibro.observaciones,
+    InventarioLibro.libro_id,
+    Libro.nombre.label("libro"),
+    Usuario.nombre.label("usuario"),
+    PuntoVenta.nombre.label("punto_venta"),
+)
+
 # Crear un movimiento de inventario
 @router.post("/", response_model=MovimientoOut, status_code=status.HTTP_201_CREATED)
-def crear_movimiento(payload: MovimientoCreate, db: Session = Depends(get_db)):
-    
-    inv = db.query(InventarioLibro).with_for_update().get(payload.inventario_id)
-    if not inv:
-        raise HTTPException(status_code=404, detail="Inventario no existe")
+async def crear_movimiento(
+    payload: MovimientoCreate,
+    sesion: Optional[Sesion] = Depends(sesion_opcional),
+    db: AsyncSession = Depends(get_db)
+):
+    # Con token, el usuario de la sesión ya está verificado (eliminarlo revoca
+    # sus tokens, ver seguridad.py): no se consulta la tabla
+    usuario_sesion = sesion.id_usuario if sesion else None
+    usuario_id = payload.usuario_id or usuario_sesion
+    if not fecha_admitida(payload.fecha_movimiento):
+        raise HTTPException(status_code=400, detail="El mes de esa fecha ya está archivado")
 
-    if payload.usuario_id:
-        if not db.query(Usuario).get(payload.usuario_id):
-            raise HTTPException(status_code=400, detail="Usuario no existe")
+    if payload.tipo == "venta" and agrupador_ventas:
+        # Se confirma junto con las demás ventas del grupo; responde tras el commit
+        resultado, fila = await agrupador_ventas.registrar(payload.model_copy(update={"usuario_id": usuario_id}))
+        if not resultado.ok:
+            codigo = 404 if resultado.detalle == "Inventario no existe" else 400
+            raise HTTPException(status_code=codigo, detail=resultado.detalle)
+        difusor_stock.publicar(CANAL_GLOBAL, payload.inventario_id, resultado.stock_resultante)
+        return MovimientoOut(**fila)
 
+    # Validaciones y datos del libro antes de tocar el stock: lecturas sin bloqueo
+    info = (
+        await db.execute(
+            select(InventarioLibro.libro_id, Libro.precio)
+            .join(Libro, Libro.id_libro == InventarioLibro.libro_id)
+            .where(InventarioLibro.id_inventario == payload.inventario_id)
+        )
+    ).first()
+    if not info:
+        raise HTTPException(status_code=404, detail="Inventario no existe")
 
-    if payload.tipo in ("salida", "venta"):
-        if inv.stock < payload.cantidad:
-            raise HTTPException(status_code=400, detail="Stock insuficiente")
+    if usuario_id and usuario_id != usuario_sesion:
+        if not await db.get(Usuario, usuario_id):
+            raise HTTPException(status_code=400, detail="Usuario no existe")
 
-    
-    if payload.tipo in ("entrada", "ajuste"):
-        inv.stock += payload.cantidad
-    else: 
-        inv.stock -= payload.cantidad
+    # Descuento atómico: salidas y ventas solo si queda stock suficiente
+    delta = payload.cantidad if payload.tipo in ("entrada", "ajuste") else -payload.cantidad
+    condicion = InventarioLibro.id_inventario == payload.inventario_id
+    stock = await sumar_stock_global(db, condicion, delta)
+    if stock is None:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="Stock insuficiente")
 
+    # La fecha se fija aquí para que el movimiento y su acumulado caigan el mismo día
+    fecha = payload.fecha_movimiento or datetime.now()
     mov = MovimientoLibro(
         inventario_id=payload.inventario_id,
         tipo=payload.tipo,
         cantidad=payload.cantidad,
-        usuario_id=payload.usuario_id,
-        fecha_movimiento=payload.fecha_movimiento,
+        usuario_id=usuario_id,
+        fecha_movimiento=fecha,
         observaciones=payload.observaciones
     )
     db.add(mov)
-    db.commit()
-    db.refresh(mov)
+    if payload.tipo == "venta":
+        await acumular_ventas(db, [(fecha, info.libro_id, None, payload.cantidad, info.precio)])
+    if payload.fecha_movimiento:
+        await corregir_puntos(db, [(payload.inventario_id, fecha, delta)])
+    await db.commit()
+    difusor_stock.publicar(CANAL_GLOBAL, payload.inventario_id, stock)
+    await db.refresh(mov)
     return mov
 
+# Registrar un lote de movimientos (p. ej. la recepción de un proveedor)
+@router.post("/lote", response_model=ResultadoLote)
+async def crear_movimientos_lote(payload: MovimientoLote, db: AsyncSession = Depends(get_db)):
+    lineas = payload.movimientos
+    # Bloqueo en orden fijo, validación por línea e INSERT de varias filas (ver libro_mayor.py)
+    resultados, insertadas = await aplicar_movimientos(db, lineas)
+    await db.commit()
+    for resultado in resultados:
+        if resultado.ok:
+            difusor_stock.publicar(CANAL_GLOBAL, lineas[resultado.indice].inventario_id, resultado.stock_resultante)
+
+    return ResultadoLote(
+        aceptados=len(insertadas),
+        rechazados=len(lineas) - len(insertadas),
+        resultados=resultados
+    )
+
+# Exportar movimientos de un período (p. ej. un mes o un año para contabilidad)
+@router.get("/export")
+async def exportar_movimientos(
+    desde: datetime = Query(..., description="Fecha/hora inicial (incluida)"),
+    hasta: datetime = Query(..., description="Fecha/hora final (excluida)"),
+    punto_venta_id: Optional[int] = Query(None, description="Solo movimientos de esa tienda"),
+    tipo: Optional[str] = Query(None, pattern="^(entrada|salida|venta|ajuste)$"),
+    formato: str = Query("csv", pattern="^(csv|ndjson)$"),
+    motor: AsyncEngine = Depends(engine_lectura)
+):
+    if hasta <= desde:
+        raise HTTPException(status_code=400, detail="'hasta' debe ser posterior a 'desde'")
+
+    # Columnas planas: no se hidratan objetos ORM por cada fila exportada
+    q = (
+        select(
+            MovimientoLibro.id_mov_libro,
+            MovimientoLibro.fecha_movimiento,
+            MovimientoLibro.tipo,
+            MovimientoLibro.cantidad,
+            MovimientoLibro.inventario_id,
+            MovimientoLibro.punto_venta_id,
+            MovimientoLibro.usuario_id,
+            MovimientoLibro.observaciones,
+        )
+        .where(MovimientoLibro.fecha_movimiento >= desde, MovimientoLibro.fecha_movimiento < hasta)
+    )
+    if punto_venta_id is not None:
+        q = q.where(MovimientoLibro.punto_venta_id == punto_venta_id)
+    if tipo:
+        q = q.where(MovimientoLibro.tipo == tipo)
+    # Orden cronológico por el índice (fecha_movimiento, id_mov_libro)
+    q = q.order_by(MovimientoLibro.fecha_movimiento, MovimientoLibro.id_mov_libro)
+
+    # Lo anterior a la frontera está archivado: sale primero, desde los archivos del rango
+    archivadas = None
+    frontera = frontera_lectura()
+    if frontera and desde < frontera:
+        def filtro(fila):
+            return ((punto_venta_id is None or fila["punto_venta_id"] == punto_venta_id)
+                    and (not tipo or fila["tipo"] == tipo))
+        archivadas = lotes_archivados(desde, min(hasta, frontera), filtro)
+        q = q.where(MovimientoLibro.fecha_movimiento >= frontera)
+
+    nombre = f"movimientos_{desde:%Y%m%d}_{hasta:%Y%m%d}"
+    return respuesta_exportacion(q, formato, nombre, motor=motor, anteriores=archivadas)
+
 # Listar movimientos de inventario
-@router.get("/", response_model=List[MovimientoOut])
-def listar_movimientos(
+@router.get("/", response_model=List[MovimientoDetalleOut])
+async def listar_movimientos(
+    response: Response,
     tipo: Optional[str] = Query(None, pattern="^(entrada|salida|venta|ajuste)$"),
-    db: Session = Depends(get_db)
+    after: Optional[str] = Query(None, description="Cursor devuelto en X-Next-Cursor"),
+    limit: int = Query(LIMITE_POR_DEFECTO, ge=1, le=LIMITE_MAXIMO),
+    formato: str = Query("json", pattern="^(json|ndjson)$"),
+    db: AsyncSession = Depends(get_db_lectura)
 ):
-    q = db.query(MovimientoLibro).order_by(MovimientoLibro.fecha_movimiento.desc())
+    # Orden (fecha, id) descendente: el id desempata movimientos del mismo segundo
+    q = (
+        select(*_COLUMNAS_DETALLE)
+        .join(InventarioLibro, InventarioLibro.id_inventario == MovimientoLibro.inventario_id)
+        .join(Libro, Libro.id_libro == InventarioLibro.libro_id)
+        .outerjoin(Usuario, Usuario.id_usuario == MovimientoLibro.usuario_id)
+        .outerjoin(PuntoVenta, PuntoVenta.id_punto_venta == MovimientoLibro.punto_venta_id)
+    )
     if tipo:
-        q = q.filter(MovimientoLibro.tipo == tipo)
-    return q.all()
\ No newline at end of file
+        q = q.where(MovimientoLibro.tipo == tipo)
+    # Lo anterior a la frontera ya no está en la BD (ver particiones.py)
+    frontera = frontera_lectura()
+    if frontera:
+        q = q.where(MovimientoLibro.fecha_movimiento >= frontera)
+    cursor = None
+    if after:
+        cursor = tuple(decodificar_cursor(after, [datetime, int]))
+        q = q.where(filtro_keyset(
+            [MovimientoLibro.fecha_movimiento, MovimientoLibro.id_mov_libro],
+            list(cursor),
+            descendente=True
+        ))
+    q = q.order_by(MovimientoLibro.fecha_movimiento.desc(), MovimientoLibro.id_mov_libro.desc())
+    if formato == "ndjson":
+        return respuesta_ndjson(q, MovimientoDetalleOut, proyectada=True, motor=db.bind)
+
+    # Si el cursor ya pasó la frontera, la página sale entera del archivo
+    filas = []
+    if not (frontera and cursor and cursor[0] < frontera):
+        filas = await paginar(
+            db, q, limit, response,
+            lambda fila: [fila.fecha_movimiento, fila.id_mov_libro]
+        )
+    pagina = filas_a_dicts(filas, MovimientoDetalleOut)
+
+    # El archivo se abre solo cuando la BD no alcanzó a llenar la página
+    if frontera and CABECERA_CURSOR not in response.headers:
+        faltan = limit - len(pagina)
+        antes_de = (pagina[-1]["fecha_movimiento"], pagina[-1]["id_mov_libro"]) if pagina else cursor
+        archivadas = await to_thread.run_sync(pagina_archivada, antes_de, faltan + 1, tipo)
+        hay_mas = len(archivadas) > faltan
+        pagina.extend(filas_a_dicts(archivadas[:faltan], MovimientoDetalleOut))
+        if hay_mas:
+            ultima = pagina[-1]
+            response.headers[CABECERA_CURSOR] = codificar_cursor(ultima["fecha_movimiento"], ultima["id_mov_libro"])
+    return respuesta_filas(pagina, MovimientoDetalleOut, response, ya_reducidas=True)
\ No newline at end of file
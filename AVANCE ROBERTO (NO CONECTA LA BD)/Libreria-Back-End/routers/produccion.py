@@ -0,0 +1,33 @@
+"""
+Router de producción.
+
+Expone:
+- GET /produccion/plan: plan de reimpresión de los títulos con stock bajo
+  según el papel disponible (ver reimpresion.py). Dos lecturas (títulos con
+  stock bajo por el índice de la bandera y tabla de papel) y un cálculo
+  vectorizado sobre todo el catálogo; no modifica stock ni papel.
+
+Este router se monta con el prefijo `/produccion` y la etiqueta "Producción".
+"""
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import get_db_lectura
+from reimpresion import armar_plan, consulta_libros, consulta_papel
+
+# Router de producción
+router = APIRouter(prefix="/produccion", tags=["Producción"])
+
+# Plan de reimpresión según el papel disponible
+@router.get("/plan")
+async def plan_reimpresion(
+    cobertura: float = Query(1.0, ge=1, le=10, description="Objetivo = stock mínimo × cobertura"),
+    db: AsyncSession = Depends(get_db_lectura)
+):
+    """
+    Devuelve, por título con stock bajo, los ejemplares a imprimir con el
+    papel que hay, y por papel las páginas pedidas, asignadas y restantes.
+    """
+    libros = (await db.execute(consulta_libros())).all()
+    papeles = (await db.execute(consulta_papel())).all()
+    return armar_plan(libros, papeles, cobertura)
@@ -1,8 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from database import get_db
 from models import PuntoVenta
+from cache import TODOS, cache_puntos_venta, punto_venta_cacheado, puntos_venta_cacheados
 from pydantic import BaseModel
 
 router = APIRouter(prefix="/puntos-venta", tags=["Puntos de Venta"])
@@ -34,26 +35,27 @@ class PuntoVentaOut(BaseModel):
 # ----------- ENDPOINTS -----------
 
 @router.get("/", response_model=List[PuntoVentaOut])
-def listar_puntos_venta(db: Session = Depends(get_db)):
-    return db.query(PuntoVenta).order_by(PuntoVenta.id_punto_venta).all()
+async def listar_puntos_venta(db: AsyncSession = Depends(get_db)):
+    return await puntos_venta_cacheados(db)
 
 
 @router.post("/", response_model=PuntoVentaOut, status_code=status.HTTP_201_CREATED)
-def crear_punto_venta(payload: PuntoVentaCreate, db: Session = Depends(get_db)):
+async def crear_punto_venta(payload: PuntoVentaCreate, db: AsyncSession = Depends(get_db)):
     nuevo = PuntoVenta(
         nombre=payload.nombre,
         ubicacion=payload.ubicacion,
         tipo=payload.tipo
     )
     db.add(nuevo)
-    db.commit()
-    db.refresh(nuevo)
+    await db.commit()
+    await db.refresh(nuevo)
+    cache_puntos_venta.invalidar(TODOS)
     return nuevo
 
 
 @router.patch("/{pv_id}", response_model=PuntoVentaOut)
-def actualizar_punto_venta(pv_id: int, payload: PuntoVentaUpdate, db: Session = Depends(get_db)):
-    pv = db.query(PuntoVenta).get(pv_id)
+async def actualizar_punto_venta(pv_id: int, payload: PuntoVentaUpdate, db: AsyncSession = Depends(get_db)):
+    pv = await db.get(PuntoVenta, pv_id)
 
     if not pv:
         raise HTTPException(status_code=404, detail="Punto de venta no encontrado")
@@ -63,25 +65,27 @@ def actualizar_punto_venta(pv_id: int, payload: PuntoVentaUpdate, db: Session =
     for key, value in data.items():
         setattr(pv, key, value)
 
-    db.commit()
-    db.refresh(pv)
+    await db.commit()
+    await db.refresh(pv)
+    cache_puntos_venta.invalidar(pv_id, TODOS)
     return pv
 
 @router.get("/{pv_id}")
-def obtener_punto_venta(pv_id: int, db: Session = Depends(get_db)):
-    pv = db.query(PuntoVenta).get(pv_id)
+async def obtener_punto_venta(pv_id: int, db: AsyncSession = Depends(get_db)):
+    pv = await punto_venta_cacheado(db, pv_id)
     if not pv:
         raise HTTPException(status_code=404, detail="Not Found")
     return pv
 
 
 @router.delete("/{pv_id}", status_code=status.HTTP_204_NO_CONTENT)
-def eliminar_punto_venta(pv_id: int, db: Session = Depends(get_db)):
-    pv = db.query(PuntoVenta).get(pv_id)
+async def eliminar_punto_venta(pv_id: int, db: AsyncSession = Depends(get_db)):
+    pv = await db.get(PuntoVenta, pv_id)
 
     if not pv:
         raise HTTPException(status_code=404, detail="Punto de venta no encontrado")
 
-    db.delete(pv)
-    db.commit()
+    await db.delete(pv)
+    await db.commit()
+    cache_puntos_venta.invalidar(pv_id, TODOS)
     return
\ No newline at end of file
@@ -0,0 +1,132 @@
+"""
+Router de reportes de ventas.
+
+Expone:
+- GET /reportes/ventas: unidades, importe y movimientos de un período,
+  agrupados por día, por libro o por punto de venta.
+- GET /reportes/ventas/top: libros más vendidos de un período.
+
+Ambos leen solo la tabla de acumulados `venta_diaria` (ver acumulados.py),
+nunca el libro mayor: el costo depende del rango de días consultado y no
+de la cantidad de movimientos registrados. Los nombres de libros y tiendas
+se agregan después de agrupar, sobre las filas ya resumidas.
+
+Los filtros `desde` y `hasta` son días incluidos. `punto_venta_id=0`
+selecciona las ventas del inventario global (sin tienda).
+"""
+from datetime import date
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import func, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import get_db_lectura
+from models import Libro, PuntoVenta, VentaDiaria
+
+router = APIRouter(prefix="/reportes", tags=["Reportes"])
+
+MAX_DIAS_REPORTE = 3660
+
+
+def _acumulados_periodo(desde: date, hasta: date, punto_venta_id: Optional[int], libro_id: Optional[int] = None):
+    if hasta < desde:
+        raise HTTPException(status_code=400, detail="'hasta' no puede ser anterior a 'desde'")
+    if (hasta - desde).days > MAX_DIAS_REPORTE:
+        raise HTTPException(status_code=400, detail="El período no puede superar los 10 años")
+    condiciones = [VentaDiaria.dia >= desde, VentaDiaria.dia <= hasta]
+    if punto_venta_id is not None:
+        condiciones.append(VentaDiaria.punto_venta_id == punto_venta_id)
+    if libro_id is not None:
+        condiciones.append(VentaDiaria.libro_id == libro_id)
+    return condiciones
+
+
+def _totales():
+    return (
+        func.sum(VentaDiaria.unidades).label("unidades"),
+        func.sum(VentaDiaria.importe).label("importe"),
+        func.sum(VentaDiaria.movimientos).label("movimientos"),
+    )
+
+
+# Ventas de un período agrupadas por día, libro o punto de venta
+@router.get("/ventas")
+async def reporte_ventas(
+    desde: date = Query(..., description="Primer día (incluido)"),
+    hasta: date = Query(..., description="Último día (incluido)"),
+    agrupar: str = Query("dia", pattern="^(dia|libro|punto_venta)$"),
+    punto_venta_id: Optional[int] = Query(None, description="Solo esa tienda (0 = inventario global)"),
+    libro_id: Optional[int] = Query(None),
+    db: AsyncSession = Depends(get_db_lectura)
+):
+    condiciones = _acumulados_periodo(desde, hasta, punto_venta_id, libro_id)
+
+    if agrupar == "dia":
+        stmt = (
+            select(VentaDiaria.dia, *_totales())
+            .where(*condiciones)
+            .group_by(VentaDiaria.dia)
+            .order_by(VentaDiaria.dia)
+        )
+    elif agrupar == "libro":
+        resumen = (
+            select(VentaDiaria.libro_id, *_totales())
+            .where(*condiciones)
+            .group_by(VentaDiaria.libro_id)
+            .subquery()
+        )
+        stmt = (
+            select(resumen.c.libro_id, Libro.nombre.label("libro"),
+                   resumen.c.unidades, resumen.c.importe, resumen.c.movimientos)
+            .select_from(resumen)
+            .outerjoin(Libro, Libro.id_libro == resumen.c.libro_id)
+            .order_by(resumen.c.unidades.desc(), resumen.c.libro_id)
+        )
+    else:
+        resumen = (
+            select(VentaDiaria.punto_venta_id, *_totales())
+            .where(*condiciones)
+            .group_by(VentaDiaria.punto_venta_id)
+            .subquery()
+        )
+        stmt = (
+            select(resumen.c.punto_venta_id,
+                   func.coalesce(PuntoVenta.nombre, literal("Inventario global")).label("punto_venta"),
+                   resumen.c.unidades, resumen.c.importe, resumen.c.movimientos)
+            .select_from(resumen)
+            .outerjoin(PuntoVenta, PuntoVenta.id_punto_venta == resumen.c.punto_venta_id)
+            .order_by(resumen.c.punto_venta_id)
+        )
+
+    resultados = (await db.execute(stmt)).all()
+    return [dict(fila._mapping) for fila in resultados]
+
+
+# Libros más vendidos de un período
+@router.get("/ventas/top")
+async def reporte_mas_vendidos(
+    desde: date = Query(..., description="Primer día (incluido)"),
+    hasta: date = Query(..., description="Último día (incluido)"),
+    punto_venta_id: Optional[int] = Query(None, description="Solo esa tienda (0 = inventario global)"),
+    limit: int = Query(10, ge=1, le=100),
+    db: AsyncSession = Depends(get_db_lectura)
+):
+    condiciones = _acumulados_periodo(desde, hasta, punto_venta_id)
+    # El índice (dia, libro_id) resuelve el rango sin leer la clave de tienda
+    top = (
+        select(VentaDiaria.libro_id, *_totales())
+        .where(*condiciones)
+        .group_by(VentaDiaria.libro_id)
+        .order_by(func.sum(VentaDiaria.unidades).desc(), VentaDiaria.libro_id)
+        .limit(limit)
+        .subquery()
+    )
+    stmt = (
+        select(top.c.libro_id, Libro.nombre.label("libro"), top.c.unidades, top.c.importe, top.c.movimientos)
+        .select_from(top)
+        .outerjoin(Libro, Libro.id_libro == top.c.libro_id)
+        .order_by(top.c.unidades.desc(), top.c.libro_id)
+    )
+    resultados = (await db.execute(stmt)).all()
+    return [dict(fila._mapping) for fila in resultados]
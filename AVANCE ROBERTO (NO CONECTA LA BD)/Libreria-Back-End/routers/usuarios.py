@@ -7,50 +7,72 @@ Funcionalidades:
 - Obtener un usuario por ID
 - Actualizar parcialmente un usuario
 - Eliminar un usuario
-- Login de usuarios
+- Login de usuarios (emite un token firmado, ver seguridad.py)
+- Consultar el usuario de la sesión actual (GET /usuarios/me)
+
+Las contraseñas se guardan hasheadas; el hash y la verificación corren en
+un pool de hilos para no bloquear el event loop.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from pydantic import BaseModel, EmailStr
-from sqlalchemy import or_
+from sqlalchemy import or_, select
 
-from database import get_db
-from models import Usuario, PuntoVenta
+from database import get_db, get_db_lectura
+from models import Usuario
 from schemas import UsuarioCreate, UsuarioUpdate, UsuarioOut
+from cache import punto_venta_cacheado
+from seguridad import (
+    Sesion, cache_sesiones, emitir_token, es_hash, hashear_contrasena_async, sesion_actual,
+    verificar_contrasena_async
+)
+from paginacion import (
+    LIMITE_MAXIMO, LIMITE_POR_DEFECTO, decodificar_cursor, filtro_keyset, paginar, respuesta_ndjson
+)
+from serializacion import respuesta_filas
 
 
 router = APIRouter(prefix="/usuarios", tags=["Usuarios"])
 
+# Campos de UsuarioOut: el listado no lee el hash de la contraseña
+_COLUMNAS_LISTADO = (
+    Usuario.id_usuario,
+    Usuario.nombre,
+    Usuario.email,
+    Usuario.rol,
+    Usuario.punto_venta_id,
+)
+
 # ==================================================
 # CREAR USUARIO
 # ==================================================
 @router.post("/", response_model=UsuarioOut, status_code=status.HTTP_201_CREATED)
-def crear_usuario(payload: UsuarioCreate, db: Session = Depends(get_db)):
+async def crear_usuario(payload: UsuarioCreate, db: AsyncSession = Depends(get_db)):
 
     # Email único
-    existente = db.query(Usuario).filter(Usuario.email == payload.email).first()
+    existente = await db.scalar(select(Usuario).where(Usuario.email == payload.email).limit(1))
     if existente:
         raise HTTPException(status_code=400, detail="El email ya está registrado")
 
     # Validar punto de venta
     if payload.punto_venta_id is not None:
-        pv = db.query(PuntoVenta).get(payload.punto_venta_id)
+        pv = await punto_venta_cacheado(db, payload.punto_venta_id)
         if not pv:
             raise HTTPException(status_code=400, detail="Punto de venta no existe")
 
     usuario = Usuario(
         nombre=payload.nombre,
         email=payload.email,
-        contrasena=payload.contrasena,  # Plano por ahora
+        contrasena=await hashear_contrasena_async(payload.contrasena),
         rol=payload.rol,
         punto_venta_id=payload.punto_venta_id
     )
 
     db.add(usuario)
-    db.commit()
-    db.refresh(usuario)
+    await db.commit()
+    await db.refresh(usuario)
     return usuario
 
 
@@ -58,25 +80,48 @@ def crear_usuario(payload: UsuarioCreate, db: Session = Depends(get_db)):
 # LISTAR USUARIOS
 # ==================================================
 @router.get("/", response_model=List[UsuarioOut])
-def listar_usuarios(
+async def listar_usuarios(
+    response: Response,
     q: Optional[str] = Query(None, description="Filtrar por nombre o email"),
-    db: Session = Depends(get_db)
+    after: Optional[str] = Query(None, description="Cursor devuelto en X-Next-Cursor"),
+    limit: int = Query(LIMITE_POR_DEFECTO, ge=1, le=LIMITE_MAXIMO),
+    formato: str = Query("json", pattern="^(json|ndjson)$"),
+    db: AsyncSession = Depends(get_db_lectura)
 ):
-    query = db.query(Usuario)
+    query = select(*_COLUMNAS_LISTADO)
 
     if q:
         like = f"%{q}%"
-        query = query.filter(or_(Usuario.nombre.ilike(like), Usuario.email.ilike(like)))
+        query = query.where(or_(Usuario.nombre.ilike(like), Usuario.email.ilike(like)))
 
-    return query.order_by(Usuario.id_usuario.asc()).all()
+    if after:
+        (ultimo_id,) = decodificar_cursor(after, [int])
+        query = query.where(filtro_keyset([Usuario.id_usuario], [ultimo_id]))
+
+    query = query.order_by(Usuario.id_usuario.asc())
+    if formato == "ndjson":
+        return respuesta_ndjson(query, UsuarioOut, proyectada=True, motor=db.bind)
+    filas = await paginar(db, query, limit, response, lambda fila: [fila.id_usuario])
+    return respuesta_filas(filas, UsuarioOut, response)
+
+
+# ==================================================
+# USUARIO DE LA SESIÓN ACTUAL
+# ==================================================
+@router.get("/me", response_model=UsuarioOut)
+async def obtener_usuario_actual(sesion: Sesion = Depends(sesion_actual), db: AsyncSession = Depends(get_db_lectura)):
+    usuario = await db.get(Usuario, sesion.id_usuario)
+    if not usuario:
+        raise HTTPException(status_code=404, detail="Usuario no encontrado")
+    return usuario
 
 
 # ==================================================
 # OBTENER USUARIO POR ID
 # ==================================================
 @router.get("/{usuario_id}", response_model=UsuarioOut)
-def obtener_usuario(usuario_id: int, db: Session = Depends(get_db)):
-    usuario = db.query(Usuario).get(usuario_id)
+async def obtener_usuario(usuario_id: int, db: AsyncSession = Depends(get_db_lectura)):
+    usuario = await db.get(Usuario, usuario_id)
     if not usuario:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
     return usuario
@@ -86,9 +131,9 @@ def obtener_usuario(usuario_id: int, db: Session = Depends(get_db)):
 # ACTUALIZAR USUARIO
 # ==================================================
 @router.patch("/{usuario_id}", response_model=UsuarioOut)
-def actualizar_usuario(usuario_id: int, payload: UsuarioUpdate, db: Session = Depends(get_db)):
+async def actualizar_usuario(usuario_id: int, payload: UsuarioUpdate, db: AsyncSession = Depends(get_db)):
 
-    usuario = db.query(Usuario).get(usuario_id)
+    usuario = await db.get(Usuario, usuario_id)
     if not usuario:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
 
@@ -96,25 +141,32 @@ def actualizar_usuario(usuario_id: int, payload: UsuarioUpdate, db: Session = De
 
     # Validar email nuevo
     if "email" in data:
-        existe = (
-            db.query(Usuario)
-            .filter(Usuario.email == data["email"], Usuario.id_usuario != usuario_id)
-            .first()
+        existe = await db.scalar(
+            select(Usuario)
+            .where(Usuario.email == data["email"], Usuario.id_usuario != usuario_id)
+            .limit(1)
         )
         if existe:
             raise HTTPException(status_code=400, detail="El email ya está registrado")
 
     # Validar nuevo punto de venta
     if "punto_venta_id" in data and data["punto_venta_id"] is not None:
-        pv = db.query(PuntoVenta).get(data["punto_venta_id"])
+        pv = await punto_venta_cacheado(db, data["punto_venta_id"])
         if not pv:
             raise HTTPException(status_code=400, detail="Punto de venta no existe")
 
+    # Contraseña nueva: los tokens emitidos con la anterior dejan de valer
+    if data.get("contrasena"):
+        data["contrasena"] = await hashear_contrasena_async(data["contrasena"])
+        usuario.version_token += 1
+
     for k, v in data.items():
         setattr(usuario, k, v)
 
-    db.commit()
-    db.refresh(usuario)
+    await db.commit()
+    # Las sesiones abiertas toman el rol y el punto de venta nuevos
+    cache_sesiones.invalidar(usuario_id)
+    await db.refresh(usuario)
     return usuario
 
 
@@ -122,14 +174,16 @@ def actualizar_usuario(usuario_id: int, payload: UsuarioUpdate, db: Session = De
 # ELIMINAR USUARIO
 # ==================================================
 @router.delete("/{usuario_id}", status_code=status.HTTP_204_NO_CONTENT)
-def eliminar_usuario(usuario_id: int, db: Session = Depends(get_db)):
+async def eliminar_usuario(usuario_id: int, db: AsyncSession = Depends(get_db)):
 
-    usuario = db.query(Usuario).get(usuario_id)
+    usuario = await db.get(Usuario, usuario_id)
     if not usuario:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
 
-    db.delete(usuario)
-    db.commit()
+    await db.delete(usuario)
+    await db.commit()
+    # Sin usuario, sus tokens dejan de valer
+    cache_sesiones.invalidar(usuario_id)
     return
 
 
@@ -145,25 +199,30 @@ class LoginResponse(BaseModel):
     message: str
     role: str
     punto_venta_id: int | None
+    id_usuario: int
+    access_token: str
+    token_type: str = "bearer"
 
 
 @router.post("/login", response_model=LoginResponse)
-def login(payload: LoginRequest, db: Session = Depends(get_db)):
+async def login(payload: LoginRequest, db: AsyncSession = Depends(get_db)):
 
-    usuario = (
-        db.query(Usuario)
-        .filter(
-            Usuario.email == payload.email,
-            Usuario.contrasena == payload.contrasena
-        )
-        .first()
-    )
+    usuario = await db.scalar(select(Usuario).where(Usuario.email == payload.email).limit(1))
 
-    if not usuario:
+    # Se verifica aunque el email no exista, para no revelarlo por el tiempo de respuesta
+    correcta = await verificar_contrasena_async(payload.contrasena, usuario.contrasena if usuario else None)
+    if not correcta:
         raise HTTPException(status_code=400, detail="Credenciales inválidas")
 
+    # Contraseña heredada en texto plano: se reemplaza por su hash
+    if not es_hash(usuario.contrasena):
+        usuario.contrasena = await hashear_contrasena_async(payload.contrasena)
+        await db.commit()
+
     return {
         "message": "Inicio de sesión exitoso",
         "role": usuario.rol,
-        "punto_venta_id": usuario.punto_venta_id
+        "punto_venta_id": usuario.punto_venta_id,
+        "id_usuario": usuario.id_usuario,
+        "access_token": emitir_token(usuario.id_usuario, usuario.version_token)
     }
@@ -7,24 +7,31 @@ Este módulo define los modelos de validación y serialización de datos:
 - Inventario (lectura y operaciones de ajuste)
 - Movimientos de inventario (crear y respuesta)
 
+Las vistas "detalle" (InventarioDetalleOut, MovimientoDetalleOut) agregan
+nombres de libro, tienda y usuario; se llenan desde filas proyectadas de
+una sola consulta con joins, no desde relaciones ORM.
+
 Los esquemas permiten:
 - Validar datos de entrada del cliente.
 - Controlar qué datos se exponen en las respuestas.
 - Convertir modelos ORM a respuestas JSON (from_attributes=True en Pydantic v2).
 """
 
-from pydantic import BaseModel, Field, EmailStr
-from typing import Optional
+import enum
+from pydantic import BaseModel, Field, EmailStr, field_validator
+from typing import List, Optional
 from datetime import datetime
 
 
 # Esquemas para usuarios
 class LibroBase(BaseModel):
     nombre: str = Field(..., min_length=1, max_length=150)
-    categoria: Optional[str] = None
+    autor: Optional[str] = Field(None, max_length=200)
+    categoria: Optional[str] = Field(None, max_length=100)
     descripcion: Optional[str] = None
     precio: Optional[float] = None
-    paginas_por_libro: int
+    paginas_por_libro: Optional[int] = None
+    stock_minimo: Optional[int] = Field(0, ge=0)
 
 # Esquema para crear nuevo libro
 class LibroCreate(LibroBase):
@@ -33,10 +40,12 @@ class LibroCreate(LibroBase):
 # Esquema para actualizar libro
 class LibroUpdate(BaseModel):
     nombre: Optional[str] = None
+    autor: Optional[str] = Field(None, max_length=200)
     categoria: Optional[str] = None
     descripcion: Optional[str] = None
     precio: Optional[float] = None
     paginas_por_libro: Optional[int] = None
+    stock_minimo: Optional[int] = Field(None, ge=0)
 
 # Esquema de salida para libro
 class LibroOut(LibroBase):
@@ -50,10 +59,17 @@ class InventarioOut(BaseModel):
     id_inventario: int
     libro_id: int
     stock: int
+    bajo_minimo: bool = False
     updated_at: datetime
     class Config:
         from_attributes = True
         
+# Inventario global con los datos del libro (listado del panel de inventario)
+class InventarioDetalleOut(InventarioOut):
+    libro: str
+    autor: Optional[str] = None
+    stock_minimo: Optional[int] = None
+
 # Esquema para ajustar el stock sumando o restando unidades
 class AjusteStock(BaseModel):
     delta: int = Field(..., description="Cantidad a sumar (puede ser negativa)")
@@ -71,6 +87,35 @@ class MovimientoCreate(BaseModel):
     fecha_movimiento: Optional[datetime] = None
     observaciones: Optional[str] = None
 
+# Esquema para registrar varios movimientos en una sola transacción
+class MovimientoLote(BaseModel):
+    movimientos: List[MovimientoCreate] = Field(..., min_length=1, max_length=1000)
+
+# Resultado de cada línea de un lote (en el mismo orden recibido)
+class ResultadoLineaLote(BaseModel):
+    indice: int
+    ok: bool
+    detalle: Optional[str] = None
+    stock_resultante: Optional[int] = None
+
+# Esquema de salida para un lote de movimientos
+class ResultadoLote(BaseModel):
+    aceptados: int
+    rechazados: int
+    resultados: List[ResultadoLineaLote]
+
+# Fila rechazada de una importación del catálogo
+class RechazoImportacion(BaseModel):
+    linea: int
+    errores: List[str]
+
+# Resultado de una importación del catálogo (solo los primeros rechazos)
+class ResultadoImportacion(BaseModel):
+    leidos: int
+    insertados: int
+    rechazados: int
+    rechazos: List[RechazoImportacion]
+
 # Esquema de salida para movimiento de inventario
 class MovimientoOut(BaseModel):
     id_mov_libro: int
@@ -78,11 +123,56 @@ class MovimientoOut(BaseModel):
     tipo: str
     cantidad: int
     usuario_id: Optional[int]
+    punto_venta_id: Optional[int] = None
     fecha_movimiento: datetime
     observaciones: Optional[str]
+
+    # La columna es un Enum de SQLAlchemy: se expone su valor ("venta", ...)
+    @field_validator("tipo", mode="before")
+    @classmethod
+    def tipo_como_texto(cls, valor):
+        return valor.value if isinstance(valor, enum.Enum) else valor
+
+    class Config:
+        from_attributes = True
+
+# Movimiento con nombres de libro, usuario y punto de venta
+class MovimientoDetalleOut(MovimientoOut):
+    libro_id: int
+    libro: str
+    usuario: Optional[str] = None
+    punto_venta: Optional[str] = None
+
+# Esquema para asignar un libro al inventario de un punto de venta
+class InventarioPVCreate(BaseModel):
+    id_libro: int
+    id_punto_venta: int
+    stock: int = Field(0, ge=0)
+    stock_minimo: int = Field(5, ge=0)
+
+# Esquema de salida para el inventario de un punto de venta (con nombre del libro)
+class InventarioPVOut(BaseModel):
+    id_inventario: int
+    id_libro: int
+    id_punto_venta: int
+    libro: str
+    punto_venta: Optional[str] = None
+    stock: int
+    stock_minimo: int
     class Config:
         from_attributes = True
 
+# Esquema para registrar una venta en un punto de venta
+class VentaPV(BaseModel):
+    cantidad: int = Field(1, gt=0)
+    usuario_id: Optional[int] = None
+
+# Esquema de salida de una venta en un punto de venta
+class VentaPVOut(BaseModel):
+    id_inventario: int
+    stock: int
+    id_mov_libro: int
+
 # Esquemas para usuarios
 class UsuarioBase(BaseModel):
  
@@ -129,4 +219,16 @@ class UsuarioOut(UsuarioBase):
     id_usuario: int
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+# Esquema de salida para el resumen del panel de administración
+class ResumenAdmin(BaseModel):
+    puntos_venta: int
+    usuarios: int
+    inventarios: int
+    libros_en_stock: int
+    unidades_en_stock: int
+    stock_bajo: int
+    ventas_hoy_unidades: int
+    ventas_hoy_importe: float
+    generado_en: datetime
@@ -0,0 +1,217 @@
+"""
+Contraseñas hasheadas y sesiones por token.
+
+Se encarga de:
+- Hashear contraseñas con PBKDF2-SHA256 y sal aleatoria (formato
+  `pbkdf2_sha256$iteraciones$sal$hash`). El hash es lento a propósito.
+- Verificar contraseñas en un pool de hilos propio: hashlib libera el GIL
+  mientras calcula, así que el event loop nunca queda bloqueado.
+- Emitir tokens firmados con HMAC-SHA256 al iniciar sesión. El token lleva
+  el id del usuario y su `version_token`, y vence a las `TOKEN_HORAS`.
+- Tomar el rol y el punto de venta de la sesión del usuario actual, no del
+  token: una caché por usuario (`cache_sesiones`) evita consultar la tabla
+  `usuario` en cada petición. Actualizar o eliminar un usuario la invalida
+  en todos los workers, así un cambio de rol o de tienda rige en la
+  petición siguiente y el token de un usuario eliminado deja de valer.
+  Cambiar la contraseña incrementa `version_token` y revoca los tokens
+  emitidos antes.
+
+Las contraseñas en texto plano que queden de antes se aceptan una vez y se
+reemplazan por su hash en ese mismo login.
+
+Uso desde un router:
+    from seguridad import Sesion, sesion_actual, sesion_opcional
+    async def endpoint(sesion: Sesion = Depends(sesion_actual)): ...
+
+La clave de firma se lee de `SECRET_KEY` en el .env. Debe ser la misma en
+todos los workers; si falta se genera una por proceso (solo para desarrollo).
+"""
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Optional
+
+from fastapi import Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+
+from sqlalchemy import select
+
+from cache import CacheLRU, obtener_o_cargar
+from database import AsyncSessionLocal
+from models import Usuario
+
+ALGORITMO = "pbkdf2_sha256"
+ITERACIONES = 600_000
+TOKEN_HORAS = 8
+
+SECRET_KEY = os.getenv("SECRET_KEY")
+if not SECRET_KEY:
+    SECRET_KEY = secrets.token_urlsafe(32)
+    print("⚠ SECRET_KEY no definida en .env: los tokens solo valen en este proceso")
+_CLAVE = SECRET_KEY.encode()
+
+# Pocos hilos: cada verificación ocupa un núcleo unos cientos de ms
+_pool_hash = ThreadPoolExecutor(max_workers=max(2, (os.cpu_count() or 2) // 2), thread_name_prefix="hash")
+
+# Hash de relleno: un email inexistente tarda lo mismo que una contraseña errónea
+_HASH_RELLENO = None
+
+
+@dataclass(frozen=True)
+class Sesion:
+    id_usuario: int
+    rol: str
+    punto_venta_id: Optional[int]
+    expira: int
+
+
+# Tokens ya verificados (firma y vencimiento): token -> (id_usuario, versión, expira)
+cache_tokens = CacheLRU("tokens", capacidad=10000, ttl_segundos=300)
+# Estado del usuario por id_usuario: versión de sus tokens, rol y punto de venta
+cache_sesiones = CacheLRU("sesiones", capacidad=10000, ttl_segundos=300)
+
+
+# ---------------------------------------------------------
+# CONTRASEÑAS
+# ---------------------------------------------------------
+def _b64(datos: bytes) -> str:
+    return base64.urlsafe_b64encode(datos).rstrip(b"=").decode()
+
+
+def _desde_b64(texto: str) -> bytes:
+    return base64.urlsafe_b64decode(texto + "=" * (-len(texto) % 4))
+
+
+def hashear_contrasena(contrasena: str) -> str:
+    sal = secrets.token_bytes(16)
+    derivada = hashlib.pbkdf2_hmac("sha256", contrasena.encode(), sal, ITERACIONES)
+    return f"{ALGORITMO}${ITERACIONES}${_b64(sal)}${_b64(derivada)}"
+
+
+def es_hash(valor: str) -> bool:
+    return valor.startswith(ALGORITMO + "$")
+
+
+def verificar_contrasena(contrasena: str, almacenada: str) -> bool:
+    if not es_hash(almacenada):
+        # Contraseña heredada en texto plano
+        return hmac.compare_digest(contrasena.encode(), almacenada.encode())
+    try:
+        _, iteraciones, sal, esperado = almacenada.split("$")
+        derivada = hashlib.pbkdf2_hmac("sha256", contrasena.encode(), _desde_b64(sal), int(iteraciones))
+    except ValueError:
+        return False
+    return hmac.compare_digest(derivada, _desde_b64(esperado))
+
+
+async def hashear_contrasena_async(contrasena: str) -> str:
+    return await asyncio.get_running_loop().run_in_executor(_pool_hash, hashear_contrasena, contrasena)
+
+
+async def verificar_contrasena_async(contrasena: str, almacenada: Optional[str]) -> bool:
+    global _HASH_RELLENO
+    if almacenada is None and _HASH_RELLENO is None:
+        _HASH_RELLENO = await hashear_contrasena_async(secrets.token_urlsafe(16))
+    correcta = await asyncio.get_running_loop().run_in_executor(
+        _pool_hash, verificar_contrasena, contrasena, almacenada or _HASH_RELLENO
+    )
+    return correcta and almacenada is not None
+
+
+# ---------------------------------------------------------
+# TOKENS
+# ---------------------------------------------------------
+def _firmar(cuerpo: str) -> str:
+    return _b64(hmac.new(_CLAVE, cuerpo.encode(), hashlib.sha256).digest())
+
+
+def emitir_token(id_usuario: int, version: int) -> str:
+    datos = {"sub": id_usuario, "ver": version, "exp": int(time.time()) + TOKEN_HORAS * 3600}
+    cuerpo = _b64(json.dumps(datos, separators=(",", ":")).encode())
+    return f"{cuerpo}.{_firmar(cuerpo)}"
+
+
+def _leer_token(token: str) -> Optional[tuple]:
+    """(id_usuario, versión, expira) de un token bien firmado, o None."""
+    datos = cache_tokens.obtener(token)
+    if isinstance(datos, tuple):
+        return datos
+
+    generacion = cache_tokens.generacion()
+    cuerpo, _, firma = token.partition(".")
+    if not firma or not hmac.compare_digest(firma, _firmar(cuerpo)):
+        return None
+    try:
+        crudo = json.loads(_desde_b64(cuerpo))
+        datos = (int(crudo["sub"]), int(crudo["ver"]), int(crudo["exp"]))
+    except (ValueError, KeyError, TypeError):
+        return None
+    cache_tokens.guardar(token, datos, generacion)
+    return datos
+
+
+async def _cargar_usuario(id_usuario: int) -> Optional[dict]:
+    async with AsyncSessionLocal() as db:
+        fila = (await db.execute(
+            select(Usuario.version_token, Usuario.rol, Usuario.punto_venta_id)
+            .where(Usuario.id_usuario == id_usuario)
+        )).first()
+    if fila is None:
+        return None
+    return {"version": fila.version_token, "rol": fila.rol, "punto_venta_id": fila.punto_venta_id}
+
+
+async def verificar_token(token: str) -> Optional[Sesion]:
+    """
+    Sesión de un token firmado, vigente y de la versión actual de su usuario.
+    El estado del usuario sale de `cache_sesiones`; solo un fallo consulta la BD.
+    """
+    datos = _leer_token(token)
+    if datos is None:
+        return None
+    id_usuario, version, expira = datos
+    if expira <= time.time():
+        return None
+    estado = await obtener_o_cargar(cache_sesiones, id_usuario, lambda: _cargar_usuario(id_usuario))
+    if estado is None or estado["version"] != version:
+        return None
+    return Sesion(id_usuario, estado["rol"], estado["punto_venta_id"], expira)
+
+
+# ---------------------------------------------------------
+# DEPENDENCIAS DE FASTAPI
+# ---------------------------------------------------------
+_bearer = HTTPBearer(auto_error=False)
+
+
+async def sesion_opcional(
+    credenciales: Optional[HTTPAuthorizationCredentials] = Depends(_bearer)
+) -> Optional[Sesion]:
+    """Sesión del token `Authorization: Bearer ...`, o None si no se envió."""
+    if credenciales is None:
+        return None
+    sesion = await verificar_token(credenciales.credentials)
+    if sesion is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token inválido o vencido",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return sesion
+
+
+async def sesion_actual(sesion: Optional[Sesion] = Depends(sesion_opcional)) -> Sesion:
+    if sesion is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="No autenticado",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return sesion
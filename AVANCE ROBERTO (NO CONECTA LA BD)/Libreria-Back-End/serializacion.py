@@ -0,0 +1,87 @@
+"""
+Serialización rápida de listados grandes (orjson, sin pasar por Pydantic).
+
+Un endpoint con `response_model=List[XOut]` valida cada fila contra el
+esquema, la vuelve a volcar a tipos JSON y recién ahí la codifica con el
+módulo `json`: en páginas de cientos de filas ese trabajo es la mayor parte
+del tiempo de CPU de la petición.
+
+Se encarga de:
+- Reducir filas proyectadas (Row de un select de columnas) o dicts a los
+  campos del esquema de salida, tomando las columnas por posición, sin
+  construir modelos ni validar valores. Solo se usa con lecturas propias
+  de la BD, cuyos tipos ya coinciden con el esquema.
+- Codificar el resultado con orjson (fechas en ISO 8601 y enums por su
+  valor, igual que Pydantic; Decimal como número, igual que FastAPI).
+- Devolver la respuesta ya armada: FastAPI no vuelve a validar ni a
+  serializar una Response, y `response_model` en el decorador sigue
+  documentando el esquema en OpenAPI.
+
+Uso desde un router:
+    from serializacion import respuesta_filas
+
+    @router.get("/", response_model=List[XOut])
+    async def listar(response: Response, ...):
+        filas = await paginar(db, stmt, limit, response, clave)
+        return respuesta_filas(filas, XOut, response)
+"""
+from decimal import Decimal
+from operator import itemgetter
+from typing import Any, List, Optional, Sequence
+
+import orjson
+from fastapi import Response
+
+
+def _por_defecto(valor: Any) -> Any:
+    # Lo que orjson no sabe codificar; mismo criterio que jsonable_encoder
+    if isinstance(valor, Decimal):
+        return int(valor) if valor.as_tuple().exponent >= 0 else float(valor)
+    raise TypeError(f"Tipo no serializable: {type(valor).__name__}")
+
+
+def a_json(contenido: Any) -> bytes:
+    return orjson.dumps(contenido, default=_por_defecto)
+
+
+class RespuestaJSON(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return a_json(content)
+
+
+def filas_a_dicts(filas: Sequence[Any], esquema) -> List[dict]:
+    """
+    Filas reducidas a los campos de `esquema`, en su orden. Las columnas de
+    más (p. ej. la relevancia de la búsqueda) se descartan; si falta un
+    campo en la proyección falla en la primera fila, no en silencio.
+    """
+    campos = tuple(esquema.model_fields)
+    if not filas:
+        return []
+    if isinstance(filas[0], dict):
+        return [{campo: fila.get(campo) for campo in campos} for fila in filas]
+    posiciones = [filas[0]._fields.index(campo) for campo in campos]
+    if len(posiciones) == 1:
+        return [{campos[0]: fila[posiciones[0]]} for fila in filas]
+    tomar = itemgetter(*posiciones)
+    return [dict(zip(campos, tomar(fila))) for fila in filas]
+
+
+def lineas_ndjson(filas: Sequence[Any], esquema) -> bytes:
+    """Un lote de filas como NDJSON (una fila JSON por línea)."""
+    return b"".join(a_json(fila) + b"\n" for fila in filas_a_dicts(filas, esquema))
+
+
+def respuesta_filas(
+    filas: Sequence[Any], esquema, response: Optional[Response] = None, ya_reducidas: bool = False
+) -> RespuestaJSON:
+    """
+    Lista JSON de `filas` con los campos de `esquema`. Copia las cabeceras
+    puestas en el `response` del endpoint (X-Next-Cursor), que FastAPI no
+    agrega cuando el endpoint devuelve su propia Response.
+    """
+    datos = filas if ya_reducidas else filas_a_dicts(filas, esquema)
+    cabeceras = dict(response.headers) if response is not None else None
+    return RespuestaJSON(datos, headers=cabeceras)
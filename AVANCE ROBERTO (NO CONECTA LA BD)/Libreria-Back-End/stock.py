@@ -0,0 +1,125 @@
+"""
+Cambios de stock con una sola sentencia UPDATE condicional.
+
+En lugar de SELECT ... FOR UPDATE, modificar la fila en Python y hacer
+commit (el bloqueo dura varios viajes a la base de datos), cada cambio es:
+    UPDATE ... SET stock = stock + :delta, bajo_minimo = ...
+    WHERE <fila> AND stock >= :descuento
+- La cantidad de filas afectadas es el resultado: 0 significa que no había
+  stock suficiente o que la fila no existe (el llamador distingue los dos
+  casos solo cuando falla, fuera del camino habitual).
+- La bandera de stock bajo se calcula en la misma sentencia: MySQL aplica
+  el SET de izquierda a derecha, así que usa el stock ya modificado.
+- El stock resultante vuelve en la respuesta del mismo UPDATE mediante
+  LAST_INSERT_ID(expr), que el protocolo informa como `lastrowid`: no hace
+  falta otra consulta mientras la fila está bloqueada.
+
+El bloqueo de la fila va desde el UPDATE hasta el commit. Los llamadores
+insertan el movimiento en el libro mayor y hacen commit enseguida, así un
+título muy vendido no serializa las ventas más allá de esa ventana.
+
+Todo cambio del stock global deja su movimiento en el libro mayor (los
+ajustes y el stock fijado, con `registrar_ajuste`): la conciliación
+(conciliacion.py) compara ambos.
+
+En el libro mayor, `inventario_id` es siempre un inventario global: también
+en las ventas de tienda (`punto_venta_id` no nulo), donde identifica al
+libro y no mueve ese stock. Los acumulados, la exportación y el archivo
+obtienen el libro con ese join; la conciliación excluye esas filas.
+`inventario_global_de` garantiza que exista la fila.
+"""
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import Integer, func, insert, literal, select, update
+
+from models import InventarioLibro, InventarioPV, Libro, MovimientoLibro, TipoMovimiento
+
+
+def _minimo_libro():
+    # Mínimo del libro de la fila que se actualiza (subconsulta correlacionada)
+    return (
+        select(func.coalesce(Libro.stock_minimo, 0))
+        .where(Libro.id_libro == InventarioLibro.libro_id)
+        .scalar_subquery()
+    )
+
+
+async def _ejecutar(db, stmt) -> Optional[int]:
+    resultado = await db.execute(stmt.execution_options(synchronize_session=False))
+    if resultado.rowcount == 0:
+        return None
+    return resultado.lastrowid
+
+
+async def sumar_stock_global(db, condicion, delta: int) -> Optional[int]:
+    """
+    Suma `delta` (negativo = descuento) al inventario global que cumple
+    `condicion`, solo si el stock no queda negativo. Devuelve el stock
+    resultante, o None si no se actualizó ninguna fila. No hace commit.
+    """
+    stmt = update(InventarioLibro).where(condicion)
+    if delta < 0:
+        stmt = stmt.where(InventarioLibro.stock >= -delta)
+    return await _ejecutar(db, stmt.ordered_values(
+        (InventarioLibro.stock, func.last_insert_id(InventarioLibro.stock + delta)),
+        (InventarioLibro.bajo_minimo, InventarioLibro.stock < _minimo_libro()),
+    ))
+
+
+async def fijar_stock_global(db, condicion, stock: int) -> Optional[int]:
+    """
+    Deja el stock en un valor absoluto. Devuelve el stock que tenía (para
+    registrar la diferencia) o None si la fila no existe.
+    """
+    return await _ejecutar(db, update(InventarioLibro).where(condicion).ordered_values(
+        # LAST_INSERT_ID(stock) se evalúa con el valor anterior; "* 0" lo deja fuera del SET
+        (InventarioLibro.stock, literal(stock) + func.last_insert_id(InventarioLibro.stock) * 0),
+        (InventarioLibro.bajo_minimo, InventarioLibro.stock < _minimo_libro()),
+    ))
+
+
+async def registrar_ajuste(db, condicion, delta: int, usuario_id: Optional[int], observaciones: str) -> None:
+    """
+    Guarda un movimiento "ajuste" de `delta` (negativo si resta) para el
+    inventario global que cumple `condicion`, con un INSERT ... SELECT que no
+    trae el id a Python. Un delta 0 no deja movimiento. No hace commit.
+    """
+    if delta == 0:
+        return
+    await db.execute(insert(MovimientoLibro).from_select(
+        ["inventario_id", "tipo", "cantidad", "usuario_id", "fecha_movimiento", "observaciones"],
+        select(
+            InventarioLibro.id_inventario,
+            literal(TipoMovimiento.ajuste.value),
+            literal(delta),
+            literal(usuario_id, Integer),
+            literal(datetime.now()),
+            literal(observaciones),
+        ).where(condicion),
+    ))
+
+
+async def inventario_global_de(db, libro_id: int) -> Optional[int]:
+    """
+    id del inventario global del libro, creándolo con stock 0 si no tiene
+    (None si el libro no existe). INSERT IGNORE contra el índice único de
+    `libro_id`: dos llamadas a la vez crean una sola fila. No hace commit.
+    """
+    await db.execute(insert(InventarioLibro).prefix_with("IGNORE").from_select(
+        ["libro_id", "stock", "bajo_minimo"],
+        select(Libro.id_libro, literal(0), func.coalesce(Libro.stock_minimo, 0) > 0)
+        .where(Libro.id_libro == libro_id),
+    ))
+    return await db.scalar(select(InventarioLibro.id_inventario).where(InventarioLibro.libro_id == libro_id))
+
+
+async def sumar_stock_pv(db, id_inventario: int, delta: int) -> Optional[int]:
+    """Como sumar_stock_global, sobre una fila de inventario de tienda."""
+    stmt = update(InventarioPV).where(InventarioPV.id_inventario == id_inventario)
+    if delta < 0:
+        stmt = stmt.where(InventarioPV.stock >= -delta)
+    return await _ejecutar(db, stmt.ordered_values(
+        (InventarioPV.stock, func.last_insert_id(InventarioPV.stock + delta)),
+        (InventarioPV.bajo_minimo, InventarioPV.stock < InventarioPV.stock_minimo),
+    ))
@@ -0,0 +1,110 @@
+"""
+Alertas de stock bajo mantenidas como dato.
+
+En lugar de calcular `stock < stock_minimo` con un join y un recorrido
+completo en cada consulta, cada fila de inventario guarda la bandera
+`bajo_minimo` (indexada):
+- Inventario global (`inventario_libro`): el mínimo es `libro.stock_minimo`.
+- Inventario por tienda (`inventario_pv`): el mínimo es su propio `stock_minimo`.
+
+La bandera se actualiza en la misma transacción que cambia el stock
+(ajustar, fijar, movimientos, lotes y ventas por tienda) o el mínimo
+(actualizar libro). Leer las alertas es una búsqueda por índice.
+
+Para recalcular todas las banderas (p. ej. tras cargar datos a mano):
+    python stock_bajo.py
+"""
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from models import InventarioLibro, InventarioPV, Libro, PuntoVenta
+
+
+def esta_bajo(stock: int, minimo) -> bool:
+    return stock < (minimo or 0)
+
+
+def inventario_con_minimo(*condiciones):
+    """
+    SELECT ... FOR UPDATE de una fila de inventario global junto al mínimo
+    y el precio del libro (para los acumulados de ventas), en un solo viaje.
+    Solo se bloquea la fila de inventario.
+    """
+    return (
+        select(InventarioLibro, Libro.stock_minimo, Libro.precio)
+        .join(Libro, Libro.id_libro == InventarioLibro.libro_id)
+        .where(*condiciones)
+        .with_for_update(of=InventarioLibro)
+    )
+
+
+async def recalcular_libro(db, libro_id: int, minimo) -> None:
+    """Actualiza la bandera del inventario global de un libro cuyo mínimo cambió."""
+    await db.execute(
+        update(InventarioLibro)
+        .where(InventarioLibro.libro_id == libro_id)
+        .values(bajo_minimo=InventarioLibro.stock < (minimo or 0))
+        .execution_options(synchronize_session=False)
+    )
+
+
+def consulta_alertas_globales():
+    return (
+        select(
+            InventarioLibro.id_inventario,
+            Libro.nombre.label("libro"),
+            InventarioLibro.stock,
+            Libro.stock_minimo
+        )
+        .select_from(InventarioLibro)
+        .join(Libro, Libro.id_libro == InventarioLibro.libro_id)
+        .where(InventarioLibro.bajo_minimo.is_(True))
+        .order_by(Libro.nombre)
+    )
+
+
+def consulta_alertas_pv(pv=None):
+    stmt = (
+        select(
+            InventarioPV.id_inventario,
+            InventarioPV.id_punto_venta,
+            PuntoVenta.nombre.label("punto_venta"),
+            Libro.nombre.label("libro"),
+            InventarioPV.stock,
+            InventarioPV.stock_minimo
+        )
+        .select_from(InventarioPV)
+        .join(Libro, Libro.id_libro == InventarioPV.id_libro)
+        .join(PuntoVenta, PuntoVenta.id_punto_venta == InventarioPV.id_punto_venta)
+        .where(InventarioPV.bajo_minimo.is_(True))
+    )
+    if pv is not None:
+        stmt = stmt.where(InventarioPV.id_punto_venta == pv)
+    return stmt.order_by(InventarioPV.id_punto_venta, Libro.nombre)
+
+
+def recalcular_todo(db: Session) -> None:
+    """Recalcula todas las banderas (global y por tienda) con dos UPDATE."""
+    db.execute(
+        update(InventarioLibro)
+        .where(InventarioLibro.libro_id == Libro.id_libro)
+        .values(bajo_minimo=InventarioLibro.stock < func.coalesce(Libro.stock_minimo, 0))
+        .execution_options(synchronize_session=False)
+    )
+    db.execute(
+        update(InventarioPV)
+        .values(bajo_minimo=func.coalesce(InventarioPV.stock, 0) < func.coalesce(InventarioPV.stock_minimo, 0))
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+
+if __name__ == "__main__":
+    from database import SessionLocal
+
+    sesion = SessionLocal()
+    try:
+        recalcular_todo(sesion)
+        print("✔ Banderas de stock bajo recalculadas")
+    finally:
+        sesion.close()
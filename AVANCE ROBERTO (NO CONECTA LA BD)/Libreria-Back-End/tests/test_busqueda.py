@@ -0,0 +1,50 @@
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+from busqueda import consulta_relevancia, normalizar, terminos_libro, tokenizar
+from database import get_db_lectura
+from main import app
+
+
+def test_normalizar_quita_tildes_y_enie():
+    assert normalizar("Árbol Ñandú PINGÜINO") == "arbol nandu pinguino"
+
+
+def test_tokenizar_descarta_palabras_cortas():
+    assert tokenizar("El Quijote, tomo 2 de 3") == ["el", "quijote", "tomo", "de"]
+    assert tokenizar(None) == []
+
+
+def test_terminos_suman_el_peso_de_cada_campo():
+    libro = SimpleNamespace(nombre="Cien años", autor="García", categoria="Novela", descripcion="Cien veces")
+    terminos = terminos_libro(libro)
+    assert terminos["cien"] == 3 + 1
+    assert terminos["garcia"] == 2
+    assert terminos["novela"] == 1
+
+
+def test_sin_palabras_indexables_no_hay_consulta():
+    assert consulta_relevancia("a ¿?") is None
+    assert consulta_relevancia("quijote") is not None
+
+
+@pytest.fixture
+def cliente():
+    # Sin palabras indexables el endpoint responde sin tocar la base
+    app.dependency_overrides[get_db_lectura] = lambda: SimpleNamespace(bind=None)
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+@pytest.mark.parametrize("ruta", ["/libros/", "/inventario/"])
+def test_busqueda_vacia_respeta_el_formato(cliente, ruta):
+    respuesta = cliente.get(ruta, params={"q": "a", "formato": "ndjson"})
+    assert respuesta.status_code == 200
+    assert respuesta.headers["content-type"].startswith("application/x-ndjson")
+    assert respuesta.content == b""
+
+    respuesta = cliente.get(ruta, params={"q": "a"})
+    assert respuesta.status_code == 200
+    assert respuesta.json() == []
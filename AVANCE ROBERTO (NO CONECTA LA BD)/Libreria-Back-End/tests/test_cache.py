@@ -0,0 +1,89 @@
+import os
+import uuid
+
+import cache as cache_modulo
+from cache import _FALTA, CacheLRU
+
+
+def _cache(capacidad=10, ttl=60):
+    # Nombre único: cada caché tiene su archivo marcador en CACHE_DIR
+    return CacheLRU(f"prueba-{uuid.uuid4().hex}", capacidad=capacidad, ttl_segundos=ttl)
+
+
+def test_aciertos_y_fallos():
+    cache = _cache()
+    assert cache.obtener(1) is _FALTA
+    cache.guardar(1, {"id": 1}, cache.generacion())
+    assert cache.obtener(1) == {"id": 1}
+    estadisticas = cache.estadisticas()
+    assert (estadisticas["aciertos"], estadisticas["fallos"], estadisticas["entradas"]) == (1, 1, 1)
+    assert estadisticas["tasa_aciertos"] == 0.5
+
+
+def test_descarta_la_entrada_menos_usada():
+    cache = _cache(capacidad=2)
+    for clave in (1, 2):
+        cache.guardar(clave, clave, cache.generacion())
+    cache.obtener(1)
+    cache.guardar(3, 3, cache.generacion())
+    assert cache.obtener(2) is _FALTA
+    assert cache.obtener(1) == 1
+    assert cache.obtener(3) == 3
+
+
+def test_entrada_vencida_es_un_fallo():
+    cache = _cache(ttl=-1)
+    cache.guardar(1, 1, cache.generacion())
+    assert cache.obtener(1) is _FALTA
+    assert cache.estadisticas()["entradas"] == 0
+
+
+def test_no_guarda_lo_leido_antes_de_una_invalidacion():
+    cache = _cache()
+    generacion = cache.generacion()
+    cache.invalidar(1)           # escritura concurrente mientras se cargaba
+    cache.guardar(1, "viejo", generacion)
+    assert cache.obtener(1) is _FALTA
+
+
+def test_invalidar_en_otro_worker_descarta_solo_esas_claves():
+    cache = _cache()
+    otro_worker = CacheLRU(cache.nombre, capacidad=10, ttl_segundos=60)
+    for clave in (1, 2, "__todos__"):
+        cache.guardar(clave, clave, cache.generacion())
+        otro_worker.guardar(clave, clave, otro_worker.generacion())
+    otro_worker.invalidar(1, "__todos__")
+    assert cache.obtener(1) is _FALTA and cache.obtener("__todos__") is _FALTA
+    assert cache.obtener(2) == 2
+    # El que escribió no relee su propia línea como un cambio ajeno
+    assert otro_worker.obtener(2) == 2
+    otro_worker.invalidar(2)
+    assert otro_worker.obtener(2) is _FALTA
+
+
+def test_linea_a_medias_se_aplica_cuando_se_completa():
+    cache = _cache()
+    cache.guardar(1, 1, cache.generacion())
+    with open(cache._marcador, "ab") as marcador:
+        marcador.write(b"[1")
+    assert cache.obtener(1) == 1
+    with open(cache._marcador, "ab") as marcador:
+        marcador.write(b"]\n")
+    assert cache.obtener(1) is _FALTA
+
+
+def test_marcador_se_rota_al_crecer(monkeypatch):
+    monkeypatch.setattr(cache_modulo, "TAMANO_MAXIMO_MARCADOR", 60)
+    cache = _cache()
+    otro_worker = CacheLRU(cache.nombre, capacidad=10, ttl_segundos=60)
+    cache.guardar(9, 9, cache.generacion())
+    for clave in range(8):
+        otro_worker.invalidar(clave)
+    assert os.path.getsize(cache._marcador) <= 60
+    # Al ver otro archivo no sabe qué se invalidó en el anterior: vacía una vez
+    assert cache.obtener(9) is _FALTA
+    # Con el archivo nuevo vuelve a descartar solo las claves invalidadas
+    monkeypatch.setattr(cache_modulo, "TAMANO_MAXIMO_MARCADOR", 64 * 1024)
+    cache.guardar(9, 9, cache.generacion())
+    otro_worker.invalidar(1)
+    assert cache.obtener(9) == 9
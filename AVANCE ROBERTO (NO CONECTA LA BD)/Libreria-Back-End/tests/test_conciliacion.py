@@ -0,0 +1,62 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select, text
+from sqlalchemy.orm import Session
+
+from conciliacion import conciliar, stock_al
+from models import DescuadreStock, StockPuntoControl
+
+DIA_1 = datetime(2025, 1, 10)
+
+
+def _movimiento(db, inventario_id, tipo, cantidad, fecha, punto_venta_id=None):
+    db.execute(text(
+        "INSERT INTO movimiento_libro (inventario_id, tipo, cantidad, punto_venta_id, fecha_movimiento) "
+        "VALUES (:inventario, :tipo, :cantidad, :pv, :fecha)"
+    ), {"inventario": inventario_id, "tipo": tipo, "cantidad": cantidad, "pv": punto_venta_id, "fecha": fecha})
+
+
+@pytest.fixture
+def db(mysql):
+    with Session(mysql) as sesion:
+        sesion.execute(text("INSERT INTO punto_venta (id_punto_venta, nombre) VALUES (1, 'Centro')"))
+        sesion.execute(text("INSERT INTO libro (id_libro, nombre, precio) VALUES (1, 'Uno', 100), (2, 'Dos', 100)"))
+        sesion.execute(text(
+            "INSERT INTO inventario_libro (id_inventario, libro_id, stock) VALUES (1, 1, 10), (2, 2, 5)"
+        ))
+        _movimiento(sesion, 1, "entrada", 10, DIA_1 - timedelta(hours=14))
+        _movimiento(sesion, 2, "entrada", 5, DIA_1 - timedelta(hours=14))
+        sesion.commit()
+        yield sesion
+
+
+def test_conciliacion_y_stock_a_una_fecha(db):
+    # Primera corrida: toma como bueno el stock registrado
+    assert conciliar(db, DIA_1) == {"revisados": 2, "puntos": 2, "descuadres": 0}
+    assert db.scalar(select(StockPuntoControl.stock).where(StockPuntoControl.inventario_id == 1)) == 10
+
+    # Una venta registrada, una venta de tienda (no toca el global) y un UPDATE manual sin movimiento
+    _movimiento(db, 1, "venta", 3, DIA_1 + timedelta(hours=2))
+    _movimiento(db, 1, "venta", 4, DIA_1 + timedelta(hours=3), punto_venta_id=1)
+    db.execute(text("UPDATE inventario_libro SET stock = 7 WHERE id_inventario = 1"))
+    db.execute(text("UPDATE inventario_libro SET stock = 9 WHERE id_inventario = 2"))
+    db.commit()
+
+    dia_2 = DIA_1 + timedelta(days=1)
+    assert conciliar(db, dia_2) == {"revisados": 2, "puntos": 1, "descuadres": 1}
+    descuadre, = db.scalars(select(DescuadreStock)).all()
+    assert (descuadre.inventario_id, descuadre.stock_registrado, descuadre.stock_libro_mayor) == (2, 9, 5)
+
+    assert stock_al(db, 1, DIA_1 + timedelta(hours=1))["stock"] == 10
+    assert stock_al(db, 1, DIA_1 + timedelta(hours=5))["stock"] == 7
+    assert stock_al(db, 1, DIA_1 - timedelta(days=1))["stock"] == 0
+
+    with pytest.raises(ValueError):
+        conciliar(db, DIA_1)
+
+    # Corregido el stock, el descuadre desaparece en la siguiente vuelta
+    db.execute(text("UPDATE inventario_libro SET stock = 5 WHERE id_inventario = 2"))
+    db.commit()
+    assert conciliar(db, dia_2 + timedelta(days=1))["descuadres"] == 0
+    assert db.scalars(select(DescuadreStock)).all() == []
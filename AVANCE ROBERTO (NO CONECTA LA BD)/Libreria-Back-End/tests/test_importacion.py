@@ -0,0 +1,123 @@
+import io
+import threading
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+import importacion
+
+CSV = (
+    "nombre,autor,precio,stock_minimo,stock\n"
+    "Uno,Ana,100,2,5\n"
+    "Negativo,Ana,100,0,-1\n"
+    "Carísimo,Ana,99999999999,0,1\n"
+    "Dos,Beto,200,0,0\n"
+).encode()
+
+
+class _SesionFalsa:
+    """Solo lo que usa `importar` fuera de insertar_lote: la tabla papel y los rollback."""
+
+    def __init__(self):
+        self.rollbacks = 0
+
+    def scalars(self, stmt):
+        return []
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+def _importar(db, contenido=CSV):
+    rechazos = []
+    totales = importacion.importar(db, io.BytesIO(contenido), "csv", lambda linea, e: rechazos.append((linea, e)))
+    return totales, rechazos
+
+
+def test_lote_rechazado_se_reintenta_de_a_una_fila(monkeypatch):
+    lotes = []
+
+    def insertar_lote(db, lote):
+        lotes.append([fila["nombre"] for fila in lote])
+        if any(fila["precio"] > 2 ** 31 for fila in lote):
+            raise OperationalError("INSERT", {}, Exception("Out of range value for column 'precio'"))
+
+    monkeypatch.setattr(importacion, "insertar_lote", insertar_lote)
+    totales, rechazos = _importar(_SesionFalsa())
+
+    assert totales == {"leidos": 4, "insertados": 2, "rechazados": 2}
+    assert lotes == [["Uno", "Carísimo", "Dos"], ["Uno"], ["Carísimo"], ["Dos"]]
+    # Cada rechazo con su número de línea del archivo (la 1 es la cabecera)
+    assert [linea for linea, _ in rechazos] == [3, 4]
+    assert rechazos[0][1] == ["stock: no puede ser negativo"]
+    assert rechazos[1][1][0].startswith("Error de base de datos: Out of range")
+
+
+def test_lotes_de_tamano_fijo(monkeypatch):
+    lotes = []
+    monkeypatch.setattr(importacion, "TAMANO_LOTE", 2)
+    monkeypatch.setattr(importacion, "insertar_lote", lambda db, lote: lotes.append(len(lote)))
+    contenido = b"nombre,precio\n" + b"".join(f"L{i},10\n".encode() for i in range(5))
+    assert _importar(_SesionFalsa(), contenido)[0]["insertados"] == 5
+    assert lotes == [2, 2, 1]
+
+
+def test_importacion_contra_mysql(mysql):
+    with Session(mysql) as db:
+        totales, rechazos = _importar(db)
+        assert totales == {"leidos": 4, "insertados": 2, "rechazados": 2}
+        assert [linea for linea, _ in rechazos] == [3, 4]
+
+        filas = db.execute(text(
+            "SELECT l.nombre, i.stock, i.bajo_minimo, "
+            "  (SELECT COALESCE(SUM(m.cantidad), 0) FROM movimiento_libro m WHERE m.inventario_id = i.id_inventario) "
+            "FROM libro l JOIN inventario_libro i ON i.libro_id = l.id_libro ORDER BY l.nombre"
+        )).all()
+        assert filas == [("Dos", 0, 0, 0), ("Uno", 5, 0, 5)]
+        assert db.execute(text(
+            "SELECT COUNT(*) FROM libro_termino t JOIN libro l ON l.id_libro = t.libro_id WHERE t.termino = 'ana'"
+        )).scalar() == 1
+
+
+def test_alta_de_la_api_durante_la_importacion(mysql, monkeypatch):
+    alta = {}
+
+    def alta_concurrente():
+        # Como POST /libros/: el id lo asigna el AUTO_INCREMENT
+        try:
+            with mysql.begin() as conn:
+                alta["id"] = conn.execute(text(
+                    "INSERT INTO libro (nombre, precio) VALUES ('Desde la API', 10)"
+                )).lastrowid
+        except Exception as error:
+            alta["error"] = error
+
+    hilo = threading.Thread(target=alta_concurrente)
+    terminos_libro = importacion.terminos_libro
+
+    def terminos_con_alta(campos):
+        # Con el lote insertado y sin commit: el alta queda esperando el bloqueo
+        if not alta.get("iniciada"):
+            alta["iniciada"] = True
+            hilo.start()
+            hilo.join(0.5)
+            assert hilo.is_alive()
+        return terminos_libro(campos)
+
+    monkeypatch.setattr(importacion, "terminos_libro", terminos_con_alta)
+    contenido = b"nombre,precio,stock\n" + b"".join(f"L{i},10,{i}\n".encode() for i in range(1, 6))
+    with Session(mysql) as db:
+        assert _importar(db, contenido)[0]["insertados"] == 5
+    hilo.join(10)
+
+    assert "error" not in alta
+    with mysql.connect() as conn:
+        assert conn.execute(text("SELECT MAX(id_libro) FROM libro")).scalar() == alta["id"]
+        # Cada inventario y su entrada corresponden a su libro importado
+        assert conn.execute(text(
+            "SELECT l.nombre, i.stock, m.cantidad FROM libro l "
+            "JOIN inventario_libro i ON i.libro_id = l.id_libro "
+            "JOIN movimiento_libro m ON m.inventario_id = i.id_inventario ORDER BY l.nombre"
+        )).all() == [(f"L{i}", i, i) for i in range(1, 6)]
@@ -0,0 +1,174 @@
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.dialects import mysql
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.sql.dml import Insert
+
+import libro_mayor
+from libro_mayor import aplicar_movimientos
+from models import MovimientoLibro
+from schemas import MovimientoCreate
+
+
+def _inventario(id_inventario, libro_id, stock, minimo, precio):
+    return SimpleNamespace(
+        InventarioLibro=SimpleNamespace(id_inventario=id_inventario, libro_id=libro_id, stock=stock, bajo_minimo=False),
+        stock_minimo=minimo, precio=precio,
+    )
+
+
+class _Escalares(list):
+    def all(self):
+        return list(self)
+
+
+class _SesionFalsa:
+    """Responde el bloqueo de inventarios, los usuarios, el INSERT y la lectura de ids."""
+
+    def __init__(self, inventarios, usuarios, ids):
+        self.inventarios = inventarios
+        self.usuarios = usuarios
+        self.ids = ids
+        self.insertadas = None
+        self.sql = []
+
+    async def execute(self, stmt):
+        sql = str(stmt.compile(dialect=mysql.dialect()))
+        self.sql.append(sql)
+        if isinstance(stmt, Insert):
+            self.insertadas = stmt.compile().params
+            return SimpleNamespace(lastrowid=self.ids[0])
+        return self.inventarios
+
+    async def scalars(self, stmt):
+        sql = str(stmt.compile(dialect=mysql.dialect()))
+        self.sql.append(sql)
+        return _Escalares(self.usuarios if sql.startswith("SELECT usuario.") else self.ids)
+
+
+@pytest.fixture
+def efectos(monkeypatch):
+    """Ventas acumuladas y puntos de control corregidos; enero de 2024 está archivado."""
+    registro = {"ventas": [], "pasadas": []}
+
+    async def acumular_ventas(db, ventas):
+        registro["ventas"] += ventas
+
+    async def corregir_puntos(db, pasadas):
+        registro["pasadas"] += pasadas
+
+    monkeypatch.setattr(libro_mayor, "acumular_ventas", acumular_ventas)
+    monkeypatch.setattr(libro_mayor, "corregir_puntos", corregir_puntos)
+    monkeypatch.setattr(libro_mayor, "fecha_admitida", lambda fecha: fecha is None or fecha >= datetime(2024, 2, 1))
+    return registro
+
+
+def _linea(inventario_id, tipo, cantidad, **extra):
+    return MovimientoCreate(inventario_id=inventario_id, tipo=tipo, cantidad=cantidad, **extra)
+
+
+def test_lote_con_lineas_aceptadas_y_rechazadas(efectos):
+    marzo = datetime(2024, 3, 1)
+    lineas = [
+        _linea(1, "venta", 3),                              # quedan 2
+        _linea(1, "venta", 3),
+        _linea(9, "entrada", 1),
+        _linea(2, "salida", 1, usuario_id=77),
+        _linea(1, "entrada", 4, usuario_id=5),
+        _linea(2, "ajuste", 1, fecha_movimiento=datetime(2024, 1, 15)),
+        _linea(2, "entrada", 2, fecha_movimiento=marzo),
+    ]
+    # Ids no consecutivos (auto_increment_increment = 2 y otro nodo escribiendo)
+    db = _SesionFalsa([_inventario(1, 10, 5, 3, 100), _inventario(2, 20, 0, 0, 50)], {5}, [101, 103, 107])
+    resultados, insertadas = asyncio.run(aplicar_movimientos(db, lineas))
+
+    assert [(r.ok, r.detalle, r.stock_resultante) for r in resultados] == [
+        (True, None, 2),
+        (False, "Stock insuficiente", None),
+        (False, "Inventario no existe", None),
+        (False, "Usuario no existe", None),
+        (True, None, 6),
+        (False, "Mes archivado", None),
+        (True, None, 2),
+    ]
+    assert {indice: fila["id_mov_libro"] for indice, fila in insertadas.items()} == {0: 101, 4: 103, 6: 107}
+    assert insertadas[4]["usuario_id"] == 5
+    # Un solo INSERT de varias filas, en el orden de las líneas aceptadas
+    assert [valor for clave, valor in sorted(db.insertadas.items()) if clave.startswith("cantidad")] == [3, 4, 2]
+    lectura = db.sql[-1]
+    assert "movimiento_libro.id_mov_libro >= %s" in lectura and "punto_venta_id IS NULL" in lectura
+    assert [(libro, cantidad, precio) for _, libro, _, cantidad, precio in efectos["ventas"]] == [(10, 3, 100)]
+    assert efectos["pasadas"] == [(2, marzo, 2)]
+
+
+def test_todas_rechazadas_no_inserta(efectos):
+    db = _SesionFalsa([_inventario(1, 10, 0, 0, 100)], set(), [])
+    resultados, insertadas = asyncio.run(aplicar_movimientos(db, [_linea(1, "venta", 1), _linea(2, "venta", 1)]))
+    assert not any(r.ok for r in resultados) and insertadas == {}
+    assert not any(sql.startswith("INSERT") for sql in db.sql)
+
+
+def test_ids_leidos_que_no_coinciden_fallan(efectos):
+    db = _SesionFalsa([_inventario(1, 10, 5, 0, 100)], set(), [101])
+    with pytest.raises(RuntimeError, match="se leyeron 1"):
+        asyncio.run(aplicar_movimientos(db, [_linea(1, "entrada", 1), _linea(1, "entrada", 1)]))
+
+
+class _ConInsercionesAjenas:
+    """Sesión que, justo después del INSERT del libro mayor, deja que otra conexión escriba."""
+
+    def __init__(self, db, al_insertar):
+        self.db = db
+        self.al_insertar = al_insertar
+
+    async def execute(self, stmt, *args, **kwargs):
+        resultado = await self.db.execute(stmt, *args, **kwargs)
+        if isinstance(stmt, Insert) and stmt.table is MovimientoLibro.__table__:
+            await asyncio.to_thread(self.al_insertar)
+        return resultado
+
+    def __getattr__(self, nombre):
+        return getattr(self.db, nombre)
+
+
+def test_lectura_de_ids_con_inserciones_concurrentes(mysql):
+    with mysql.begin() as conn:
+        conn.execute(text("INSERT INTO punto_venta (id_punto_venta, nombre) VALUES (1, 'Centro')"))
+        conn.execute(text("INSERT INTO libro (id_libro, nombre, precio) VALUES (1, 'Uno', 100), (2, 'Dos', 100)"))
+        conn.execute(text(
+            "INSERT INTO inventario_libro (id_inventario, libro_id, stock) VALUES (1, 1, 10), (2, 2, 10)"
+        ))
+
+    def inserciones_ajenas():
+        # Lo que puede escribir otra transacción sin el bloqueo del inventario 1:
+        # una venta de tienda del mismo libro y un movimiento de otro inventario
+        with mysql.begin() as conn:
+            conn.execute(text(
+                "INSERT INTO movimiento_libro (inventario_id, tipo, cantidad, punto_venta_id, fecha_movimiento) "
+                "VALUES (1, 'venta', 1, 1, NOW()), (2, 'entrada', 1, NULL, NOW())"
+            ))
+
+    motor = create_async_engine(mysql.url.set(drivername="mysql+aiomysql"))
+
+    async def probar():
+        async with AsyncSession(motor) as db:
+            lineas = [_linea(1, "venta", 2, observaciones="lote"), _linea(1, "entrada", 1, observaciones="lote")]
+            _, insertadas = await aplicar_movimientos(_ConInsercionesAjenas(db, inserciones_ajenas), lineas)
+            await db.commit()
+            propios = (await db.scalars(text(
+                "SELECT id_mov_libro FROM movimiento_libro WHERE observaciones = 'lote' ORDER BY id_mov_libro"
+            ))).all()
+            posteriores = await db.scalar(text(
+                "SELECT COUNT(*) FROM movimiento_libro WHERE id_mov_libro > :desde"
+            ), {"desde": propios[0]})
+        await motor.dispose()
+        return insertadas, propios, posteriores
+
+    insertadas, propios, posteriores = asyncio.run(probar())
+    assert [insertadas[i]["id_mov_libro"] for i in (0, 1)] == propios
+    # Las dos filas ajenas tienen ids mayores que el primero del lote y no se tomaron como propias
+    assert posteriores == 3
@@ -0,0 +1,100 @@
+import pytest
+from sqlalchemy import create_engine, text
+
+import migraciones
+from conftest import TEST_MYSQL_URL, base_temporal
+from migraciones import EsquemaDesactualizado, Migracion
+
+
+def test_sentencias_sin_comentarios_y_separadas_por_punto_y_coma(tmp_path):
+    ruta = tmp_path / "0001_prueba.sql"
+    ruta.write_text(
+        "-- comentario; con punto y coma\n"
+        "CREATE TABLE a (\n  id INT  -- no es un comentario de línea completa\n);\n"
+        "\n"
+        "  -- otro comentario\n"
+        "INSERT INTO a VALUES (1); \n"
+        "UPDATE a SET id = 2 WHERE id = 1\n",
+        encoding="utf-8",
+    )
+    sentencias = Migracion(1, "prueba", ruta).sentencias()
+    assert sentencias == [
+        "CREATE TABLE a (\n  id INT  -- no es un comentario de línea completa\n)",
+        "INSERT INTO a VALUES (1)",
+        "UPDATE a SET id = 2 WHERE id = 1",
+    ]
+
+
+def test_versiones_publicadas_son_correlativas():
+    publicadas = migraciones.disponibles()
+    assert [m.version for m in publicadas] == list(range(1, len(publicadas) + 1))
+    assert all(m.sentencias() for m in publicadas)
+
+
+def test_version_repetida(tmp_path, monkeypatch):
+    for nombre in ("0001_a.sql", "0001_b.sql"):
+        (tmp_path / nombre).write_text("SELECT 1;\n", encoding="utf-8")
+    monkeypatch.setattr(migraciones, "DIRECTORIO", tmp_path)
+    with pytest.raises(RuntimeError):
+        migraciones.disponibles()
+
+
+def test_verificar_compara_con_la_version_esperada(monkeypatch):
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(text(f"CREATE TABLE {migraciones.TABLA_VERSION} (version INT, nombre TEXT)"))
+        conn.execute(text(f"INSERT INTO {migraciones.TABLA_VERSION} VALUES (3, 'x')"))
+    monkeypatch.setattr(migraciones, "version_esperada", lambda: 3)
+    assert migraciones.verificar(engine) == 3
+    monkeypatch.setattr(migraciones, "version_esperada", lambda: 4)
+    with pytest.raises(EsquemaDesactualizado, match="migraciones.py"):
+        migraciones.verificar(engine)
+    monkeypatch.setattr(migraciones, "version_esperada", lambda: 2)
+    with pytest.raises(EsquemaDesactualizado, match="posterior"):
+        migraciones.verificar(engine)
+
+
+@pytest.mark.skipif(not TEST_MYSQL_URL, reason="Definí TEST_MYSQL_URL para las pruebas contra MySQL")
+def test_base_inicial_con_datos_llega_a_la_ultima_version():
+    with base_temporal(hasta=1) as engine:
+        with engine.begin() as conn:
+            # Datos como los dejaba la API anterior, con pares (tienda, libro) e
+            # inventarios globales de un mismo libro repetidos
+            conn.execute(text("INSERT INTO punto_venta (id_punto_venta, nombre) VALUES (1, 'Centro')"))
+            conn.execute(text(
+                "INSERT INTO libro (id_libro, nombre, autor, precio, stock_minimo) "
+                "VALUES (1, 'Uno', 'A', 100, 10), (2, 'Dos', 'B', 100, NULL)"
+            ))
+            conn.execute(text(
+                "INSERT INTO inventario_libro (id_inventario, libro_id, stock) VALUES (1, 1, 4), (2, 2, 50), (3, 1, 3)"
+            ))
+            conn.execute(text(
+                "INSERT INTO inventario_pv (id_inventario, id_libro, id_punto_venta, stock, stock_minimo) "
+                "VALUES (1, 1, 1, 3, 5), (2, 1, 1, 4, 8), (3, 2, 1, NULL, NULL)"
+            ))
+            conn.execute(text(
+                "INSERT INTO movimiento_libro (inventario_id, tipo, cantidad, fecha_movimiento) "
+                "VALUES (1, 'entrada', 4, NOW()), (2, 'entrada', 50, NOW()), (3, 'entrada', 3, NOW())"
+            ))
+
+        aplicadas = migraciones.aplicar(engine)
+        assert [m.version for m in aplicadas] == list(range(2, migraciones.version_esperada() + 1))
+        assert migraciones.verificar(engine) == migraciones.version_esperada()
+        assert migraciones.aplicar(engine) == []
+
+        with engine.connect() as conn:
+            assert conn.execute(text(
+                "SELECT id_inventario, stock, stock_minimo, bajo_minimo FROM inventario_pv ORDER BY id_inventario"
+            )).all() == [(1, 7, 8, 1), (3, None, None, 0)]
+            # El inventario repetido se suma al de menor id y sus movimientos lo siguen
+            assert conn.execute(text(
+                "SELECT id_inventario, stock, bajo_minimo FROM inventario_libro ORDER BY id_inventario"
+            )).all() == [(1, 7, 1), (2, 50, 0)]
+            assert conn.execute(text(
+                "SELECT inventario_id, COUNT(*) FROM movimiento_libro WHERE punto_venta_id IS NULL "
+                "GROUP BY inventario_id ORDER BY inventario_id"
+            )).all() == [(1, 2), (2, 1)]
+            with pytest.raises(Exception):
+                conn.execute(text(
+                    "INSERT INTO inventario_pv (id_libro, id_punto_venta, stock, stock_minimo) VALUES (1, 1, 1, 1)"
+                ))
@@ -0,0 +1,77 @@
+import asyncio
+import base64
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException, Response
+from sqlalchemy import column, select, table
+from sqlalchemy.dialects import mysql
+
+from paginacion import CABECERA_CURSOR, codificar_cursor, decodificar_cursor, filtro_keyset, paginar
+
+
+def _sql(condicion) -> str:
+    return str(condicion.compile(dialect=mysql.dialect(), compile_kwargs={"literal_binds": True}))
+
+
+def test_cursor_ida_y_vuelta():
+    fecha = datetime(2025, 3, 1, 12, 30, 15)
+    cursor = codificar_cursor(fecha, 42, "Ñandú")
+    assert "=" not in cursor
+    assert decodificar_cursor(cursor, [datetime, int, str]) == [fecha, 42, "Ñandú"]
+
+
+@pytest.mark.parametrize("cursor", [
+    "no-es-base64!",
+    base64.urlsafe_b64encode(b'{"a":1}').decode(),   # no es una lista
+    codificar_cursor(1),                              # menos componentes
+    codificar_cursor("1", 2),                         # tipo incorrecto
+    codificar_cursor(True, 2),                        # bool no vale como int
+])
+def test_cursor_manipulado_da_400(cursor):
+    with pytest.raises(HTTPException) as error:
+        decodificar_cursor(cursor, [int, int])
+    assert error.value.status_code == 400
+
+
+def test_filtro_keyset_expande_el_orden_compuesto():
+    a, b = column("a"), column("b")
+    assert _sql(filtro_keyset([a, b], [5, 9])) == "a > 5 OR a = 5 AND b > 9"
+    assert _sql(filtro_keyset([a, b], [5, 9], descendente=True)) == "a < 5 OR a = 5 AND b < 9"
+
+
+class _Resultado:
+    def __init__(self, filas):
+        self._filas = filas
+
+    def all(self):
+        return self._filas
+
+
+class _SesionFalsa:
+    """Devuelve las filas `[desde, desde + limit)` según el LIMIT de la sentencia."""
+
+    def __init__(self, filas):
+        self.filas = filas
+        self.limites = []
+
+    async def execute(self, stmt):
+        limite = stmt._limit_clause.value
+        self.limites.append(limite)
+        return _Resultado(self.filas[:limite])
+
+
+def test_paginar_publica_el_cursor_solo_si_hay_mas():
+    stmt = select(column("id")).select_from(table("libro"))
+    sesion = _SesionFalsa([(i,) for i in range(10, 0, -1)])
+
+    respuesta = Response()
+    filas = asyncio.run(paginar(sesion, stmt, 4, respuesta, lambda fila: [fila[0]]))
+    assert filas == [(10,), (9,), (8,), (7,)]
+    assert sesion.limites == [5]
+    assert decodificar_cursor(respuesta.headers[CABECERA_CURSOR], [int]) == [7]
+
+    respuesta = Response()
+    filas = asyncio.run(paginar(sesion, stmt, 10, respuesta, lambda fila: [fila[0]]))
+    assert len(filas) == 10
+    assert CABECERA_CURSOR not in respuesta.headers
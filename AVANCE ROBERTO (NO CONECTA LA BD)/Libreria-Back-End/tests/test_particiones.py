@@ -0,0 +1,195 @@
+import gzip
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+import pytest
+
+import particiones
+
+_CAMPOS = [columna.key for columna in particiones._COLUMNAS_ARCHIVO]
+
+
+class _Fila(namedtuple("_Fila", _CAMPOS)):
+    @property
+    def _mapping(self):
+        return self._asdict()
+
+
+class _ConexionFalsa:
+    """
+    Lo que usa _archivar_particion de una conexión: el SELECT en streaming
+    (sobre la instantánea de su transacción), el COUNT, los bloqueos y el DROP.
+    `durante_volcado` se llama después del primer lote de cada volcado.
+    """
+
+    def __init__(self, filas, durante_volcado=None):
+        self.filas = filas
+        self.durante_volcado = durante_volcado
+        self.sql = []
+
+    def execution_options(self, **opciones):
+        return self
+
+    def execute(self, stmt):
+        return self
+
+    def partitions(self, tamano):
+        instantanea = list(self.filas)
+        for inicio in range(0, len(instantanea), tamano):
+            yield instantanea[inicio:inicio + tamano]
+            if inicio == 0 and self.durante_volcado:
+                self.durante_volcado(self)
+
+    def scalar(self):
+        self.sql.append(f"COUNT {len(self.filas)}")
+        return len(self.filas)
+
+    def rollback(self):
+        pass
+
+    def exec_driver_sql(self, sql):
+        self.sql.append(sql)
+
+
+def _movimientos(desde: datetime, primer_id: int, cantidad: int):
+    return [
+        _Fila(
+            id_mov_libro=primer_id + i, inventario_id=1, tipo="venta" if i % 3 else "entrada", cantidad=1,
+            usuario_id=None, punto_venta_id=None, fecha_movimiento=desde + timedelta(hours=i // 2),
+            observaciones=None, libro_id=1, libro="Uno", usuario=None, punto_venta=None,
+        )
+        for i in range(cantidad)
+    ]
+
+
+@pytest.fixture
+def directorio(tmp_path, monkeypatch):
+    """ARCHIVO_DIR y manifiesto vacíos, propios de la prueba."""
+    monkeypatch.setattr(particiones, "ARCHIVO_DIR", tmp_path)
+    monkeypatch.setattr(particiones, "MANIFIESTO", tmp_path / "manifiesto.json")
+    monkeypatch.setattr(particiones, "_manifiesto", {"mtime": None, "datos": {"meses": []}})
+
+
+@pytest.fixture
+def archivo(directorio, monkeypatch):
+    """Enero (50 filas) y febrero (9) archivados en tramos de 7 filas."""
+    monkeypatch.setattr(particiones, "TAMANO_TRAMO", 7)
+    enero = _movimientos(datetime(2024, 1, 1), 1, 50)
+    febrero = _movimientos(datetime(2024, 2, 1), 51, 9)
+    for nombre, filas in (("p202401", enero), ("p202402", febrero)):
+        conexion = _ConexionFalsa(filas)
+        particiones._archivar_particion(conexion, nombre)
+        assert conexion.sql == [
+            "LOCK TABLES movimiento_libro WRITE", f"COUNT {len(filas)}",
+            f"ALTER TABLE movimiento_libro DROP PARTITION {nombre}", "UNLOCK TABLES",
+        ]
+    return [fila._asdict() for fila in enero + febrero]
+
+
+def _claves(filas):
+    return [(fila["fecha_movimiento"], fila["id_mov_libro"]) for fila in filas]
+
+
+def test_cada_tramo_es_un_miembro_gzip(archivo):
+    enero, febrero = particiones.manifiesto()["meses"]
+    assert [t["filas"] for t in enero["tramos"]] == [7] * 7 + [1]
+    assert [t["filas"] for t in febrero["tramos"]] == [7, 2]
+    assert particiones.frontera_lectura() == datetime(2024, 3, 1)
+    # El archivo completo sigue siendo un .gz válido
+    with gzip.open(particiones.ARCHIVO_DIR / enero["archivo"], "rt", encoding="utf-8") as completo:
+        assert sum(1 for _ in completo) == 50
+
+
+@pytest.mark.parametrize("tipo", [None, "venta", "entrada"])
+def test_paginas_hacia_atras_recorren_todo_en_orden(archivo, tipo):
+    esperado = sorted(
+        ((f["fecha_movimiento"], f["id_mov_libro"]) for f in archivo if tipo is None or f["tipo"] == tipo),
+        reverse=True,
+    )
+    vistos, cursor = [], None
+    while True:
+        pagina = particiones.pagina_archivada(cursor, 4, tipo)
+        vistos += _claves(pagina)
+        if len(pagina) < 4:
+            break
+        cursor = vistos[-1]
+    assert vistos == esperado
+
+
+@pytest.fixture
+def leidos(monkeypatch):
+    """(mes, primer tramo, último tramo) de cada lectura del archivo."""
+    registro = []
+    leer = particiones._leer
+
+    def registrar(entrada, primero=0, ultimo=None):
+        registro.append((entrada["mes"], primero, ultimo))
+        return leer(entrada, primero, ultimo)
+
+    monkeypatch.setattr(particiones, "_leer", registrar)
+    return registro
+
+
+def test_una_pagina_solo_descomprime_los_tramos_que_necesita(archivo, leidos):
+    # Cursor en la fila 20 de enero (tramo 2): se leen los tramos 2 y 1, no el mes entero
+    cursor = _claves(archivo)[20]
+    pagina = particiones.pagina_archivada(cursor, 10)
+    assert _claves(pagina) == _claves(archivo)[10:20][::-1]
+    assert leidos == [("2024-01", 2, 2), ("2024-01", 1, 1)]
+
+
+def test_lotes_de_un_rango_empiezan_en_su_tramo(archivo, leidos):
+    desde, hasta = datetime(2024, 1, 1, 10), datetime(2024, 2, 1, 3)
+    lotes = list(particiones.lotes_archivados(desde, hasta, lambda fila: fila["tipo"] == "venta", 5))
+    filas = [fila for lote in lotes for fila in lote]
+    assert _claves(filas) == _claves(
+        f for f in archivo if desde <= f["fecha_movimiento"] < hasta and f["tipo"] == "venta"
+    )
+    assert len(lotes) > 2 and all(len(lote) == 5 for lote in lotes[:-1])
+    # Las 10:00 del 1 de enero empiezan en el tramo 2 (filas 14 a 20); febrero, desde el principio
+    assert leidos == [("2024-01", 2, None), ("2024-02", 0, None)]
+
+
+def test_mes_archivado_antes_de_los_tramos(archivo):
+    datos = particiones.manifiesto()
+    for entrada in datos["meses"]:
+        del entrada["tramos"]
+    particiones._guardar_manifiesto(datos)
+    particiones._manifiesto["mtime"] = None
+    cursor = _claves(archivo)[55]
+    assert _claves(particiones.pagina_archivada(cursor, 8)) == _claves(archivo)[47:55][::-1]
+
+
+def test_movimiento_que_entra_durante_el_volcado_se_archiva(directorio, monkeypatch):
+    monkeypatch.setattr(particiones, "TAMANO_LOTE", 4)
+    tardio = _movimientos(datetime(2024, 1, 31, 23), 99, 1)[0]
+
+    def commit_tardio(conexion):
+        # Una venta que pasó fecha_admitida antes del cambio de manifiesto hace commit ahora
+        if tardio not in conexion.filas:
+            conexion.filas.append(tardio)
+
+    conexion = _ConexionFalsa(_movimientos(datetime(2024, 1, 1), 1, 10), commit_tardio)
+    entrada = particiones._archivar_particion(conexion, "p202401")
+
+    assert entrada["filas"] == 11
+    assert conexion.sql == [
+        "LOCK TABLES movimiento_libro WRITE", "COUNT 11", "UNLOCK TABLES",
+        "LOCK TABLES movimiento_libro WRITE", "COUNT 11",
+        "ALTER TABLE movimiento_libro DROP PARTITION p202401", "UNLOCK TABLES",
+    ]
+    assert particiones.pagina_archivada(None, 1)[0]["id_mov_libro"] == 99
+
+
+def test_si_siguen_entrando_movimientos_no_borra_la_particion(directorio, monkeypatch):
+    monkeypatch.setattr(particiones, "TAMANO_LOTE", 4)
+    siguiente = iter(range(100, 200))
+
+    def siempre_uno_mas(conexion):
+        conexion.filas.append(_movimientos(datetime(2024, 1, 31, 23), next(siguiente), 1)[0])
+
+    conexion = _ConexionFalsa(_movimientos(datetime(2024, 1, 1), 1, 10), siempre_uno_mas)
+    with pytest.raises(RuntimeError, match="no se borró"):
+        particiones._archivar_particion(conexion, "p202401")
+    assert not any("DROP PARTITION" in sql for sql in conexion.sql)
+    assert particiones.manifiesto()["meses"][0]["estado"] == "archivando"
@@ -0,0 +1,81 @@
+import random
+
+import numpy as np
+
+from reimpresion import armar_plan, planificar
+
+
+def _planificar_uno_por_uno(paginas, faltante, prioridad, papel_paginas, papel_stock):
+    """Misma regla con un ciclo por libro: referencia para la versión con arreglos."""
+    restante = dict(zip(papel_paginas, papel_stock))
+    ejemplares = [0] * len(paginas)
+    orden = sorted(range(len(paginas)), key=lambda i: -prioridad[i])
+    for i in orden:
+        if paginas[i] <= 0 or paginas[i] not in restante:
+            continue
+        pedido = faltante[i] * paginas[i]
+        asignadas = max(min(pedido, restante[paginas[i]]), 0)
+        ejemplares[i] = asignadas // paginas[i]
+        restante[paginas[i]] -= pedido
+    return ejemplares
+
+
+def test_reparte_por_prioridad_dentro_de_cada_papel():
+    paginas = np.array([100, 100, 100, 200, 300, 0])
+    faltante = np.array([5, 8, 4, 3, 2, 9])
+    prioridad = np.array([0.5, 0.8, 0.2, 1.0, 1.0, 1.0])
+    ejemplares, papel = planificar(paginas, faltante, prioridad, np.array([100, 200]), np.array([1000, 10_000]))
+    # Papel de 100: primero 8 ejemplares (800 páginas), al siguiente le alcanzan 2 de 5, al último nada
+    assert ejemplares.tolist() == [2, 8, 0, 3, 0, 0]
+    # Sin papel de 300 páginas ni páginas cargadas: grupo extra
+    assert papel.tolist() == [0, 0, 0, 1, 2, 2]
+
+
+def test_igual_que_un_libro_a_la_vez():
+    azar = random.Random(7)
+    for _ in range(50):
+        papel_paginas = sorted(azar.sample(range(50, 600, 50), 4))
+        papel_stock = [azar.randint(0, 5000) for _ in papel_paginas]
+        libros = azar.randint(0, 40)
+        paginas = [azar.choice(papel_paginas + [0, 999]) for _ in range(libros)]
+        faltante = [azar.randint(0, 20) for _ in range(libros)]
+        # Prioridades distintas: el orden entre empates no está definido
+        prioridad = azar.sample(range(1000), libros)
+        ejemplares, _ = planificar(
+            np.array(paginas, dtype=np.int64), np.array(faltante, dtype=np.int64),
+            np.array(prioridad, dtype=np.float64),
+            np.array(papel_paginas, dtype=np.int64), np.array(papel_stock, dtype=np.int64),
+        )
+        assert ejemplares.tolist() == _planificar_uno_por_uno(
+            paginas, faltante, prioridad, papel_paginas, papel_stock
+        )
+
+
+def test_plan_completo():
+    libros = [
+        # id, nombre, páginas por libro, stock, mínimo
+        (1, "Uno", 100, 2, 10),
+        (2, "Dos", 100, 0, 4),
+        (3, "Tres", None, 0, 5),
+        (4, "Cuatro", 200, 8, 8),
+    ]
+    papeles = [(100, "Bond 100", 700), (200, "Bond 200", 50)]
+    plan = armar_plan(libros, papeles, cobertura=1.5)
+
+    # Objetivo = ceil(mínimo × cobertura); primero el que le falta una fracción mayor
+    columnas = ("libro_id", "objetivo", "faltante", "ejemplares", "pendiente")
+    assert [tuple(libro[c] for c in columnas) for libro in plan["libros"]] == [
+        (2, 6, 6, 6, 0),
+        (1, 15, 13, 1, 12),
+        (4, 12, 4, 0, 4),
+    ]
+    columnas = ("paginas", "paginas_pedidas", "paginas_asignadas", "restante")
+    assert [tuple(papel[c] for c in columnas) for papel in plan["papel"]] == [
+        (100, 1900, 700, 0),
+        (200, 800, 0, 50),
+    ]
+    assert plan["sin_papel"] == [3]
+
+
+def test_plan_vacio():
+    assert armar_plan([], []) == {"cobertura": 1.0, "libros": [], "papel": [], "sin_papel": []}
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from reposicion import calcular, pesos
+
+
+def test_pesos_suman_uno():
+    assert pesos(4, 0.5, "media").tolist() == [0.25] * 4
+    ewma = pesos(4, 0.5, "ewma")
+    assert ewma.sum() == pytest.approx(1)
+    # El día más reciente (el último) pesa más
+    assert ewma.tolist() == sorted(ewma.tolist())
+    assert ewma[-1] / ewma[-2] == pytest.approx(2)
+
+
+class _SesionFalsa:
+    """Devuelve, en orden, las filas de las tres consultas de `calcular`."""
+
+    def __init__(self, *consultas):
+        self.consultas = list(consultas)
+
+    def execute(self, stmt):
+        filas = self.consultas.pop(0)
+        return type("Resultado", (), {"all": lambda _: filas})()
+
+    def rollback(self):
+        pass
+
+
+def test_sugerencias_y_reparto_de_transferencias():
+    db = _SesionFalsa(
+        # (tienda, libro, stock, mínimo) ordenados por tienda y libro
+        [(1, 1, 0, 0), (1, 2, 100, 0), (2, 1, 1, 0)],
+        # (tienda, libro, día desde el inicio, unidades); la tienda 3 no tiene inventario del libro
+        [(1, 1, 0, 4), (1, 1, 2, 4), (2, 1, 3, 8), (3, 1, 3, 50)],
+        # (libro, disponible en el inventario global sobre su mínimo)
+        [(1, 10)],
+    )
+    s = calcular(db, dias=4, metodo="media", plazo=1, ciclo=1)
+
+    assert s["demanda_diaria"].tolist() == [2, 0, 2]
+    assert s["desviacion"] == pytest.approx([2, 0, np.sqrt(12)])
+    # Mínimo: ceil(d × plazo + z × σ × √plazo); objetivo con plazo + ciclo
+    assert s["minimo_sugerido"].tolist() == [6, 0, 8]
+    assert s["cantidad"].tolist() == [9, 0, 12]
+    # El global tiene 10: primero la tienda con menos días de cobertura
+    assert s["transferir"].tolist() == [9, 0, 1]
+    assert s["pedir"].tolist() == [0, 0, 11]
+
+
+def test_sin_pares_ni_ventas():
+    s = calcular(_SesionFalsa([], [], []))
+    assert all(len(valores) == 0 for valores in s.values())
@@ -0,0 +1,122 @@
+import asyncio
+import json
+import time
+import uuid
+
+import pytest
+
+import seguridad
+from cache import CacheLRU
+from seguridad import (
+    Sesion, _b64, _firmar, emitir_token, es_hash, hashear_contrasena, verificar_contrasena,
+    verificar_contrasena_async, verificar_token,
+)
+
+
+@pytest.fixture(autouse=True)
+def hash_rapido(monkeypatch):
+    # El costo real del hash no es lo que se prueba
+    monkeypatch.setattr(seguridad, "ITERACIONES", 1000)
+
+
+def _token(datos: dict) -> str:
+    cuerpo = _b64(json.dumps(datos).encode())
+    return f"{cuerpo}.{_firmar(cuerpo)}"
+
+
+def test_contrasena_hasheada():
+    almacenada = hashear_contrasena("secreta")
+    assert es_hash(almacenada) and "secreta" not in almacenada
+    assert verificar_contrasena("secreta", almacenada)
+    assert not verificar_contrasena("otra", almacenada)
+    assert not verificar_contrasena("secreta", "pbkdf2_sha256$roto")
+
+
+def test_contrasena_heredada_en_texto_plano():
+    assert verificar_contrasena("1234", "1234")
+    assert not verificar_contrasena("12345", "1234")
+
+
+def test_usuario_inexistente_nunca_verifica():
+    assert asyncio.run(verificar_contrasena_async("cualquiera", None)) is False
+
+
+@pytest.fixture
+def usuarios(monkeypatch):
+    """Tabla `usuario` falsa: id -> estado; cuenta las consultas."""
+    tabla = {7: {"version": 0, "rol": "vendedor", "punto_venta_id": 3}}
+    consultas = []
+
+    async def cargar(id_usuario):
+        consultas.append(id_usuario)
+        return dict(tabla[id_usuario]) if id_usuario in tabla else None
+
+    monkeypatch.setattr(seguridad, "_cargar_usuario", cargar)
+    monkeypatch.setattr(seguridad, "cache_sesiones", CacheLRU(f"sesiones-{uuid.uuid4().hex}", 100, 300))
+    monkeypatch.setattr(seguridad, "cache_tokens", CacheLRU(f"tokens-{uuid.uuid4().hex}", 100, 300))
+    tabla["consultas"] = consultas
+    return tabla
+
+
+def _verificar(token):
+    return asyncio.run(verificar_token(token))
+
+
+def test_token_valido(usuarios):
+    sesion = _verificar(emitir_token(7, 0))
+    assert isinstance(sesion, Sesion)
+    assert (sesion.id_usuario, sesion.rol, sesion.punto_venta_id) == (7, "vendedor", 3)
+    assert sesion.expira > time.time()
+
+
+def test_token_con_firma_alterada(usuarios):
+    cuerpo, _, firma = emitir_token(7, 0).partition(".")
+    otro = _b64(json.dumps({"sub": 1, "ver": 0, "exp": int(time.time()) + 60}).encode())
+    assert _verificar(f"{otro}.{firma}") is None
+    assert _verificar(cuerpo) is None
+    assert _verificar("") is None
+
+
+def test_token_vencido(usuarios):
+    assert _verificar(_token({"sub": 7, "ver": 0, "exp": int(time.time()) - 1})) is None
+
+
+def test_token_firmado_con_datos_invalidos(usuarios):
+    assert _verificar(_token({"ver": 0, "exp": int(time.time()) + 60})) is None
+    assert _verificar(_token({"sub": "x", "ver": 0, "exp": int(time.time()) + 60})) is None
+    # Tokens con el formato anterior (rol y punto de venta en el token)
+    assert _verificar(_token({"sub": 7, "rol": "admin", "pv": None, "exp": int(time.time()) + 60})) is None
+
+
+def test_token_en_cache_no_consulta_ni_firma(usuarios, monkeypatch):
+    token = emitir_token(7, 0)
+    assert _verificar(token) is not None
+    # Segunda verificación desde la caché: no vuelve a firmar ni consulta la tabla
+    monkeypatch.setattr(seguridad, "_firmar", lambda cuerpo: pytest.fail("no debía firmar"))
+    assert _verificar(token) is not None
+    assert usuarios["consultas"] == [7]
+    monkeypatch.setattr(seguridad.time, "time", lambda: 2 ** 40)
+    assert _verificar(token) is None
+
+
+def test_cambio_de_rol_rige_al_invalidar(usuarios):
+    token = emitir_token(7, 0)
+    assert _verificar(token).rol == "vendedor"
+    usuarios[7].update(rol="admin", punto_venta_id=None)
+    seguridad.cache_sesiones.invalidar(7)
+    sesion = _verificar(token)
+    assert (sesion.rol, sesion.punto_venta_id) == ("admin", None)
+
+
+def test_usuario_eliminado_o_con_otra_version(usuarios):
+    token = emitir_token(7, 0)
+    assert _verificar(token) is not None
+    # Cambio de contraseña: sube la versión y el token anterior deja de valer
+    usuarios[7]["version"] = 1
+    seguridad.cache_sesiones.invalidar(7)
+    assert _verificar(token) is None
+    assert _verificar(emitir_token(7, 1)) is not None
+
+    del usuarios[7]
+    seguridad.cache_sesiones.invalidar(7)
+    assert _verificar(emitir_token(7, 1)) is None
@@ -0,0 +1,63 @@
+import json
+from collections import namedtuple
+from datetime import datetime
+from decimal import Decimal
+from typing import List
+
+import pytest
+from fastapi import Response
+from pydantic import TypeAdapter
+
+from models import TipoMovimiento
+from paginacion import CABECERA_CURSOR
+from schemas import LibroOut, MovimientoDetalleOut
+from serializacion import a_json, filas_a_dicts, lineas_ndjson, respuesta_filas
+
+Libro = namedtuple("Libro", [
+    "id_libro", "nombre", "autor", "categoria", "descripcion", "precio", "paginas_por_libro",
+    "stock_minimo", "fecha_creacion", "relevancia",
+])
+FILAS = [
+    Libro(1, "Uno", "Ana", None, "Texto con \"comillas\" y ñ", 12000, 120, 5, datetime(2025, 1, 2, 3, 4, 5), 7),
+    Libro(2, "Dos", None, "Ensayo", None, 9990, None, None, datetime(2025, 1, 2, 3, 4, 5, 600), 3),
+]
+
+
+def test_toma_los_campos_del_esquema_en_su_orden():
+    dicts = filas_a_dicts(FILAS, LibroOut)
+    assert list(dicts[0]) == list(LibroOut.model_fields)
+    assert "relevancia" not in dicts[0]
+    assert filas_a_dicts([fila._asdict() for fila in FILAS], LibroOut) == dicts
+    assert filas_a_dicts([], LibroOut) == []
+
+
+def test_campo_faltante_falla():
+    Incompleta = namedtuple("Incompleta", ["id_libro", "nombre"])
+    with pytest.raises(ValueError):
+        filas_a_dicts([Incompleta(1, "Uno")], LibroOut)
+
+
+def test_mismo_json_que_pydantic():
+    modelos = [LibroOut.model_validate(fila._asdict()) for fila in FILAS]
+    esperado = TypeAdapter(List[LibroOut]).dump_python(modelos, mode="json")
+    assert json.loads(respuesta_filas(FILAS, LibroOut).body) == esperado
+
+
+def test_tipos_que_no_son_json():
+    assert a_json([Decimal("12"), Decimal("1.50"), TipoMovimiento.venta]) == b'[12,1.5,"venta"]'
+    with pytest.raises(TypeError):
+        a_json(object())
+
+
+def test_ndjson_una_fila_por_linea():
+    lineas = lineas_ndjson(FILAS, LibroOut).split(b"\n")
+    assert lineas[-1] == b""
+    assert [json.loads(linea)["id_libro"] for linea in lineas[:-1]] == [1, 2]
+
+
+def test_copia_la_cabecera_del_cursor():
+    response = Response()
+    response.headers[CABECERA_CURSOR] = "abc"
+    respuesta = respuesta_filas([], MovimientoDetalleOut, response)
+    assert respuesta.headers[CABECERA_CURSOR] == "abc"
+    assert respuesta.body == b"[]"
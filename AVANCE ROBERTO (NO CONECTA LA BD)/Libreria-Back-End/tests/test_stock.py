@@ -0,0 +1,119 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.dialects import mysql
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from models import InventarioLibro
+from routers.inventario_pv import vender_pv
+from schemas import VentaPV
+from stock import fijar_stock_global, inventario_global_de, sumar_stock_global, sumar_stock_pv
+
+
+class _SesionFalsa:
+    """Guarda el SQL de cada sentencia y responde con las filas afectadas indicadas."""
+
+    def __init__(self, filas_afectadas=1, lastrowid=0):
+        self.resultado = SimpleNamespace(rowcount=filas_afectadas, lastrowid=lastrowid)
+        self.sql = []
+
+    async def execute(self, stmt):
+        self.sql.append(str(stmt.compile(dialect=mysql.dialect())))
+        return self.resultado
+
+    async def scalar(self, stmt):
+        self.sql.append(str(stmt.compile(dialect=mysql.dialect())))
+        return self.resultado.lastrowid
+
+
+def test_descuento_exige_stock_suficiente_en_el_mismo_update():
+    db = _SesionFalsa(lastrowid=7)
+    assert asyncio.run(sumar_stock_global(db, InventarioLibro.id_inventario == 1, -3)) == 7
+    sql, = db.sql
+    assert sql.startswith("UPDATE inventario_libro SET stock=last_insert_id(inventario_libro.stock + %s), "
+                          "bajo_minimo=(inventario_libro.stock < ")
+    assert "inventario_libro.stock >= %s" in sql
+
+
+def test_entrada_no_pone_condicion_de_stock():
+    db = _SesionFalsa()
+    asyncio.run(sumar_stock_global(db, InventarioLibro.id_inventario == 1, 5))
+    assert "stock >=" not in db.sql[0]
+
+
+def test_sin_filas_afectadas_devuelve_none():
+    db = _SesionFalsa(filas_afectadas=0, lastrowid=99)
+    assert asyncio.run(sumar_stock_pv(db, 1, -1)) is None
+    assert "inventario_pv.stock >= %s" in db.sql[0]
+
+
+
+def test_inventario_global_con_insert_ignore():
+    db = _SesionFalsa(lastrowid=4)
+    assert asyncio.run(inventario_global_de(db, 2)) == 4
+    crear, leer = db.sql
+    assert crear.startswith("INSERT IGNORE INTO inventario_libro (libro_id, stock, bajo_minimo) SELECT libro.id_libro")
+    assert leer.startswith("SELECT inventario_libro.id_inventario")
+
+
+@pytest.fixture
+def async_mysql(mysql):
+    with mysql.begin() as conn:
+        conn.execute(text("INSERT INTO libro (id_libro, nombre, precio, stock_minimo) VALUES (1, 'Uno', 100, 5)"))
+        conn.execute(text("INSERT INTO inventario_libro (id_inventario, libro_id, stock) VALUES (1, 1, 10)"))
+    return create_async_engine(mysql.url.set(drivername="mysql+aiomysql"))
+
+
+def test_descuentos_contra_mysql(async_mysql):
+    fila = InventarioLibro.id_inventario == 1
+
+    async def probar():
+        async with AsyncSession(async_mysql) as db:
+            assert await sumar_stock_global(db, fila, -6) == 4
+            assert await sumar_stock_global(db, fila, -5) is None
+            assert await sumar_stock_global(db, InventarioLibro.id_inventario == 2, 1) is None
+            await db.commit()
+            stock, bajo = (await db.execute(text(
+                "SELECT stock, bajo_minimo FROM inventario_libro WHERE id_inventario = 1"
+            ))).one()
+            assert (stock, bajo) == (4, 1)
+
+            assert await fijar_stock_global(db, fila, 20) == 4
+            await db.commit()
+            stock, bajo = (await db.execute(text(
+                "SELECT stock, bajo_minimo FROM inventario_libro WHERE id_inventario = 1"
+            ))).one()
+            assert (stock, bajo) == (20, 0)
+        await async_mysql.dispose()
+
+    asyncio.run(probar())
+
+
+def test_venta_de_tienda_de_un_libro_sin_inventario_global(async_mysql):
+    async def probar():
+        async with AsyncSession(async_mysql) as db:
+            await db.execute(text("INSERT INTO punto_venta (id_punto_venta, nombre) VALUES (1, 'Centro')"))
+            await db.execute(text("INSERT INTO libro (id_libro, nombre, precio, stock_minimo) VALUES (2, 'Dos', 50, 3)"))
+            await db.execute(text(
+                "INSERT INTO inventario_pv (id_inventario, id_libro, id_punto_venta, stock, stock_minimo) "
+                "VALUES (1, 2, 1, 5, 1)"
+            ))
+            await db.commit()
+
+            # El libro mayor registra la venta contra el inventario global del libro, que se crea vacío
+            for _ in range(2):
+                await vender_pv(1, VentaPV(cantidad=2), None, db)
+            globales = (await db.execute(text(
+                "SELECT id_inventario, stock, bajo_minimo FROM inventario_libro WHERE libro_id = 2"
+            ))).all()
+            assert [(stock, bajo) for _, stock, bajo in globales] == [(0, 1)]
+            movimientos = (await db.execute(text(
+                "SELECT inventario_id, punto_venta_id, cantidad FROM movimiento_libro WHERE tipo = 'venta'"
+            ))).all()
+            assert movimientos == [(globales[0][0], 1, 2)] * 2
+            assert (await db.execute(text("SELECT stock FROM inventario_pv WHERE id_inventario = 1"))).scalar() == 1
+        await async_mysql.dispose()
+
+    asyncio.run(probar())
@@ -0,0 +1,121 @@
+import asyncio
+
+import pytest
+
+import metricas
+import ventas_agrupadas
+from schemas import MovimientoCreate, ResultadoLineaLote
+from ventas_agrupadas import AgrupadorVentas
+
+
+class _SesionFalsa:
+    def __init__(self, registro):
+        self.registro = registro
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *error):
+        return False
+
+    async def commit(self):
+        self.registro.append("commit")
+
+
+@pytest.fixture
+def grupos(monkeypatch):
+    """Registra cada grupo aplicado; rechaza las ventas de más de 10 unidades."""
+    registro = []
+
+    async def aplicar_movimientos(db, lineas):
+        registro.append([linea.inventario_id for linea in lineas])
+        resultados = [
+            ResultadoLineaLote(indice=i, ok=True) if linea.cantidad <= 10
+            else ResultadoLineaLote(indice=i, ok=False, detalle="Stock insuficiente")
+            for i, linea in enumerate(lineas)
+        ]
+        insertadas = {r.indice: {"id_mov_libro": 100 + r.indice} for r in resultados if r.ok}
+        return resultados, insertadas
+
+    monkeypatch.setattr(ventas_agrupadas, "AsyncSessionLocal", lambda: _SesionFalsa(registro))
+    monkeypatch.setattr(ventas_agrupadas, "aplicar_movimientos", aplicar_movimientos)
+    return registro
+
+
+def _venta(inventario_id, cantidad=1):
+    return MovimientoCreate(inventario_id=inventario_id, tipo="venta", cantidad=cantidad)
+
+
+def test_ventas_de_la_ventana_van_en_un_solo_commit(grupos):
+    async def probar():
+        agrupador = AgrupadorVentas(ventana_ms=20, maximo=100)
+        return await asyncio.gather(*[agrupador.registrar(_venta(i, cantidad=5 * i)) for i in (1, 2, 3)])
+
+    (r1, f1), (r2, f2), (r3, f3) = asyncio.run(probar())
+    assert grupos == [[1, 2, 3], "commit"]
+    assert (r1.ok, r2.ok, r3.ok) == (True, True, False)
+    assert (f1, f2, f3) == ({"id_mov_libro": 100}, {"id_mov_libro": 101}, None)
+    assert r3.detalle == "Stock insuficiente"
+
+
+def test_grupo_lleno_se_despacha_sin_esperar_la_ventana(grupos):
+    async def probar():
+        agrupador = AgrupadorVentas(ventana_ms=60_000, maximo=2)
+        return await asyncio.wait_for(
+            asyncio.gather(*[agrupador.registrar(_venta(i)) for i in (1, 2, 3, 4)]), timeout=5
+        )
+
+    asyncio.run(probar())
+    assert grupos == [[1, 2], "commit", [3, 4], "commit"]
+
+
+def test_error_del_grupo_llega_a_todas_las_peticiones(grupos, monkeypatch):
+    async def falla(db, lineas):
+        raise RuntimeError("deadlock")
+
+    monkeypatch.setattr(ventas_agrupadas, "aplicar_movimientos", falla)
+
+    async def probar():
+        agrupador = AgrupadorVentas(ventana_ms=10, maximo=100)
+        return await asyncio.gather(*[agrupador.registrar(_venta(i)) for i in (1, 2)], return_exceptions=True)
+
+    errores = asyncio.run(probar())
+    assert all(isinstance(e, RuntimeError) for e in errores)
+    assert "commit" not in grupos
+
+
+def test_cerrar_aplica_lo_pendiente(grupos):
+    async def probar():
+        agrupador = AgrupadorVentas(ventana_ms=60_000, maximo=100)
+        pendiente = asyncio.ensure_future(agrupador.registrar(_venta(1)))
+        await asyncio.sleep(0)
+        await agrupador.cerrar()
+        return await pendiente
+
+    resultado, _ = asyncio.run(probar())
+    assert resultado.ok
+    assert grupos == [[1], "commit"]
+
+
+@pytest.mark.parametrize("maximo", [2, 100])
+def test_el_grupo_no_cuenta_en_las_metricas_de_una_peticion(grupos, monkeypatch, maximo):
+    contextos = []
+
+    async def aplicar_movimientos(db, lineas):
+        contextos.append(metricas._peticion_actual.get())
+        return [ResultadoLineaLote(indice=i, ok=True) for i in range(len(lineas))], {}
+
+    monkeypatch.setattr(ventas_agrupadas, "aplicar_movimientos", aplicar_movimientos)
+
+    async def peticion(agrupador, inventario_id):
+        # Lo que hace MiddlewareMetricas con cada petición
+        metricas._peticion_actual.set(metricas._Peticion())
+        return await agrupador.registrar(_venta(inventario_id))
+
+    async def probar():
+        # Con máximo 2 despacha la segunda petición; con 100, el temporizador de la primera
+        agrupador = AgrupadorVentas(ventana_ms=10, maximo=maximo)
+        await asyncio.gather(peticion(agrupador, 1), peticion(agrupador, 2))
+
+    asyncio.run(probar())
+    assert contextos == [None]
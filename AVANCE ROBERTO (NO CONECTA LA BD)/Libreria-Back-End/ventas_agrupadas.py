@@ -0,0 +1,99 @@
+"""
+Escritura agrupada (group commit) de las ventas del inventario global. Opcional.
+
+Con `VENTAS_AGRUPADAS_MS` > 0 en el .env, POST /movimientos/ con tipo
+"venta" no abre su propia transacción: la venta espera en un búfer del
+worker hasta que pasan esos milisegundos (o se juntan
+`VENTAS_AGRUPADAS_MAXIMO` ventas) y el grupo completo se aplica con
+`aplicar_movimientos` (ver libro_mayor.py): inventarios bloqueados en orden
+de id_inventario, un INSERT de varias filas en el libro mayor y un solo
+commit, es decir, un solo fsync para todo el grupo.
+
+Garantías:
+- Cada petición recibe su propio resultado: aceptada con su movimiento, o
+  rechazada con su motivo (stock insuficiente, inventario o usuario
+  inexistente), igual que sin agrupar.
+- Ninguna respuesta sale antes del commit. Si la transacción falla, todas
+  las peticiones del grupo reciben el error y ninguna venta queda aplicada.
+- Cada grupo usa su propia conexión: las ventas que llegan mientras un
+  grupo hace commit forman el siguiente.
+- El grupo corre en un contexto vacío (contextvars): sus sentencias no se
+  cuentan en las métricas de la petición que abrió la ventana.
+
+El costo es la espera de la ventana en cada venta; a cambio, las ventas
+por segundo dejan de estar limitadas por los commits por segundo de una
+conexión. Con 0 (por defecto) cada venta es su propia transacción.
+"""
+import asyncio
+import contextvars
+import os
+from typing import List, Optional, Tuple
+
+from database import AsyncSessionLocal
+from libro_mayor import aplicar_movimientos
+from metricas import ventas_por_commit
+from schemas import MovimientoCreate, ResultadoLineaLote
+
+VENTANA_MS = float(os.getenv("VENTAS_AGRUPADAS_MS", "0"))
+MAXIMO_POR_GRUPO = int(os.getenv("VENTAS_AGRUPADAS_MAXIMO", "200"))
+
+
+class AgrupadorVentas:
+    def __init__(self, ventana_ms: float, maximo: int):
+        self.ventana = ventana_ms / 1000
+        self.maximo = maximo
+        self._pendientes: List[Tuple[MovimientoCreate, asyncio.Future]] = []
+        self._temporizador: Optional[asyncio.TimerHandle] = None
+        self._grupos = set()
+
+    async def registrar(self, linea: MovimientoCreate) -> Tuple[ResultadoLineaLote, Optional[dict]]:
+        """
+        Encola la venta y espera el commit de su grupo. Devuelve el resultado
+        de la línea y, si se aceptó, la fila insertada en el libro mayor.
+        """
+        bucle = asyncio.get_running_loop()
+        futuro = bucle.create_future()
+        self._pendientes.append((linea, futuro))
+        if len(self._pendientes) >= self.maximo:
+            self._despachar()
+        elif self._temporizador is None:
+            self._temporizador = bucle.call_later(self.ventana, self._despachar)
+        return await futuro
+
+    def _despachar(self) -> None:
+        if self._temporizador is not None:
+            self._temporizador.cancel()
+            self._temporizador = None
+        grupo, self._pendientes = self._pendientes, []
+        if grupo:
+            # create_task copia el contexto actual, que es el de la primera
+            # petición de la ventana; el grupo no pertenece a ninguna
+            tarea = contextvars.Context().run(asyncio.get_running_loop().create_task, self._aplicar(grupo))
+            # Referencia fuerte hasta que termine (el bucle solo guarda una débil)
+            self._grupos.add(tarea)
+            tarea.add_done_callback(self._grupos.discard)
+
+    async def _aplicar(self, grupo) -> None:
+        try:
+            async with AsyncSessionLocal() as db:
+                resultados, insertadas = await aplicar_movimientos(db, [linea for linea, _ in grupo])
+                await db.commit()
+        except Exception as error:
+            for _, futuro in grupo:
+                if not futuro.done():
+                    futuro.set_exception(error)
+            return
+        ventas_por_commit.observar(len(grupo))
+        # Si el cliente se desconectó, su futuro ya está cancelado: la venta quedó registrada igual
+        for (_, futuro), resultado in zip(grupo, resultados):
+            if not futuro.done():
+                futuro.set_result((resultado, insertadas.get(resultado.indice)))
+
+    async def cerrar(self) -> None:
+        """Aplica lo pendiente y espera los grupos en curso (al apagar el worker)."""
+        self._despachar()
+        if self._grupos:
+            await asyncio.gather(*self._grupos, return_exceptions=True)
+
+
+agrupador_ventas = AgrupadorVentas(VENTANA_MS, MAXIMO_POR_GRUPO) if VENTANA_MS > 0 else None
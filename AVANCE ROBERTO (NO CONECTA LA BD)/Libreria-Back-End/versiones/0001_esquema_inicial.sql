@@ -0,0 +1,77 @@
+-- Esquema inicial: las tablas tal como las creaba `create_all` en la primera
+-- versión de la API, antes de todo cambio de esquema. Usa IF NOT EXISTS para
+-- que una base creada entonces quede registrada en la versión 1 sin tocar sus
+-- datos; las columnas e índices posteriores los agregan las versiones 2 en
+-- adelante con ALTER TABLE, también sobre esas bases.
+
+CREATE TABLE IF NOT EXISTS punto_venta (
+  id_punto_venta INT NOT NULL AUTO_INCREMENT,
+  nombre VARCHAR(200) NOT NULL,
+  ubicacion VARCHAR(200) NULL,
+  tipo VARCHAR(50) NULL,
+  PRIMARY KEY (id_punto_venta),
+  KEY ix_punto_venta_id_punto_venta (id_punto_venta)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_spanish2_ci;
+
+CREATE TABLE IF NOT EXISTS usuario (
+  id_usuario INT NOT NULL AUTO_INCREMENT,
+  nombre VARCHAR(150) NOT NULL,
+  email VARCHAR(150) NOT NULL,
+  contrasena VARCHAR(200) NOT NULL,
+  rol VARCHAR(20) NOT NULL,
+  punto_venta_id INT NULL,
+  PRIMARY KEY (id_usuario),
+  UNIQUE KEY email (email),
+  KEY ix_usuario_id_usuario (id_usuario),
+  FOREIGN KEY (punto_venta_id) REFERENCES punto_venta (id_punto_venta)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_spanish2_ci;
+
+CREATE TABLE IF NOT EXISTS papel (
+  paginas INT NOT NULL,
+  nombre VARCHAR(100) NOT NULL,
+  stock_paginas INT NOT NULL,
+  PRIMARY KEY (paginas)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_spanish2_ci;
+
+CREATE TABLE IF NOT EXISTS libro (
+  id_libro INT NOT NULL AUTO_INCREMENT,
+  nombre VARCHAR(200) NOT NULL,
+  autor VARCHAR(200) NOT NULL,
+  precio INT NOT NULL,
+  stock_minimo INT NULL,
+  fecha_creacion DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (id_libro)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_spanish2_ci;
+
+CREATE TABLE IF NOT EXISTS inventario_libro (
+  id_inventario INT NOT NULL AUTO_INCREMENT,
+  libro_id INT NOT NULL,
+  stock INT NOT NULL,
+  updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (id_inventario),
+  FOREIGN KEY (libro_id) REFERENCES libro (id_libro)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_spanish2_ci;
+
+CREATE TABLE IF NOT EXISTS inventario_pv (
+  id_inventario INT NOT NULL AUTO_INCREMENT,
+  id_libro INT NOT NULL,
+  id_punto_venta INT NOT NULL,
+  stock INT NULL,
+  stock_minimo INT NULL,
+  PRIMARY KEY (id_inventario),
+  FOREIGN KEY (id_libro) REFERENCES libro (id_libro),
+  FOREIGN KEY (id_punto_venta) REFERENCES punto_venta (id_punto_venta)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_spanish2_ci;
+
+CREATE TABLE IF NOT EXISTS movimiento_libro (
+  id_mov_libro INT NOT NULL AUTO_INCREMENT,
+  inventario_id INT NOT NULL,
+  tipo ENUM('entrada','salida','venta','ajuste') NOT NULL,
+  cantidad INT NOT NULL,
+  usuario_id INT NULL,
+  observaciones TEXT NULL,
+  fecha_movimiento DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (id_mov_libro),
+  FOREIGN KEY (inventario_id) REFERENCES inventario_libro (id_inventario),
+  FOREIGN KEY (usuario_id) REFERENCES usuario (id_usuario)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_spanish2_ci;
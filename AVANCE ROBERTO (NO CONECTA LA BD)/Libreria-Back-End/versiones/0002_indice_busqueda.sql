@@ -0,0 +1,10 @@
+-- Índice invertido de la búsqueda de libros (ver busqueda.py). Se llena con
+-- `python busqueda.py` para los libros que ya existían.
+CREATE TABLE IF NOT EXISTS libro_termino (
+  termino VARCHAR(64) CHARACTER SET utf8mb4 COLLATE utf8mb4_bin NOT NULL,
+  libro_id INT NOT NULL,
+  peso INT NOT NULL,
+  PRIMARY KEY (termino, libro_id),
+  KEY ix_libro_termino_libro_id (libro_id),
+  FOREIGN KEY (libro_id) REFERENCES libro (id_libro)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_spanish2_ci;
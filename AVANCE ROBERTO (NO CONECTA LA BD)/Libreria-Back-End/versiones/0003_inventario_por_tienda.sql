@@ -0,0 +1,39 @@
+-- Movimientos de las tiendas en el libro mayor: NULL = inventario global.
+-- La clave foránea lleva nombre para poder quitarla al particionar (0008).
+ALTER TABLE movimiento_libro
+  ADD COLUMN punto_venta_id INT NULL AFTER usuario_id,
+  ADD CONSTRAINT fk_movimiento_libro_punto_venta
+    FOREIGN KEY (punto_venta_id) REFERENCES punto_venta (id_punto_venta);
+
+-- Un libro por punto de venta: el listado por tienda y la venta buscan por
+-- (tienda, libro). Antes del índice único se unifican los pares repetidos
+-- que pudo dejar la API anterior: queda la fila de menor id con la suma del
+-- stock y el mayor mínimo, y se borran las demás (nada referencia
+-- inventario_pv.id_inventario). Para revisarlos antes de migrar:
+--   SELECT id_punto_venta, id_libro, COUNT(*), SUM(stock) FROM inventario_pv
+--   GROUP BY id_punto_venta, id_libro HAVING COUNT(*) > 1;
+UPDATE inventario_pv AS i
+JOIN (
+  SELECT MIN(id_inventario) AS id_inventario,
+         SUM(COALESCE(stock, 0)) AS stock,
+         MAX(stock_minimo) AS stock_minimo
+  FROM inventario_pv
+  GROUP BY id_punto_venta, id_libro
+  HAVING COUNT(*) > 1
+) AS unificado ON unificado.id_inventario = i.id_inventario
+SET i.stock = unificado.stock,
+    i.stock_minimo = unificado.stock_minimo;
+
+DELETE i FROM inventario_pv AS i
+JOIN (
+  SELECT id_punto_venta, id_libro, MIN(id_inventario) AS id_inventario
+  FROM inventario_pv
+  GROUP BY id_punto_venta, id_libro
+  HAVING COUNT(*) > 1
+) AS unificado
+  ON unificado.id_punto_venta = i.id_punto_venta
+ AND unificado.id_libro = i.id_libro
+ AND i.id_inventario > unificado.id_inventario;
+
+ALTER TABLE inventario_pv
+  ADD UNIQUE INDEX ux_inventario_pv_pv_libro (id_punto_venta, id_libro);
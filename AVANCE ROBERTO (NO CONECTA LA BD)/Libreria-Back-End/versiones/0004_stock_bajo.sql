@@ -0,0 +1,17 @@
+-- Bandera de stock bajo mantenida por la aplicación (ver stock_bajo.py).
+-- Las filas existentes se calculan al final con el mismo criterio que
+-- stock_bajo.recalcular_todo (`python stock_bajo.py` hace lo mismo).
+ALTER TABLE inventario_libro
+  ADD COLUMN bajo_minimo BOOL NOT NULL DEFAULT FALSE AFTER stock,
+  ADD INDEX ix_inventario_libro_bajo_minimo (bajo_minimo);
+
+ALTER TABLE inventario_pv
+  ADD COLUMN bajo_minimo BOOL NOT NULL DEFAULT FALSE AFTER stock_minimo,
+  ADD INDEX ix_inventario_pv_bajo_minimo (bajo_minimo, id_punto_venta);
+
+UPDATE inventario_libro AS i
+JOIN libro AS l ON l.id_libro = i.libro_id
+SET i.bajo_minimo = i.stock < COALESCE(l.stock_minimo, 0);
+
+UPDATE inventario_pv
+SET bajo_minimo = COALESCE(stock, 0) < COALESCE(stock_minimo, 0);
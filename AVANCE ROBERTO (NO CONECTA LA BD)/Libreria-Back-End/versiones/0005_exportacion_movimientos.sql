@@ -0,0 +1,5 @@
+-- Rangos de fechas (exportación) y listado de movimientos ordenado por
+-- (fecha, id).
+ALTER TABLE movimiento_libro
+  ADD INDEX ix_movimiento_libro_fecha (fecha_movimiento, id_mov_libro),
+  ALGORITHM=INPLACE, LOCK=NONE;
@@ -0,0 +1,12 @@
+-- Acumulados de ventas por día, tienda y libro (ver acumulados.py). Se llena
+-- con `python acumulados.py` desde el libro mayor existente.
+CREATE TABLE IF NOT EXISTS venta_diaria (
+  dia DATE NOT NULL,
+  punto_venta_id INT NOT NULL,
+  libro_id INT NOT NULL,
+  unidades INT NOT NULL,
+  importe DECIMAL(14,2) NOT NULL,
+  movimientos INT NOT NULL,
+  PRIMARY KEY (dia, punto_venta_id, libro_id),
+  KEY ix_venta_diaria_dia_libro (dia, libro_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_spanish2_ci;
@@ -0,0 +1,60 @@
+-- Libro: columnas que la API ya recibía (schemas.LibroBase) pero la tabla no
+-- tenía. El autor pasa a ser opcional porque el formulario no lo envía.
+ALTER TABLE libro
+  MODIFY autor VARCHAR(200) NULL,
+  ADD COLUMN categoria VARCHAR(100) NULL AFTER autor,
+  ADD COLUMN descripcion TEXT NULL AFTER categoria,
+  ADD COLUMN paginas_por_libro INT NULL AFTER precio,
+  ADD CONSTRAINT fk_libro_papel FOREIGN KEY (paginas_por_libro) REFERENCES papel (paginas);
+
+-- Un solo inventario global por libro: la búsqueda por libro_id pasa a ser
+-- un acceso por clave única. Antes del índice se unifican los inventarios
+-- repetidos de un libro, como en 0003 con inventario_pv: queda la fila de
+-- menor id con la suma del stock, sus movimientos pasan a apuntar a ella y
+-- se borran las demás. Para revisarlos antes de migrar:
+--   SELECT libro_id, COUNT(*), SUM(stock) FROM inventario_libro
+--   GROUP BY libro_id HAVING COUNT(*) > 1;
+UPDATE inventario_libro AS i
+JOIN (
+  SELECT MIN(id_inventario) AS id_inventario, SUM(stock) AS stock
+  FROM inventario_libro
+  GROUP BY libro_id
+  HAVING COUNT(*) > 1
+) AS unificado ON unificado.id_inventario = i.id_inventario
+JOIN libro AS l ON l.id_libro = i.libro_id
+SET i.stock = unificado.stock,
+    i.bajo_minimo = unificado.stock < COALESCE(l.stock_minimo, 0);
+
+UPDATE movimiento_libro AS m
+JOIN inventario_libro AS i ON i.id_inventario = m.inventario_id
+JOIN (
+  SELECT libro_id, MIN(id_inventario) AS id_inventario
+  FROM inventario_libro
+  GROUP BY libro_id
+  HAVING COUNT(*) > 1
+) AS unificado
+  ON unificado.libro_id = i.libro_id
+ AND i.id_inventario > unificado.id_inventario
+SET m.inventario_id = unificado.id_inventario;
+
+DELETE i FROM inventario_libro AS i
+JOIN (
+  SELECT libro_id, MIN(id_inventario) AS id_inventario
+  FROM inventario_libro
+  GROUP BY libro_id
+  HAVING COUNT(*) > 1
+) AS unificado
+  ON unificado.libro_id = i.libro_id
+ AND i.id_inventario > unificado.id_inventario;
+
+-- InnoDB descarta solo el índice implícito de la FK, que queda cubierto.
+ALTER TABLE inventario_libro
+  ADD UNIQUE INDEX ux_inventario_libro_libro (libro_id),
+  ALGORITHM=INPLACE, LOCK=NONE;
+
+-- Historial de un inventario por fecha y filtros por tipo en un rango de
+-- fechas (ventas de un período) sin recorrer todo el libro mayor.
+ALTER TABLE movimiento_libro
+  ADD INDEX ix_movimiento_libro_inventario_fecha (inventario_id, fecha_movimiento),
+  ADD INDEX ix_movimiento_libro_tipo_fecha (tipo, fecha_movimiento),
+  ALGORITHM=INPLACE, LOCK=NONE;
@@ -0,0 +1,19 @@
+-- Libro mayor particionado por mes (ver particiones.py).
+-- MySQL no admite claves foráneas en tablas particionadas: la existencia del
+-- inventario, el usuario y la tienda la validan los endpoints que escriben.
+-- Las dos primeras tienen el nombre que MySQL les dio en la versión 1; la
+-- de la tienda, el que le puso la versión 3.
+ALTER TABLE movimiento_libro
+  DROP FOREIGN KEY movimiento_libro_ibfk_1,
+  DROP FOREIGN KEY movimiento_libro_ibfk_2,
+  DROP FOREIGN KEY fk_movimiento_libro_punto_venta;
+
+-- Toda clave única debe incluir la columna de partición. Se crea una sola
+-- partición abierta: `python particiones.py` la reparte en meses.
+-- Reconstruye la tabla completa (una sola copia para ambos cambios).
+ALTER TABLE movimiento_libro
+  DROP PRIMARY KEY,
+  ADD PRIMARY KEY (id_mov_libro, fecha_movimiento)
+  PARTITION BY RANGE COLUMNS (fecha_movimiento) (
+    PARTITION p_futuro VALUES LESS THAN (MAXVALUE)
+  );
@@ -0,0 +1,31 @@
+-- Puntos de control del stock global (ver conciliacion.py): stock de cada
+-- inventario al instante `fecha`, es decir, la suma de sus movimientos
+-- globales anteriores. Solo hay fila en los cortes en que el inventario tuvo
+-- movimientos (o en su primera conciliación).
+CREATE TABLE IF NOT EXISTS stock_punto_control (
+  inventario_id INT NOT NULL,
+  fecha DATETIME NOT NULL,
+  stock INT NOT NULL,
+  PRIMARY KEY (inventario_id, fecha)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_spanish2_ci;
+
+-- Inventarios cuyo stock no coincide con el que da el libro mayor. La
+-- conciliación agrega y quita filas; nada más escribe aquí.
+CREATE TABLE IF NOT EXISTS descuadre_stock (
+  inventario_id INT NOT NULL,
+  stock_registrado INT NOT NULL,
+  stock_libro_mayor INT NOT NULL,
+  detectado_en DATETIME NOT NULL,
+  PRIMARY KEY (inventario_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_spanish2_ci;
+
+-- Avance de la conciliación: último corte con puntos de control y próximo
+-- inventario de la revisión rotativa. Una sola fila (id = 1).
+CREATE TABLE IF NOT EXISTS conciliacion_estado (
+  id TINYINT NOT NULL,
+  corte DATETIME NULL,
+  siguiente_inventario INT NOT NULL DEFAULT 0,
+  PRIMARY KEY (id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_spanish2_ci;
+
+INSERT IGNORE INTO conciliacion_estado (id, corte, siguiente_inventario) VALUES (1, NULL, 0);
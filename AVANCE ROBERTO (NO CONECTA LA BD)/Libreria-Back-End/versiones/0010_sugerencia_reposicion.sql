@@ -0,0 +1,16 @@
+-- Sugerencias de reposición por tienda y libro (ver reposicion.py). Las
+-- escribe solo la tarea programada; la API las lee por la clave primaria.
+CREATE TABLE IF NOT EXISTS sugerencia_reposicion (
+  punto_venta_id INT NOT NULL,
+  libro_id INT NOT NULL,
+  demanda_diaria DECIMAL(10,3) NOT NULL,
+  desviacion DECIMAL(10,3) NOT NULL,
+  stock INT NOT NULL,
+  stock_minimo INT NOT NULL,
+  minimo_sugerido INT NOT NULL,
+  cantidad INT NOT NULL,
+  transferir INT NOT NULL,
+  pedir INT NOT NULL,
+  calculado_en DATETIME NOT NULL,
+  PRIMARY KEY (punto_venta_id, libro_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_spanish2_ci;
@@ -0,0 +1,4 @@
+-- Versión de los tokens de cada usuario (ver seguridad.py): cambiar la
+-- contraseña la incrementa y los tokens emitidos antes dejan de valer.
+ALTER TABLE usuario
+  ADD COLUMN version_token INT NOT NULL DEFAULT 0;
@@ -5,18 +5,14 @@ const API_BASE = "http://127.0.0.1:8000";
 // ===============================
 async function cargarResumen() {
   try {
-    const resPV = await fetch(`${API_BASE}/puntos-venta/`);
-    const puntos = await resPV.json();
-
-    const resUsers = await fetch(`${API_BASE}/usuarios/`);
-    const users = await resUsers.json();
-
-    const resInv = await fetch(`${API_BASE}/inventario/`);
-    const inventario = await resInv.json();
-
-    document.getElementById("resumen-locales").textContent = puntos.length;
-    document.getElementById("resumen-usuarios").textContent = users.length;
-    document.getElementById("resumen-stock").textContent = inventario.length;
+    // Un solo endpoint de agregados en lugar de descargar tres listados completos
+    const res = await fetch(`${API_BASE}/admin/resumen`);
+    const resumen = await res.json();
+
+    document.getElementById("resumen-locales").textContent = resumen.puntos_venta;
+    document.getElementById("resumen-usuarios").textContent = resumen.usuarios;
+    document.getElementById("resumen-stock").textContent = resumen.libros_en_stock;
+    document.getElementById("resumen-ventas").textContent = "$" + resumen.ventas_hoy_importe;
 
   } catch (e) {
     console.error("Error cargando resumen:", e);
@@ -39,20 +39,38 @@ async function cargarPuntosVentaEnSelectEditar() {
 // ================================
 // LISTAR USUARIOS
 // ================================
-async function cargarUsuarios(q = "") {
+// Fila "Cargar más" al final de la tabla cuando el backend informa otra
+// página en la cabecera X-Next-Cursor (los listados devuelven 100 filas por vez)
+function agregarCargarMas(tbody, columnas, cursor, alCargar) {
+  if (!cursor) return;
+  const tr = document.createElement("tr");
+  tr.innerHTML = `<td colspan="${columnas}"><a class="link" href="#">Cargar más</a></td>`;
+  tr.querySelector("a").addEventListener("click", (e) => {
+    e.preventDefault();
+    tr.remove();
+    alCargar(cursor);
+  });
+  tbody.appendChild(tr);
+}
+
+// after: cursor de la página siguiente (se agregan filas en vez de reemplazarlas)
+async function cargarUsuarios(q = "", after = null) {
   const tbody = document.getElementById("tabla-usuarios");
-  tbody.innerHTML = "<tr><td colspan='6'>Cargando...</td></tr>";
+  if (!after) tbody.innerHTML = "<tr><td colspan='6'>Cargando...</td></tr>";
 
+  const params = new URLSearchParams();
+  if (q) params.set("q", q);
+  if (after) params.set("after", after);
   let url = `${API_BASE}/usuarios/`;
-  if (q) url += `?q=${encodeURIComponent(q)}`;
+  if (params.toString()) url += `?${params}`;
 
   try {
     const res = await fetch(url);
     const data = await res.json();
 
-    tbody.innerHTML = "";
+    if (!after) tbody.innerHTML = "";
 
-    if (!data.length) {
+    if (!data.length && !after) {
       tbody.innerHTML = "<tr><td colspan='6'>No hay usuarios registrados</td></tr>";
       return;
     }
@@ -72,6 +90,7 @@ async function cargarUsuarios(q = "") {
         </tr>
       `;
     });
+    agregarCargarMas(tbody, 6, res.headers.get("X-Next-Cursor"), (cursor) => cargarUsuarios(q, cursor));
   } catch (err) {
     tbody.innerHTML = "<tr><td colspan='6'>Error al cargar usuarios</td></tr>";
     console.error(err);
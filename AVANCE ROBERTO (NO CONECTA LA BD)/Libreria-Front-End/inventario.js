@@ -1,52 +1,77 @@
 const API_BASE = "http://127.0.0.1:8000";
 
-// Carga el inventario desde el backend
-async function cargarInventario(q = "") {
+// Último filtro aplicado (para recargar lo mismo tras reconectar los eventos)
+let filtroActual = "";
+
+// Fila "Cargar más" al final de la tabla cuando el backend informa otra
+// página en la cabecera X-Next-Cursor (los listados devuelven 100 filas por vez)
+function agregarCargarMas(tbody, columnas, cursor, alCargar) {
+  if (!cursor) return;
+  const tr = document.createElement("tr");
+  tr.innerHTML = `<td colspan="${columnas}"><a class="link" href="#">Cargar más</a></td>`;
+  tr.querySelector("a").addEventListener("click", (e) => {
+    e.preventDefault();
+    tr.remove();
+    alCargar(cursor);
+  });
+  tbody.appendChild(tr);
+}
+
+// Carga el inventario desde el backend (leerPrimario: tras una escritura propia;
+// after: cursor de la página siguiente, cuyas filas se agregan al final)
+async function cargarInventario(q = "", leerPrimario = false, after = null) {
+  filtroActual = q;
   const tbody = document.getElementById("tabla-libros");
   // Ahora son 6 columnas: ID Inv., Libro, Punto de Venta, Stock, Stock Mínimo, Acciones
-  tbody.innerHTML = "<tr><td colspan='6'>Cargando...</td></tr>"; // <-- Colspan ajustado
+  if (!after) {
+    tbody.innerHTML = "<tr><td colspan='6'>Cargando...</td></tr>"; // <-- Colspan ajustado
+  }
 
+  const params = new URLSearchParams();
+  if (q) params.set("q", q);
+  if (after) params.set("after", after);
   let url = `${API_BASE}/inventario/`;
-  if (q) {
-    url += `?q=${encodeURIComponent(q)}`;
+  if (params.toString()) {
+    url += `?${params}`;
   }
 
   try {
-    const res = await fetch(url);
+    const res = await fetch(url, { headers: leerPrimario ? { "X-Leer-Primario": "1" } : {} });
     if (!res.ok) {
       throw new Error("Error al obtener el inventario");
     }
 
     const items = await res.json();
-    tbody.innerHTML = "";
+    if (!after) {
+      tbody.innerHTML = "";
+    }
 
-    if (!items.length) {
+    if (!items.length && !after) {
       tbody.innerHTML = "<tr><td colspan='6'>Sin resultados</td></tr>"; // <-- Colspan ajustado
       return;
     }
 
-    // Valores de ejemplo, ya que estos datos no se devuelven actualmente por la API /inventario
-    const puntoVentaEjemplo = "Librería Central";
-    const stockMinimoEjemplo = 10;
+    // /inventario es el stock global (almacén central); el de cada tienda está en /inventario-pv
+    const puntoVentaCentral = "Almacén central";
 
     items.forEach((item) => {
-      // Nota: asumimos que el campo 'nombre' del libro está disponible en el objeto 'item'
-      // Esto requiere una modificación del backend (inventario.py y schemas.py) para funcionar correctamente.
-      const nombreLibro = item.nombre || "Libro ID: " + item.libro_id;
-      
+      // El backend ya trae título y mínimo del libro en la misma fila
       const tr = document.createElement("tr");
+      // data-inv: la fila que actualizan los eventos de stock
+      tr.dataset.inv = item.id_inventario;
       tr.innerHTML = `
         <td>${item.id_inventario}</td>
-        <td>${nombreLibro}</td>
-        <td>${puntoVentaEjemplo}</td>
-        <td>${item.stock}</td>
-        <td>${stockMinimoEjemplo}</td>
+        <td>${item.libro}</td>
+        <td>${puntoVentaCentral}</td>
+        <td class="stock">${item.stock}</td>
+        <td>${item.stock_minimo ?? 0}</td>
         <td>
           <a class="link" href="#" onclick="venderLibro(${item.id_inventario}); return false;">Vender</a>
         </td>
       `; // Ahora son 6 <td>
       tbody.appendChild(tr);
     });
+    agregarCargarMas(tbody, 6, res.headers.get("X-Next-Cursor"), (cursor) => cargarInventario(q, leerPrimario, cursor));
   } catch (e) {
     console.error(e);
     tbody.innerHTML = "<tr><td colspan='6'>Error al cargar inventario</td></tr>"; // <-- Colspan ajustado
@@ -69,8 +94,9 @@ window.venderLibro = async function (idInventario) {
   }
 
   // 2) Determinar el usuario_id
-  // De momento usamos un ID fijo (1). Más adelante podemos guardar el id real en localStorage.
+  // Se guarda al iniciar sesión; el token también lo identifica en el backend
   const userIdStr = localStorage.getItem("userId");
+  const token = localStorage.getItem("token");
   const usuario_id = userIdStr ? parseInt(userIdStr, 10) : 1;
 
   // 3) Armar el cuerpo del movimiento (MovimientoCreate)
@@ -87,7 +113,8 @@ window.venderLibro = async function (idInventario) {
     const res = await fetch(`${API_BASE}/movimientos/`, {
       method: "POST",
       headers: {
-        "Content-Type": "application/json"
+        "Content-Type": "application/json",
+        ...(token ? { "Authorization": `Bearer ${token}` } : {})
       },
       body: JSON.stringify(movimiento)
     });
@@ -101,19 +128,41 @@ window.venderLibro = async function (idInventario) {
     }
 
     alert("✅ Venta registrada correctamente.");
-
-    // 4) Volver a cargar el inventario para ver el nuevo stock
-    cargarInventario();
+    // 4) El nuevo stock llega por el evento de stock (ver escucharStock)
   } catch (error) {
     console.error(error);
     alert("⚠️ Error al conectar con el servidor.");
   }
 };
 
+// Cambios de stock en vivo del inventario global (canal 0): se actualiza
+// solo la fila afectada, sin volver a pedir el listado
+function escucharStock() {
+  const fuente = new EventSource(`${API_BASE}/eventos/stock?pv=0`);
+  let reconectando = false;
+
+  fuente.onmessage = (e) => {
+    const { id_inventario, stock } = JSON.parse(e.data);
+    const celda = document.querySelector(`#tabla-libros tr[data-inv="${id_inventario}"] .stock`);
+    if (celda) {
+      celda.textContent = stock;
+    }
+  };
+
+  // EventSource reconecta solo; durante el corte pudo perderse algún evento
+  fuente.onopen = () => {
+    if (reconectando) {
+      cargarInventario(filtroActual, true);
+    }
+    reconectando = true;
+  };
+}
+
 // Cuando carga la página
 document.addEventListener("DOMContentLoaded", () => {
-  // Cargar inventario inicial
+  // Cargar inventario inicial y escuchar los cambios de stock
   cargarInventario();
+  escucharStock();
 
   // Buscar formulario de filtro (acepta dos posibles IDs por si tu HTML tiene uno u otro)
   const formFiltro =
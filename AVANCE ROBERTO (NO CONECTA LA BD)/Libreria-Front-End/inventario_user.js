@@ -12,13 +12,29 @@ if (!puntoVentaID) {
 
 
 // Cargar inventario
-async function cargarInventarioUser(q = "") {
+// Fila "Cargar más" al final de la tabla cuando el backend informa otra
+// página en la cabecera X-Next-Cursor (los listados devuelven 100 filas por vez)
+function agregarCargarMas(tbody, columnas, cursor, alCargar) {
+  if (!cursor) return;
+  const tr = document.createElement("tr");
+  tr.innerHTML = `<td colspan="${columnas}"><a class="link" href="#">Cargar más</a></td>`;
+  tr.querySelector("a").addEventListener("click", (e) => {
+    e.preventDefault();
+    tr.remove();
+    alCargar(cursor);
+  });
+  tbody.appendChild(tr);
+}
+
+// after: cursor de la página siguiente (se agregan filas en vez de reemplazarlas)
+async function cargarInventarioUser(q = "", after = null) {
   const tbody = document.getElementById("tabla-inventario-user");
-  tbody.innerHTML = "<tr><td colspan='4'>Cargando...</td></tr>";
+  if (!after) tbody.innerHTML = "<tr><td colspan='4'>Cargando...</td></tr>";
 
   try {
-    let url = `${API_BASE}/inventario?punto_venta=${puntoVentaID}`;
+    let url = `${API_BASE}/inventario-pv/?pv=${puntoVentaID}`;
     if (q) url += `&q=${encodeURIComponent(q)}`;
+    if (after) url += `&after=${encodeURIComponent(after)}`;
 
     const resp = await fetch(url);
     if (!resp.ok) {
@@ -28,12 +44,12 @@ async function cargarInventarioUser(q = "") {
 
     const data = await resp.json();
 
-    if (!data.length) {
+    if (!data.length && !after) {
       tbody.innerHTML = "<tr><td colspan='4'>No hay stock registrado</td></tr>";
       return;
     }
 
-    tbody.innerHTML = "";
+    if (!after) tbody.innerHTML = "";
 
     data.forEach(item => {
       const tr = document.createElement("tr");
@@ -51,6 +67,7 @@ async function cargarInventarioUser(q = "") {
 
       tbody.appendChild(tr);
     });
+    agregarCargarMas(tbody, 4, resp.headers.get("X-Next-Cursor"), (cursor) => cargarInventarioUser(q, cursor));
 
   } catch (err) {
     console.error(err);
@@ -67,8 +84,8 @@ async function vender(idInventario, stockActual) {
   }
 
   try {
-    const resp = await fetch(`${API_BASE}/inventario/${idInventario}/vender`, {
-      method: "PATCH",
+    const resp = await fetch(`${API_BASE}/inventario-pv/${idInventario}/vender`, {
+      method: "POST",
     });
 
     if (!resp.ok) {
@@ -42,16 +42,35 @@ window.modificarLibro = function (libroId) {
 };
 
 
-// Carga y muestra la lista de libros
-async function cargarLibros(q = "") {
+// Fila "Cargar más" al final de la tabla cuando el backend informa otra
+// página en la cabecera X-Next-Cursor (los listados devuelven 100 filas por vez)
+function agregarCargarMas(tbody, columnas, cursor, alCargar) {
+  if (!cursor) return;
+  const tr = document.createElement("tr");
+  tr.innerHTML = `<td colspan="${columnas}"><a class="link" href="#">Cargar más</a></td>`;
+  tr.querySelector("a").addEventListener("click", (e) => {
+    e.preventDefault();
+    tr.remove();
+    alCargar(cursor);
+  });
+  tbody.appendChild(tr);
+}
+
+// Carga y muestra la lista de libros (after: cursor de la página siguiente)
+async function cargarLibros(q = "", after = null) {
   const tbody = document.getElementById("tabla-libros-gestion");
   if (!tbody) return; 
 
-  tbody.innerHTML = "<tr><td colspan='5'>Cargando libros...</td></tr>";
+  if (!after) {
+    tbody.innerHTML = "<tr><td colspan='5'>Cargando libros...</td></tr>";
+  }
 
+  const params = new URLSearchParams();
+  if (q) params.set("q", q);
+  if (after) params.set("after", after);
   let url = `${API_BASE}/libros/`;
-  if (q) {
-    url += `?q=${encodeURIComponent(q)}`;
+  if (params.toString()) {
+    url += `?${params}`;
   }
 
   try {
@@ -61,9 +80,11 @@ async function cargarLibros(q = "") {
     }
 
     const libros = await res.json();
-    tbody.innerHTML = "";
+    if (!after) {
+      tbody.innerHTML = "";
+    }
 
-    if (!libros.length) {
+    if (!libros.length && !after) {
       tbody.innerHTML = "<tr><td colspan='5'>No hay libros registrados</td></tr>";
       return;
     }
@@ -84,6 +105,7 @@ async function cargarLibros(q = "") {
       `;
       tbody.appendChild(tr);
     });
+    agregarCargarMas(tbody, 5, res.headers.get("X-Next-Cursor"), (cursor) => cargarLibros(q, cursor));
   } catch (e) {
     console.error(e);
     tbody.innerHTML = "<tr><td colspan='5'>Error al cargar libros</td></tr>";
@@ -16,8 +16,10 @@ document.getElementById("loginForm").addEventListener("submit", async function (
     if (response.ok) {
       alert("✅ " + data.message);
 
-      // Guardar rol
+      // Guardar rol y sesión (el token va en Authorization: Bearer ...)
       localStorage.setItem("userRole", data.role);
+      localStorage.setItem("userId", data.id_usuario);
+      localStorage.setItem("token", data.access_token);
       if (data.role === "vendedor") {
         localStorage.setItem("userPV", data.punto_venta_id);
       }
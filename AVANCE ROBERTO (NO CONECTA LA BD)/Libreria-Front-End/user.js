@@ -14,8 +14,23 @@ async function cargarTiendas() {
   }
 }
 
-// Cargar inventario del usuario
-async function cargarInventarioUsuario() {
+// Fila "Cargar más" al final de la tabla cuando el backend informa otra
+// página en la cabecera X-Next-Cursor (los listados devuelven 100 filas por vez)
+function agregarCargarMas(tbody, columnas, cursor, alCargar) {
+  if (!cursor) return;
+  const tr = document.createElement("tr");
+  tr.innerHTML = `<td colspan="${columnas}"><a class="link" href="#">Cargar más</a></td>`;
+  tr.querySelector("a").addEventListener("click", (e) => {
+    e.preventDefault();
+    tr.remove();
+    alCargar(cursor);
+  });
+  tbody.appendChild(tr);
+}
+
+// Cargar inventario del usuario (leerPrimario: ver la venta recién hecha aunque haya réplicas;
+// after: cursor de la página siguiente, cuyas filas se agregan al final)
+async function cargarInventarioUsuario(leerPrimario = false, after = null) {
   const pvId = localStorage.getItem("userPV");
 
   if (!pvId) {
@@ -24,21 +39,28 @@ async function cargarInventarioUsuario() {
   }
 
   try {
-    const res = await fetch(`${API_BASE}/inventario/?pv=${pvId}`);
+    let url = `${API_BASE}/inventario-pv/?pv=${pvId}`;
+    if (after) url += `&after=${encodeURIComponent(after)}`;
+    const res = await fetch(url, {
+      headers: leerPrimario ? { "X-Leer-Primario": "1" } : {}
+    });
     const data = await res.json();
 
     const tbody = document.getElementById("tabla-inv-user");
-    tbody.innerHTML = "";
+    if (!after) tbody.innerHTML = "";
 
     data.forEach(item => {
       const tr = document.createElement("tr");
+      // data-inv: la fila que actualizan los eventos de stock
+      tr.dataset.inv = item.id_inventario;
       tr.innerHTML = `
         <td>${item.libro}</td>
-        <td>${item.stock}</td>
+        <td class="stock">${item.stock}</td>
         <td><button class="btn" onclick="vender(${item.id_inventario})">Vender</button></td>
       `;
       tbody.appendChild(tr);
     });
+    agregarCargarMas(tbody, 3, res.headers.get("X-Next-Cursor"), (cursor) => cargarInventarioUsuario(leerPrimario, cursor));
 
   } catch (error) {
     alert("Error cargando inventario");
@@ -47,13 +69,50 @@ async function cargarInventarioUsuario() {
 
 async function vender(idInv) {
   try {
-    await fetch(`${API_BASE}/inventario/vender/${idInv}`, { method: "POST" });
-    cargarInventarioUsuario();
+    // El backend toma al vendedor del token de la sesión
+    const token = localStorage.getItem("token");
+    const res = await fetch(`${API_BASE}/inventario-pv/${idInv}/vender`, {
+      method: "POST",
+      headers: token ? { "Authorization": `Bearer ${token}` } : {}
+    });
+    const data = await res.json();
+    if (!res.ok) {
+      alert("❌ " + (data.detail || "No se pudo registrar la venta."));
+      return;
+    }
+    // La respuesta ya trae el stock resultante: se actualiza solo esa fila
+    actualizarStock(data.id_inventario, data.stock);
   } catch (e) {
     alert("Error al registrar venta");
   }
 }
 
+function actualizarStock(idInv, stock) {
+  const celda = document.querySelector(`#tabla-inv-user tr[data-inv="${idInv}"] .stock`);
+  if (celda) {
+    celda.textContent = stock;
+  }
+}
+
+// Ventas de las otras cajas de la tienda, en vivo (sin consultar periódicamente)
+function escucharStock(pvId) {
+  const fuente = new EventSource(`${API_BASE}/eventos/stock?pv=${pvId}`);
+  let reconectando = false;
+
+  fuente.onmessage = (e) => {
+    const { id_inventario, stock } = JSON.parse(e.data);
+    actualizarStock(id_inventario, stock);
+  };
+
+  // EventSource reconecta solo; durante el corte pudo perderse algún evento
+  fuente.onopen = () => {
+    if (reconectando) {
+      cargarInventarioUsuario(true);
+    }
+    reconectando = true;
+  };
+}
+
 // al cargar la página -------------------------
 document.addEventListener("DOMContentLoaded", async () => {
   const pvId = localStorage.getItem("userPV");
@@ -65,6 +124,9 @@ document.addEventListener("DOMContentLoaded", async () => {
     return;
   }
 
+  cargarInventarioUsuario();
+  escucharStock(pvId);
+
   const res = await fetch(`${API_BASE}/puntos-venta/${pvId}`);
   const pv = await res.json();
 
@@ -1,18 +1,36 @@
 const API_BASE = "http://127.0.0.1:8000";
 
-async function cargarUsuarios(q = "") {
+// Fila "Cargar más" al final de la tabla cuando el backend informa otra
+// página en la cabecera X-Next-Cursor (los listados devuelven 100 filas por vez)
+function agregarCargarMas(tbody, columnas, cursor, alCargar) {
+  if (!cursor) return;
+  const tr = document.createElement("tr");
+  tr.innerHTML = `<td colspan="${columnas}"><a class="link" href="#">Cargar más</a></td>`;
+  tr.querySelector("a").addEventListener("click", (e) => {
+    e.preventDefault();
+    tr.remove();
+    alCargar(cursor);
+  });
+  tbody.appendChild(tr);
+}
+
+// after: cursor de la página siguiente (se agregan filas en vez de reemplazarlas)
+async function cargarUsuarios(q = "", after = null) {
   const tbody = document.getElementById("tabla-usuarios");
-  tbody.innerHTML = "<tr><td colspan='6'>Cargando...</td></tr>";
+  if (!after) tbody.innerHTML = "<tr><td colspan='6'>Cargando...</td></tr>";
 
+  const params = new URLSearchParams();
+  if (q) params.set("q", q);
+  if (after) params.set("after", after);
   let url = `${API_BASE}/usuarios/`;
-  if (q) url += `?q=${encodeURIComponent(q)}`;
+  if (params.toString()) url += `?${params}`;
 
   const res = await fetch(url);
   const data = await res.json();
 
-  tbody.innerHTML = "";
+  if (!after) tbody.innerHTML = "";
 
-  if (!data.length) {
+  if (!data.length && !after) {
     tbody.innerHTML = "<tr><td colspan='6'>No hay usuarios registrados</td></tr>";
     return;
   }
@@ -34,6 +52,7 @@ async function cargarUsuarios(q = "") {
     `;
     tbody.appendChild(tr);
   });
+  agregarCargarMas(tbody, 6, res.headers.get("X-Next-Cursor"), (cursor) => cargarUsuarios(q, cursor));
 }
 
 // eliminar usuario
@@ -48,8 +67,10 @@ const res = await fetch(`${API_BASE}/usuarios/login`, {
 
 const data = await res.json();
 
-// Guardar rol
+// Guardar rol y sesión
 localStorage.setItem("userRole", data.role);
+localStorage.setItem("userId", data.id_usuario);
+localStorage.setItem("token", data.access_token);
 
 // 🔥 GUARDAR PUNTO DE VENTA DEL VENDEDOR
 if (data.role === "vendedor") {